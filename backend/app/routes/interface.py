@@ -1,12 +1,36 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+import json
 import logging
+from typing import Any, AsyncIterator, Dict, Optional, TypeVar
 
-from app.services.agent import new_card_service, deep_search_service
+from pydantic import BaseModel
+
+from app.services.agent import (
+    card_batch_service,
+    card_replan_service,
+    new_card_service,
+    deep_search_service,
+)
+from app.services.agent.board_executor import create_board_executor
+from app.services.agent.deep_search_jobs import deep_search_jobs
+from app.services.agent.deep_search_stream import deep_search_streams
 from app.services.agent.image_generation_logic import generate_image_for_task
+from app.services.agent.rate_limiter import anthropic_rate_limiter
+from app.services.agent.request_coalescer import RequestCoalescer
+from app.services.agent.research_jobs import research_jobs
 from app.services.github.schema import (
     AgentRequest,
     AgentResponse,
+    BatchNewCardRequest,
+    BatchNewCardResponse,
+    BoardExecutionRequest,
+    BoardExecutionResponse,
+    DeepSearchJobResponse,
+    DeepSearchRequest,
     NewCardAgentResponse,
+    NewCardRequest,
+    ReplanCardsRequest,
     ImageGenerationResponse,
     ImageGenerationRequest,
 )
@@ -23,6 +47,16 @@ logger = logging.getLogger(__name__)
 chat_service = ChatService()
 agent_service = AgentService()
 vapi_service = VapiService()
+request_coalescer = RequestCoalescer()
+board_executor = create_board_executor(vapi_service)
+
+ResponseT = TypeVar("ResponseT", bound=BaseModel)
+
+
+def _mark_coalesced(response: ResponseT, coalesced: bool) -> ResponseT:
+    """Returns a copy of a shared response with its own `coalesced` flag."""
+    metadata = {**(getattr(response, "metadata", None) or {}), "coalesced": coalesced}
+    return response.model_copy(update={"metadata": metadata})
 
 
 @router.post("/agent", response_model=AgentResponse)
@@ -63,7 +97,7 @@ async def trigger_outbound_call(
 
 @router.post("/new-card", response_model=NewCardAgentResponse)
 async def create_new_card_from_prompt(
-    agent_request: AgentRequest,
+    agent_request: NewCardRequest,
 ):
     """
     Takes a natural language promptand uses a smolagent to create a
@@ -73,7 +107,11 @@ async def create_new_card_from_prompt(
         raise HTTPException(status_code=400, detail="Prompt cannot be emty.")
 
     try:
-        return await new_card_service.create_new_card_from_prompt(agent_request)
+        response, coalesced = await request_coalescer.run(
+            RequestCoalescer.make_key("new-card", agent_request),
+            lambda: new_card_service.create_new_card_from_prompt(agent_request),
+        )
+        return _mark_coalesced(response, coalesced)
     except ValueError as e:
         # Catches user errors or bad output from the model (4xx error)
         raise HTTPException(status_code=400, detail=str(e))
@@ -88,19 +126,141 @@ async def create_new_card_from_prompt(
         )
 
 
+@router.post("/new-card/replan", response_model=NewCardAgentResponse)
+async def replan_new_cards(
+    replan_request: ReplanCardsRequest,
+):
+    """
+    Takes an existing board and one edited card and regenerates only the
+    cards downstream of it. All other cards are returned unchanged.
+    """
+    try:
+        return await card_replan_service.replan_cards(replan_request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Unhandled exception in /new-card/replan endpoint: {e}")
+        raise HTTPException(
+            status_code=500, detail="An internal server error occurred."
+        )
+
+
+@router.post("/new-card/batch", response_model=BatchNewCardResponse)
+async def create_new_cards_in_batch(
+    batch_request: BatchNewCardRequest,
+):
+    """
+    Plans boards for many prompts in one request. In `sync` mode every prompt
+    goes through the `/new-card` path with bounded concurrency and per-item
+    results or errors are returned. In `async` mode the prompts are submitted
+    as a message batch; poll `/new-card/batch/{batch_id}` for the results.
+    """
+    try:
+        if batch_request.mode == "async":
+            return await card_batch_service.submit_batch(batch_request.requests)
+        return await card_batch_service.plan_batch(
+            batch_request.requests, batch_request.max_concurrency
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Unhandled exception in /new-card/batch endpoint: {e}")
+        raise HTTPException(
+            status_code=500, detail="An internal server error occurred."
+        )
+
+
+@router.get("/new-card/batch/{batch_id}", response_model=BatchNewCardResponse)
+async def get_new_card_batch(batch_id: str):
+    """
+    Returns the status of an async planning batch, with per-item results
+    once it has ended.
+    """
+    try:
+        batch = await card_batch_service.get_batch(batch_id)
+    except Exception as e:
+        logger.exception(f"Unhandled exception in /new-card/batch endpoint: {e}")
+        raise HTTPException(status_code=503, detail=f"Batch lookup failed: {e}")
+
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    return batch
+
+
+def _format_sse(event: Dict[str, Any]) -> str:
+    """Formats a service event dict as a Server-Sent Events frame."""
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def _sse_stream(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    try:
+        async for event in events:
+            yield _format_sse(event)
+    except Exception as e:
+        logger.exception(f"Unhandled exception while streaming events: {e}")
+        yield _format_sse(
+            {"event": "error", "data": {"detail": "An internal server error occurred."}}
+        )
+
+
+@router.post("/new-card/stream")
+async def stream_new_cards_from_prompt(
+    agent_request: AgentRequest,
+):
+    """
+    Streaming variant of `/new-card`. Emits Server-Sent Events: one `card`
+    event per validated card as soon as it has been generated, followed by a
+    final `done` event (dependency graph validated) or an `error` event.
+    """
+    if not agent_request.prompt or not agent_request.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+
+    return StreamingResponse(
+        _sse_stream(new_card_service.stream_new_cards_from_prompt(agent_request)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _with_deadline_header(
+    agent_request: DeepSearchRequest, deadline_seconds: Optional[float]
+) -> DeepSearchRequest:
+    """Applies the `X-Deadline-Seconds` header unless the body sets a deadline."""
+    if deadline_seconds is None or agent_request.deadline_seconds is not None:
+        return agent_request
+    return agent_request.model_copy(update={"deadline_seconds": deadline_seconds})
+
+
 @router.post("/deep-search", response_model=AgentResponse)
 async def perform_deep_search(
-    agent_request: AgentRequest,
+    agent_request: DeepSearchRequest,
+    x_deadline_seconds: Optional[float] = Header(None, gt=0),
 ):
     """
     Takes a prompt and uses a web-searching agent to find a
-    comprehensive answer.
+    comprehensive answer. The deadline can also be given in the
+    `X-Deadline-Seconds` header; past it the agent answers from the steps it
+    has taken so far and the answer is marked `partial`.
     """
     if not agent_request.prompt or not agent_request.prompt.strip():
         raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+    agent_request = _with_deadline_header(agent_request, x_deadline_seconds)
 
     try:
-        return await deep_search_service.run_deep_search(agent_request)
+        # Attach to the search /new-card may already have started for this card.
+        speculative_response = await research_jobs.claim_request(agent_request)
+        if speculative_response is not None:
+            return speculative_response
+
+        response, coalesced = await request_coalescer.run(
+            RequestCoalescer.make_key("deep-search", agent_request),
+            lambda: deep_search_service.run_deep_search(agent_request),
+        )
+        return _mark_coalesced(response, coalesced)
     except RuntimeError as e:
         # Catches backend service failures (e.g., agent execution)
         raise HTTPException(status_code=503, detail=str(e))
@@ -112,6 +272,155 @@ async def perform_deep_search(
         )
 
 
+@router.post("/deep-search/stream")
+async def stream_deep_search(
+    agent_request: DeepSearchRequest,
+    x_deadline_seconds: Optional[float] = Header(None, gt=0),
+):
+    """
+    Streaming variant of `/deep-search`. Emits Server-Sent Events: `started`
+    with the run id, one `planning` or `step` event per finished agent step,
+    then `done` with the answer, `stopped` or `error`. Disconnecting stops
+    the run.
+    """
+    if not agent_request.prompt or not agent_request.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+    agent_request = _with_deadline_header(agent_request, x_deadline_seconds)
+
+    return StreamingResponse(
+        _sse_stream(deep_search_streams.stream(agent_request)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/deep-search/runs/{run_id}/stop", response_model=Dict[str, Any])
+async def stop_deep_search(run_id: str):
+    """Stops a streaming deep search after its current step."""
+    if not deep_search_streams.stop(run_id):
+        raise HTTPException(status_code=404, detail="Run not found or already ended.")
+    return {"run_id": run_id, "stopped": True}
+
+
+@router.post("/deep-search/jobs", response_model=DeepSearchJobResponse, status_code=202)
+async def submit_deep_search_job(
+    agent_request: DeepSearchRequest,
+    x_deadline_seconds: Optional[float] = Header(None, gt=0),
+):
+    """
+    Queues a deep search and returns its job id immediately. Fetch the result
+    from `/deep-search/jobs/{job_id}` or follow `/deep-search/jobs/{job_id}/events`.
+    """
+    if not agent_request.prompt or not agent_request.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty.")
+    agent_request = _with_deadline_header(agent_request, x_deadline_seconds)
+
+    try:
+        return deep_search_jobs.submit(agent_request).response()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/deep-search/jobs/{job_id}", response_model=DeepSearchJobResponse)
+async def get_deep_search_job(
+    job_id: str,
+    wait: float = Query(0.0, ge=0.0, le=60.0),
+):
+    """
+    Returns a deep search job's status and, once it has ended, its result.
+    With `wait`, holds the request for up to that many seconds until the
+    job ends (long polling).
+    """
+    job = await deep_search_jobs.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job.response()
+
+
+@router.get("/deep-search/jobs/{job_id}/events")
+async def stream_deep_search_job(job_id: str):
+    """
+    Server-Sent Events for a deep search job: periodic `status` events while
+    it is pending, then one `done` or `error` event carrying the job.
+    """
+    job = deep_search_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+
+    return StreamingResponse(
+        _sse_stream(deep_search_jobs.events(job)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/research-jobs/{job_id}", response_model=AgentResponse)
+async def claim_research_job(job_id: str):
+    """
+    Waits for a speculative deep search started by `/new-card` and returns
+    its result. Each job can be claimed once.
+    """
+    try:
+        response = await research_jobs.claim(job_id)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Unhandled exception in /research-jobs endpoint: {e}")
+        raise HTTPException(
+            status_code=500, detail="An internal server error occurred."
+        )
+
+    if response is None:
+        raise HTTPException(
+            status_code=404, detail="Research job not found or expired."
+        )
+    return response
+
+
+@router.post("/execute-board", response_model=BoardExecutionResponse)
+async def execute_board(
+    board_request: BoardExecutionRequest,
+):
+    """
+    Executes a whole board on the server. Independent cards run concurrently
+    and each card starts as soon as its dependencies are done, receiving
+    their results as context.
+    """
+    if not board_request.cards:
+        raise HTTPException(status_code=400, detail="Board cannot be empty.")
+
+    try:
+        return await board_executor.execute(board_request)
+    except ValueError as e:
+        # Invalid dependency graph
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception(f"Unhandled exception in /execute-board endpoint: {e}")
+        raise HTTPException(
+            status_code=500, detail="An internal server error occurred."
+        )
+
+
+@router.get("/rate-limits", response_model=Dict[str, Any])
+async def get_rate_limits():
+    """
+    Returns the current limits, in-flight requests and queue depth of the
+    shared Anthropic rate limiter.
+    """
+    return anthropic_rate_limiter.stats()
+
+
+@router.get("/deep-search/pool", response_model=Dict[str, Any])
+async def get_deep_search_pool():
+    """
+    Returns the size, agents in use, queued requests and wait times of the
+    deep search agent pool.
+    """
+    return deep_search_service.pool_stats()
+
+
 @router.get("/board-init", response_model=NewCardAgentResponse)
 async def get_board_init():
     """
@@ -179,7 +488,11 @@ async def generate_image_endpoint(
     Generates an image based on a descriptive prompt using a text-to-image model.
     """
     try:
-        return await generate_image_for_task(request)
+        response, coalesced = await request_coalescer.run(
+            RequestCoalescer.make_key("generate-image", request),
+            lambda: generate_image_for_task(request),
+        )
+        return _mark_coalesced(response, coalesced)
     except RuntimeError as e:
         # Catches backend service failures (e.g., HF API is down)
         raise HTTPException(status_code=503, detail=str(e))
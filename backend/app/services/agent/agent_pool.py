@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+A = TypeVar("A")
+T = TypeVar("T")
+
+
+def reset_agent_state(agent: Any) -> None:
+    """
+    Clears everything a smolagents agent keeps between runs: its memory and
+    token monitor, a pending interrupt, and the variables its Python
+    executor accumulated while running code.
+    """
+    if hasattr(agent, "memory"):
+        agent.memory.reset()
+    if hasattr(agent, "monitor"):
+        agent.monitor.reset()
+    agent.interrupt_switch = False
+    state = getattr(getattr(agent, "python_executor", None), "state", None)
+    if isinstance(state, dict):
+        state.clear()
+        state["__name__"] = "__main__"
+
+
+class AgentPool(Generic[A]):
+    """
+    Bounded pool of pre-initialized agents.
+
+    Each run checks an agent out for its exclusive use and checks it back in
+    with its per-run state reset, so concurrent requests never share an
+    agent. When all agents are busy, callers queue for up to
+    `checkout_timeout` seconds; at most `max_waiting` callers may queue
+    before new ones are rejected with `RuntimeError`.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], A],
+        size: int,
+        name: str = "agents",
+        reset: Callable[[A], None] = reset_agent_state,
+        max_waiting: int = 32,
+        checkout_timeout: float = 300.0,
+    ):
+        self.name = name
+        self.size = size
+        self.reset = reset
+        self.max_waiting = max_waiting
+        self.checkout_timeout = checkout_timeout
+        self._agents: List[A] = [factory() for _ in range(size)]
+        self._available: Optional["asyncio.Queue[A]"] = None
+        self._waiting = 0
+        self._checkouts = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        logger.info(f"Initialized pool of {size} {name}.")
+
+    def _queue(self) -> "asyncio.Queue[A]":
+        # Created on first use so that it belongs to the running event loop.
+        if self._available is None:
+            self._available = asyncio.Queue()
+            for agent in self._agents:
+                self._available.put_nowait(agent)
+        return self._available
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[A]:
+        """Holds one agent for the duration of the block."""
+        available = self._queue()
+        if available.empty() and self._waiting >= self.max_waiting:
+            self._rejected += 1
+            raise RuntimeError(
+                f"All {self.size} {self.name} are busy and {self._waiting} "
+                "requests are already waiting."
+            )
+
+        self._waiting += 1
+        start = time.monotonic()
+        try:
+            agent = await asyncio.wait_for(available.get(), self.checkout_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise RuntimeError(
+                f"Timed out after {self.checkout_timeout:.0f}s waiting for one of "
+                f"the {self.size} {self.name}."
+            )
+        finally:
+            self._waiting -= 1
+
+        waited = time.monotonic() - start
+        self._checkouts += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        if waited > 1:
+            logger.info(f"Waited {waited:.1f}s for one of the {self.name}.")
+
+        try:
+            yield agent
+        finally:
+            try:
+                self.reset(agent)
+            except Exception as e:
+                logger.error(f"Failed to reset agent from {self.name} pool: {e}")
+            available.put_nowait(agent)
+
+    async def run(self, call: Callable[[A], T]) -> Tuple[T, float]:
+        """
+        Runs the blocking `call(agent)` in a worker thread with a checked-out
+        agent. Returns its result and the seconds spent waiting for the agent.
+        """
+        start = time.monotonic()
+        async with self.checkout() as agent:
+            waited = time.monotonic() - start
+            future = asyncio.ensure_future(asyncio.to_thread(call, agent))
+            try:
+                return await asyncio.shield(future), waited
+            except asyncio.CancelledError:
+                # The thread cannot be cancelled: stop the agent at its next
+                # step and wait, so it is not checked in while still running.
+                if hasattr(agent, "interrupt"):
+                    agent.interrupt()
+                await asyncio.wait({future})
+                if not future.cancelled():
+                    # Nobody awaits the future any more; retrieving its
+                    # exception keeps asyncio from logging "Future exception
+                    # was never retrieved" when the interrupted run fails.
+                    future.exception()
+                raise
+
+    def stats(self) -> Dict[str, Any]:
+        available = (
+            self._available.qsize() if self._available is not None else self.size
+        )
+        return {
+            "name": self.name,
+            "size": self.size,
+            "available": available,
+            "in_use": self.size - available,
+            "waiting": self._waiting,
+            "checkouts": self._checkouts,
+            "rejected": self._rejected,
+            "average_wait_seconds": self._total_wait / self._checkouts
+            if self._checkouts
+            else 0.0,
+            "max_wait_seconds": self._max_wait,
+        }
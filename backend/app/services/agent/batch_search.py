@@ -0,0 +1,106 @@
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from smolagents import Tool
+
+from app.services.agent.rate_limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# One result as formatted by the web search tool: "[title](href)\nbody".
+_RESULT_PATTERN = re.compile(r"^\[(?P<title>.*)\]\((?P<href>\S+)\)$", re.MULTILINE)
+
+
+def parse_results(text: str) -> List[Tuple[str, str]]:
+    """Splits a web search tool's output into (href, formatted result) pairs."""
+    matches = list(_RESULT_PATTERN.finditer(text))
+    results = []
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        results.append((match.group("href"), text[match.start() : end].strip()))
+    return results
+
+
+class BatchSearchTool(Tool):
+    """
+    Runs several queries through a single-query search tool at once and
+    merges their results, listing each link only once. The queries share
+    `executor`, whose worker count caps the concurrent requests to the search
+    host across all agents, and the search tool's HTTP client. The search
+    tool is expected to pace its requests with `search_rate_limiter`.
+    """
+
+    name = "batch_web_search"
+    description = """Performs several web searches at once and returns the merged top results, each link listed once. Use it instead of calling web_search repeatedly when you need more than one query. Searches are rate-limited: past the first few queries, each one adds about a second, so only include the queries you need."""
+    inputs = {
+        "queries": {
+            "type": "array",
+            "description": 'The search queries to perform, e.g. ["EV sales Germany 2024", "EV charging network Germany"].',
+        }
+    }
+    output_type = "string"
+
+    def __init__(
+        self, search_tool: Tool, executor: ThreadPoolExecutor, max_queries: int = 8
+    ):
+        super().__init__()
+        self.search_tool = search_tool
+        self.executor = executor
+        self.max_queries = max_queries
+
+    def _search(self, query: str) -> Tuple[Optional[str], Optional[str]]:
+        """Returns the search tool's output, or the error it failed with."""
+        try:
+            return self.search_tool.forward(query), None
+        except Exception as e:
+            logger.info(f"Search for '{query}' failed: {e}")
+            return None, str(e) or type(e).__name__
+
+    def forward(self, queries: List[str]) -> str:
+        if isinstance(queries, str):
+            queries = [queries]
+        queries = list(dict.fromkeys(query.strip() for query in queries if query))
+        skipped = queries[self.max_queries :]
+        queries = queries[: self.max_queries]
+
+        outputs = list(self.executor.map(self._search, queries))
+
+        seen: Dict[str, str] = {}
+        sections = []
+        for query, (output, error) in zip(queries, outputs):
+            if output is None:
+                sections.append(f"### {query}\nSearch failed: {error}")
+                continue
+            fresh = [
+                result
+                for href, result in parse_results(output)
+                if seen.setdefault(href, query) == query
+            ]
+            body = "\n\n".join(fresh) if fresh else "Only links already listed above."
+            sections.append(f"### {query}\n{body}")
+        if skipped:
+            sections.append(
+                f"Skipped {len(skipped)} queries beyond the limit of "
+                f"{self.max_queries}: {', '.join(skipped)}"
+            )
+        return "## Search Results\n\n" + "\n\n".join(sections)
+
+
+# --- One-Time Initialization ---
+# Shared by every agent so the cap applies to the search host as a whole.
+search_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEARCH_MAX_CONCURRENCY", "4")),
+    thread_name_prefix="web-search",
+)
+# Paces the requests to the search host from every agent and batch thread.
+# The burst lets the queries of one batch start together; sustained searching
+# is held to SEARCH_REQUESTS_PER_SECOND, so large batches take longer.
+search_rate_limiter = AdaptiveRateLimiter(
+    name="web search",
+    requests_per_second=float(os.getenv("SEARCH_REQUESTS_PER_SECOND", "1")),
+    burst=int(os.getenv("SEARCH_BURST", "4")),
+    max_concurrency=int(os.getenv("SEARCH_MAX_CONCURRENCY", "4")),
+)
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.services.agent import deep_search_service
+from app.services.agent.card_expansion import (
+    BudgetTracker,
+    run_expanded,
+    shift_started_at,
+)
+from app.services.agent.card_graph import CardGraph
+from app.services.agent.image_generation_logic import generate_image_for_task
+from app.services.agent.new_card_service import research_prompt
+from app.services.agent.research_jobs import research_jobs
+from app.services.github.schema import (
+    AgentRequest,
+    BoardExecutionRequest,
+    BoardExecutionResponse,
+    CardExecutionResult,
+    ImageGenerationRequest,
+    NewCardData,
+    TaskType,
+)
+from app.services.vapi.schema import OutboundCallRequest
+from app.services.vapi.service import VapiService
+
+logger = logging.getLogger(__name__)
+
+# A runner executes one card given the results of the cards it depends on and
+# returns the fields of its `CardExecutionResult` (output, image_base64, metadata).
+CardRunner = Callable[
+    [NewCardData, List[CardExecutionResult], BoardExecutionRequest],
+    Awaitable[Dict[str, Any]],
+]
+
+DEFAULT_CONCURRENCY: Dict[TaskType, int] = {
+    TaskType.RESEARCH: int(os.getenv("BOARD_MAX_CONCURRENT_RESEARCH", "3")),
+    TaskType.IMAGE_GENERATION: int(os.getenv("BOARD_MAX_CONCURRENT_IMAGES", "2")),
+    TaskType.PHONE: int(os.getenv("BOARD_MAX_CONCURRENT_CALLS", "1")),
+}
+
+
+def _upstream_context(upstream: List[CardExecutionResult]) -> str:
+    """Joins the text outputs of the cards a card depends on."""
+    return "\n\n".join(
+        f"[{result.card_id}] {result.output}" for result in upstream if result.output
+    )
+
+
+class BoardExecutor:
+    """
+    Executes a board of cards on the server.
+
+    Every card starts as soon as all of its dependencies are done, under a
+    per-task-type concurrency cap, and receives their results as context.
+    When a card fails, everything downstream of it is skipped. Total time is
+    therefore bounded by the critical path rather than the sum of all cards.
+    """
+
+    def __init__(
+        self,
+        runners: Dict[TaskType, CardRunner],
+        concurrency: Optional[Dict[TaskType, int]] = None,
+    ):
+        self.runners = runners
+        limits = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self._semaphores = {
+            task_type: asyncio.Semaphore(limit) for task_type, limit in limits.items()
+        }
+
+    async def execute(self, request: BoardExecutionRequest) -> BoardExecutionResponse:
+        start_time = time.time()
+        graph = CardGraph(request.cards)
+        logger.info(
+            f"Executing board of {len(graph.cards)} cards in {len(graph.levels)} levels."
+        )
+
+        pending = {
+            card_id: set(card.dependencies) for card_id, card in graph.cards.items()
+        }
+        results: Dict[str, CardExecutionResult] = {}
+        completed: List[CardExecutionResult] = []
+        running: Dict["asyncio.Task[CardExecutionResult]", str] = {}
+        parallelism = {"running": 0, "peak": 0}
+
+        def launch(card_id: str) -> None:
+            card = graph.cards[card_id]
+            upstream = [results[dep_id] for dep_id in card.dependencies]
+            task = asyncio.create_task(
+                self._execute_card(card, upstream, request, start_time, parallelism)
+            )
+            running[task] = card_id
+
+        def skip_downstream_of(card_id: str) -> None:
+            for dependent_id in graph.descendants([card_id]):
+                if dependent_id not in results:
+                    dependent = graph.cards[dependent_id]
+                    results[dependent_id] = CardExecutionResult(
+                        card_id=dependent_id,
+                        task_type=dependent.task_type,
+                        status="skipped",
+                        error=f"Dependency '{card_id}' did not complete.",
+                    )
+                    completed.append(results[dependent_id])
+
+        for card_id in graph.levels[0] if graph.levels else []:
+            launch(card_id)
+
+        try:
+            while running:
+                done, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    card_id = running.pop(task)
+                    result = task.result()
+                    results[card_id] = result
+                    completed.append(result)
+
+                    if result.status != "done":
+                        skip_downstream_of(card_id)
+                        continue
+
+                    for dependent_id in set(graph.dependents[card_id]):
+                        pending[dependent_id].discard(card_id)
+                        if not pending[dependent_id] and dependent_id not in results:
+                            launch(dependent_id)
+        finally:
+            for task in running:
+                task.cancel()
+
+        critical_path, critical_path_seconds = graph.critical_path()
+        execution_time = time.time() - start_time
+        metadata = {
+            "card_count": len(graph.cards),
+            "execution_levels": graph.levels,
+            "critical_path": critical_path,
+            "estimated_critical_path_seconds": critical_path_seconds,
+            "max_parallel_cards": parallelism["peak"],
+            "total_card_time": sum(result.execution_time for result in completed),
+            "failed": sum(result.status == "failed" for result in completed),
+            "skipped": sum(result.status == "skipped" for result in completed),
+        }
+
+        return BoardExecutionResponse(
+            results=completed, execution_time=execution_time, metadata=metadata
+        )
+
+    async def _execute_card(
+        self,
+        card: NewCardData,
+        upstream: List[CardExecutionResult],
+        request: BoardExecutionRequest,
+        board_start_time: float,
+        parallelism: Dict[str, int],
+    ) -> CardExecutionResult:
+        runner = self.runners.get(card.task_type)
+        if runner is None:
+            return CardExecutionResult(
+                card_id=card.card_id,
+                task_type=card.task_type,
+                status="failed",
+                error=f"No runner configured for task type '{card.task_type.value}'.",
+            )
+
+        async with self._semaphores[card.task_type]:
+            parallelism["running"] += 1
+            parallelism["peak"] = max(parallelism["peak"], parallelism["running"])
+            started_at = time.time()
+            try:
+                logger.info(
+                    f"Executing card '{card.card_id}' ({card.task_type.value})."
+                )
+                fields = await runner(card, upstream, request)
+                if "children" in fields:
+                    # Sub-cards are timed from the start of this card.
+                    fields["children"] = shift_started_at(
+                        fields["children"], started_at - board_start_time
+                    )
+                status, error = "done", None
+            except Exception as e:
+                logger.error(f"Card '{card.card_id}' failed: {e}")
+                fields, status, error = {}, "failed", str(e)
+            finally:
+                parallelism["running"] -= 1
+
+        return CardExecutionResult(
+            card_id=card.card_id,
+            task_type=card.task_type,
+            status=status,
+            error=error,
+            started_at=started_at - board_start_time,
+            execution_time=time.time() - started_at,
+            **fields,
+        )
+
+
+# --- Default runners ---
+
+
+async def _run_research_prompt(prompt: str) -> Dict[str, Any]:
+    response = await research_jobs.claim_prompt(prompt)
+    if response is None:
+        response = await deep_search_service.run_deep_search(
+            AgentRequest(prompt=prompt)
+        )
+    return {"output": response.response, "metadata": response.metadata}
+
+
+async def _run_research_card(
+    card: NewCardData,
+    upstream: List[CardExecutionResult],
+    request: BoardExecutionRequest,
+) -> Dict[str, Any]:
+    context = _upstream_context(upstream)
+    if context:
+        context = f"\n\nResults of the tasks this one depends on:\n{context}"
+    prompt = research_prompt(card) + context
+
+    if request.expansion is not None:
+        # Split broad research into concurrent sub-cards within the budget.
+        return await run_expanded(
+            card,
+            prompt,
+            BudgetTracker.start(request.expansion),
+            _run_research_prompt,
+            context=context,
+        )
+    return await _run_research_prompt(prompt)
+
+
+async def _run_image_card(
+    card: NewCardData,
+    upstream: List[CardExecutionResult],
+    request: BoardExecutionRequest,
+) -> Dict[str, Any]:
+    # Same prompt the board uses: the card's description.
+    prompt = card.description if len(card.description) >= 10 else card.title
+    response = await generate_image_for_task(ImageGenerationRequest(prompt=prompt))
+    return {
+        "output": f"Image generated with {response.model_id}.",
+        "image_base64": response.image_base64,
+    }
+
+
+def _make_phone_runner(vapi_service: VapiService) -> CardRunner:
+    async def _run_phone_card(
+        card: NewCardData,
+        upstream: List[CardExecutionResult],
+        request: BoardExecutionRequest,
+    ) -> Dict[str, Any]:
+        if request.phone_contact is None:
+            raise ValueError("No phone_contact provided for phone tasks.")
+
+        response = await vapi_service.make_outbound_call(
+            OutboundCallRequest(
+                target_number=request.phone_contact.target_number,
+                name=request.phone_contact.name,
+                market_overview=_upstream_context(upstream) or card.description,
+                action_to_take=card.title,
+            )
+        )
+        if not response.success:
+            raise RuntimeError(response.message)
+        return {"output": response.message, "metadata": {"call_id": response.call_id}}
+
+    return _run_phone_card
+
+
+def create_board_executor(vapi_service: VapiService) -> BoardExecutor:
+    """Builds an executor wired to the deep-search, image and phone services."""
+    return BoardExecutor(
+        runners={
+            TaskType.RESEARCH: _run_research_card,
+            TaskType.IMAGE_GENERATION: _run_image_card,
+            TaskType.PHONE: _make_phone_runner(vapi_service),
+        }
+    )
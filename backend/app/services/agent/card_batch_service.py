@@ -0,0 +1,303 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.services.agent import new_card_service
+from app.services.agent.rate_limiter import anthropic_rate_limiter
+from app.services.agent.response_cache import TTLCache
+from app.services.github.schema import (
+    AgentRequest,
+    BatchNewCardItem,
+    BatchNewCardResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# How long submitted batches and their results are kept.
+BATCH_RETENTION_SECONDS = float(
+    os.getenv("NEW_CARD_BATCH_RETENTION_SECONDS", str(7 * 24 * 3600))
+)
+
+
+class MessageBatchBackend(ABC):
+    """
+    The subset of the Anthropic Message Batches API used for bulk planning.
+    Results are returned as dicts with a `custom_id` and either a `message`
+    or an `error`.
+    """
+
+    @abstractmethod
+    async def create(self, requests: List[Dict[str, Any]]) -> str:
+        """Submits the requests as one batch and returns its id."""
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> str:
+        """Returns "in_progress" or "ended"."""
+
+    @abstractmethod
+    async def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        """Returns the result entries of an ended batch."""
+
+
+class AnthropicMessageBatches(MessageBatchBackend):
+    """Submits batches to the Anthropic Message Batches API."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def create(self, requests: List[Dict[str, Any]]) -> str:
+        batch, _ = await anthropic_rate_limiter.call(
+            self.client.messages.batches.create, requests=requests
+        )
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        return "ended" if batch.processing_status == "ended" else "in_progress"
+
+    async def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        entries = []
+        async for entry in await self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                entries.append(
+                    {"custom_id": entry.custom_id, "message": entry.result.message}
+                )
+            else:
+                error = getattr(entry.result, "error", None)
+                detail = f"{entry.result.type}: {error}" if error else entry.result.type
+                entries.append({"custom_id": entry.custom_id, "error": detail})
+        return entries
+
+
+class LocalMessageBatches(MessageBatchBackend):
+    """
+    In-process stand-in for the Message Batches API: requests are sent one by
+    one through `create_message` in a background task, with bounded
+    concurrency. Used in DEMO_MODE, in tests, and where the batch API is not
+    available. Like `submitted_batches`, batches that are never collected
+    expire after `retention_seconds` and at most `max_batches` are kept.
+    """
+
+    def __init__(
+        self,
+        create_message: Callable[..., Awaitable[Any]],
+        max_concurrency: int = 4,
+        retention_seconds: float = BATCH_RETENTION_SECONDS,
+        max_batches: int = 1000,
+    ):
+        self.create_message = create_message
+        self.max_concurrency = max_concurrency
+        self._batches: TTLCache["asyncio.Task[List[Dict[str, Any]]]"] = TTLCache(
+            max_size=max_batches, ttl_seconds=retention_seconds
+        )
+
+    async def create(self, requests: List[Dict[str, Any]]) -> str:
+        batch_id = f"local-batch-{uuid.uuid4().hex[:12]}"
+        self._batches.set(batch_id, asyncio.create_task(self._process(requests)))
+        return batch_id
+
+    def _batch(self, batch_id: str) -> "asyncio.Task[List[Dict[str, Any]]]":
+        task = self._batches.get(batch_id)
+        if task is None:
+            raise KeyError(f"Unknown or expired batch '{batch_id}'.")
+        return task
+
+    async def _process(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def process_one(request: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    message = await self.create_message(**request["params"])
+                    return {"custom_id": request["custom_id"], "message": message}
+                except Exception as e:
+                    return {"custom_id": request["custom_id"], "error": str(e)}
+
+        return list(await asyncio.gather(*(process_one(r) for r in requests)))
+
+    async def status(self, batch_id: str) -> str:
+        return "ended" if self._batch(batch_id).done() else "in_progress"
+
+    async def results(self, batch_id: str) -> List[Dict[str, Any]]:
+        task = self._batch(batch_id)
+        self._batches.delete(batch_id)
+        return task.result()
+
+
+async def _create_message_with_limiter(**params: Any) -> Any:
+    message, _ = await anthropic_rate_limiter.call(
+        new_card_service.claude_client.messages.create, **params
+    )
+    return message
+
+
+async def _create_demo_message(**params: Any) -> Any:
+    await asyncio.sleep(1.5)
+    return SimpleNamespace(
+        model="demo-mock",
+        content=[SimpleNamespace(text=json.dumps(new_card_service.DEMO_CARDS))],
+        usage=SimpleNamespace(input_tokens=0, output_tokens=0),
+    )
+
+
+def _create_backend() -> MessageBatchBackend:
+    if os.getenv("DEMO_MODE", "false").lower() == "true":
+        return LocalMessageBatches(_create_demo_message)
+    if os.getenv("NEW_CARD_BATCH_BACKEND", "anthropic").lower() == "local":
+        return LocalMessageBatches(_create_message_with_limiter)
+    return AnthropicMessageBatches(new_card_service.claude_client)
+
+
+# --- One-Time Initialization ---
+batch_backend: MessageBatchBackend = _create_backend()
+# Submitted async batches: batch_id -> submission time and item count.
+submitted_batches: TTLCache[Dict[str, Any]] = TTLCache(
+    max_size=1000, ttl_seconds=BATCH_RETENTION_SECONDS
+)
+
+
+def _error_item(index: int, error: Exception) -> BatchNewCardItem:
+    """Maps service errors to the status codes the single-prompt route uses."""
+    if isinstance(error, ValueError):
+        status_code = 400
+    elif isinstance(error, RuntimeError):
+        status_code = 503
+    else:
+        logger.exception(f"Unhandled exception planning batch item {index}: {error}")
+        status_code = 500
+    return BatchNewCardItem(
+        index=index, status="errored", error=str(error), status_code=status_code
+    )
+
+
+async def plan_batch(
+    requests: List[AgentRequest], max_concurrency: int
+) -> BatchNewCardResponse:
+    """
+    Plans every prompt through the same path as `/new-card` (cache, rate
+    limiter, validation), at most `max_concurrency` at a time.
+    """
+    start_time = time.time()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def plan_one(index: int, request: AgentRequest) -> BatchNewCardItem:
+        if not request.prompt or not request.prompt.strip():
+            return _error_item(index, ValueError("Prompt cannot be empty."))
+        async with semaphore:
+            try:
+                response = await new_card_service.create_new_card_from_prompt(request)
+            except Exception as e:
+                return _error_item(index, e)
+        return BatchNewCardItem(index=index, status="succeeded", response=response)
+
+    results = await asyncio.gather(
+        *(plan_one(index, request) for index, request in enumerate(requests))
+    )
+    return BatchNewCardResponse(
+        mode="sync",
+        status="ended",
+        results=list(results),
+        execution_time=time.time() - start_time,
+        metadata=_summary(results),
+    )
+
+
+async def submit_batch(requests: List[AgentRequest]) -> BatchNewCardResponse:
+    """Submits all prompts as one message batch and returns its handle."""
+    start_time = time.time()
+    for request in requests:
+        if not request.prompt or not request.prompt.strip():
+            raise ValueError("Prompt cannot be empty.")
+
+    batch_requests = [
+        {
+            "custom_id": f"item-{index}",
+            "params": new_card_service.message_params(request.prompt),
+        }
+        for index, request in enumerate(requests)
+    ]
+    try:
+        batch_id = await batch_backend.create(batch_requests)
+    except Exception as e:
+        logger.error(f"Failed to submit message batch: {e}")
+        raise RuntimeError(f"Batch submission failed: {e}")
+
+    submitted_batches.set(
+        batch_id, {"submitted_at": start_time, "request_count": len(requests)}
+    )
+    logger.info(f"Submitted batch {batch_id} with {len(requests)} prompts.")
+    return BatchNewCardResponse(
+        batch_id=batch_id,
+        mode="async",
+        status="in_progress",
+        execution_time=time.time() - start_time,
+        metadata={"request_count": len(requests)},
+    )
+
+
+async def get_batch(batch_id: str) -> Optional[BatchNewCardResponse]:
+    """
+    Returns the batch's status, with validated per-item results once it has
+    ended, or None if the batch is unknown or expired.
+    """
+    submission = submitted_batches.get(batch_id)
+    if submission is None:
+        return None
+
+    # Ended batches answer from the stored results: the backend may have
+    # released the batch once its results were read.
+    results = submission.get("results")
+    if results is None:
+        status = await batch_backend.status(batch_id)
+        if status != "ended":
+            return BatchNewCardResponse(
+                batch_id=batch_id,
+                mode="async",
+                status="in_progress",
+                execution_time=time.time() - submission["submitted_at"],
+                metadata={"request_count": submission["request_count"]},
+            )
+
+        elapsed = time.time() - submission["submitted_at"]
+        results = []
+        for entry in await batch_backend.results(batch_id):
+            index = int(entry["custom_id"].removeprefix("item-"))
+            if "message" not in entry:
+                results.append(_error_item(index, RuntimeError(entry["error"])))
+                continue
+            try:
+                response = new_card_service.response_from_message(
+                    entry["message"], elapsed
+                )
+            except ValueError as e:
+                results.append(_error_item(index, e))
+                continue
+            results.append(
+                BatchNewCardItem(index=index, status="succeeded", response=response)
+            )
+        results.sort(key=lambda item: item.index)
+        submitted_batches.set(batch_id, {**submission, "results": results})
+
+    return BatchNewCardResponse(
+        batch_id=batch_id,
+        mode="async",
+        status="ended",
+        results=results,
+        execution_time=time.time() - submission["submitted_at"],
+        metadata=_summary(results),
+    )
+
+
+def _summary(results: List[BatchNewCardItem]) -> Dict[str, Any]:
+    return {
+        "request_count": len(results),
+        "succeeded": sum(item.status == "succeeded" for item in results),
+        "errored": sum(item.status == "errored" for item in results),
+    }
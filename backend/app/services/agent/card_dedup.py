@@ -0,0 +1,286 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.agent.card_graph import CardGraph
+from app.services.agent.response_cache import TTLCache
+from app.services.agent.text_vectors import (
+    HashedNgramVectorizer,
+    content_words,
+    cosine_similarities,
+)
+from app.services.github.schema import NewCardData, TaskType
+
+logger = logging.getLogger(__name__)
+
+# Only cards whose execution is a pure function of their text are merged;
+# two phone calls are two actions even when they read the same.
+DEDUP_TASK_TYPES = {TaskType.RESEARCH, TaskType.IMAGE_GENERATION}
+
+
+def card_text(card: NewCardData) -> str:
+    return f"{card.title}. {card.description}"
+
+
+_SENTENCE_END_PATTERN = re.compile(r"[.!?]+\s+")
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _names(card: NewCardData) -> FrozenSet[str]:
+    """
+    The content words of a card that name what it is about: numbers, and
+    words capitalized inside the sentences of its description. Titles are
+    in title case, so their capitals say nothing.
+    """
+    named = [
+        word
+        for word in _WORD_PATTERN.findall(card_text(card))
+        if any(char.isdigit() for char in word)
+    ]
+    for sentence in _SENTENCE_END_PATTERN.split(card.description):
+        named += [
+            word for word in _WORD_PATTERN.findall(sentence)[1:] if word[0].isupper()
+        ]
+    return content_words(" ".join(named))
+
+
+def _equivalent(card: NewCardData, other: NewCardData, min_word_overlap: float) -> bool:
+    """
+    Similar n-grams are not enough: "Research the Italian market" and
+    "Research the Spanish market" score close. Equivalent cards also have the
+    same task type, share at least `min_word_overlap` of their content words
+    (Jaccard) and name the same places, products and numbers.
+    """
+    if card.task_type != other.task_type:
+        return False
+    words, other_words = content_words(card_text(card)), content_words(card_text(other))
+    if (words ^ other_words) & (_names(card) | _names(other)):
+        return False
+    return len(words & other_words) >= min_word_overlap * len(words | other_words)
+
+
+def _merge(
+    cards: List[NewCardData], duplicate_id: str, canonical_id: str
+) -> List[NewCardData]:
+    """
+    Removes `duplicate_id`, gives its dependencies to `canonical_id` and
+    points its dependents at `canonical_id`.
+    """
+    duplicate = next(card for card in cards if card.card_id == duplicate_id)
+    merged = []
+    for card in cards:
+        if card.card_id == duplicate_id:
+            continue
+        dependencies = [
+            canonical_id if dep_id == duplicate_id else dep_id
+            for dep_id in card.dependencies
+        ]
+        if card.card_id == canonical_id:
+            dependencies += duplicate.dependencies
+        dependencies = [
+            dep_id for dep_id in dict.fromkeys(dependencies) if dep_id != card.card_id
+        ]
+        merged.append(card.model_copy(update={"dependencies": dependencies}))
+    return merged
+
+
+class RecentCards:
+    """
+    Bounded, expiring index of the cards of the recently planned boards of
+    one session, used to recognise equivalent cards across its boards.
+    """
+
+    def __init__(self, max_cards: int = 500, ttl_seconds: float = 3600.0):
+        self.max_cards = max_cards
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._cards: List[Tuple[float, NewCardData]] = []
+        self._vectors: Optional[np.ndarray] = None
+
+    def add(self, cards: List[NewCardData], vectors: np.ndarray) -> None:
+        with self._lock:
+            self._prune()
+            now = time.monotonic()
+            self._cards.extend((now, card) for card in cards)
+            stacked = (
+                vectors
+                if self._vectors is None
+                else np.vstack([self._vectors, vectors])
+            )
+            self._vectors = stacked
+            overflow = len(self._cards) - self.max_cards
+            if overflow > 0:
+                self._cards = self._cards[overflow:]
+                self._vectors = self._vectors[overflow:]
+
+    def snapshot(self) -> Tuple[List[NewCardData], Optional[np.ndarray]]:
+        with self._lock:
+            self._prune()
+            return [card for _, card in self._cards], self._vectors
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cards = []
+            self._vectors = None
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = 0
+        while expired < len(self._cards) and self._cards[expired][0] < cutoff:
+            expired += 1
+        if expired:
+            self._cards = self._cards[expired:]
+            self._vectors = self._vectors[expired:] if self._cards else None
+
+
+class CardDeduplicator:
+    """
+    Finds equivalent cards: cards of the same task type whose hashed n-gram
+    vectors have a cosine similarity of at least `threshold`, that share at
+    least `min_word_overlap` of their content words and that differ in no
+    name or number.
+
+    Within a board, equivalent cards are merged into one node and their
+    dependents rewired, unless merging would create a dependency cycle.
+    Across the boards of one session, a card equivalent to one planned
+    recently is only reported; card text is never rewritten, and boards of
+    other sessions are never consulted.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        min_word_overlap: float = 0.6,
+        vectorizer: Optional[HashedNgramVectorizer] = None,
+        max_recent_cards: int = 500,
+        recent_ttl_seconds: float = 3600.0,
+        max_sessions: int = 1000,
+    ):
+        self.threshold = threshold
+        self.min_word_overlap = min_word_overlap
+        self.vectorizer = vectorizer or HashedNgramVectorizer()
+        self.max_recent_cards = max_recent_cards
+        self.recent_ttl_seconds = recent_ttl_seconds
+        self.sessions: TTLCache[RecentCards] = TTLCache(
+            max_size=max_sessions, ttl_seconds=recent_ttl_seconds
+        )
+        self._sessions_lock = threading.Lock()
+
+    def deduplicate(
+        self, cards: List[NewCardData], session_id: Optional[str] = None
+    ) -> Tuple[List[NewCardData], Dict[str, Any]]:
+        """
+        Returns the deduplicated cards and a summary of what was merged.
+        Cards are compared with earlier boards only when a `session_id` is
+        given.
+        """
+        candidates = [card for card in cards if card.task_type in DEDUP_TASK_TYPES]
+        if not candidates:
+            return cards, {"merged": {}, "cross_board": {}}
+
+        vectors = self.vectorizer.transform([card_text(card) for card in candidates])
+        cards, merged = self._merge_within_board(cards, candidates, vectors)
+        kept = [
+            index for index, card in enumerate(candidates) if card.card_id not in merged
+        ]
+        cross_board: Dict[str, str] = {}
+        if session_id is not None:
+            cross_board = self._match_recent_boards(
+                self._recent_cards(session_id),
+                [candidates[index] for index in kept],
+                vectors[kept],
+            )
+
+        if merged or cross_board:
+            logger.info(
+                f"Deduplicated cards: merged {merged}, matched across boards {cross_board}."
+            )
+        return cards, {"merged": merged, "cross_board": cross_board}
+
+    def _recent_cards(self, session_id: str) -> RecentCards:
+        with self._sessions_lock:
+            recent = self.sessions.get(session_id)
+            if recent is None:
+                recent = RecentCards(self.max_recent_cards, self.recent_ttl_seconds)
+            # Refreshes the session's expiry on every board.
+            self.sessions.set(session_id, recent)
+            return recent
+
+    def _merge_within_board(
+        self,
+        cards: List[NewCardData],
+        candidates: List[NewCardData],
+        vectors: np.ndarray,
+    ) -> Tuple[List[NewCardData], Dict[str, str]]:
+        similarities = cosine_similarities(vectors, vectors)
+        rows, columns = np.nonzero(np.triu(similarities >= self.threshold, k=1))
+        pairs = sorted(
+            zip(rows.tolist(), columns.tolist()),
+            key=lambda pair: -similarities[pair[0], pair[1]],
+        )
+
+        canonical: Dict[str, str] = {}
+
+        def find(card_id: str) -> str:
+            while card_id in canonical:
+                card_id = canonical[card_id]
+            return card_id
+
+        for row, column in pairs:
+            if not _equivalent(
+                candidates[row], candidates[column], self.min_word_overlap
+            ):
+                continue
+            keep_id, drop_id = (
+                find(candidates[row].card_id),
+                find(candidates[column].card_id),
+            )
+            if keep_id == drop_id:
+                continue
+            merged_cards = _merge(cards, drop_id, keep_id)
+            try:
+                CardGraph(merged_cards)
+            except ValueError:
+                # One card feeds the other: merging would create a cycle.
+                continue
+            cards = merged_cards
+            canonical[drop_id] = keep_id
+
+        return cards, {drop_id: find(drop_id) for drop_id in canonical}
+
+    def _match_recent_boards(
+        self,
+        recent_cards: RecentCards,
+        candidates: List[NewCardData],
+        vectors: np.ndarray,
+    ) -> Dict[str, str]:
+        """Maps each candidate equivalent to a recent card to that card's title."""
+        recent, recent_vectors = recent_cards.snapshot()
+        matches: Dict[str, str] = {}
+        if recent_vectors is not None and candidates:
+            similarities = cosine_similarities(vectors, recent_vectors)
+            for row, card in enumerate(candidates):
+                for column in np.argsort(-similarities[row]).tolist():
+                    if similarities[row, column] < self.threshold:
+                        break
+                    if _equivalent(card, recent[column], self.min_word_overlap):
+                        matches[card.card_id] = recent[column].title
+                        break
+
+        recent_cards.add(candidates, vectors)
+        return matches
+
+
+# --- One-Time Initialization ---
+card_deduplicator = CardDeduplicator(
+    threshold=float(os.getenv("NEW_CARD_DEDUP_THRESHOLD", "0.8")),
+    min_word_overlap=float(os.getenv("NEW_CARD_DEDUP_WORD_OVERLAP", "0.6")),
+    max_recent_cards=int(os.getenv("NEW_CARD_DEDUP_RECENT_CARDS", "500")),
+    recent_ttl_seconds=float(os.getenv("NEW_CARD_DEDUP_RECENT_TTL_SECONDS", "3600")),
+    max_sessions=int(os.getenv("NEW_CARD_DEDUP_SESSIONS", "1000")),
+)
@@ -0,0 +1,269 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import anthropic
+
+from app.services.agent import model_router, new_card_service
+from app.services.agent.card_json import extract_json_object
+from app.services.agent.rate_limiter import anthropic_rate_limiter
+from app.services.github.schema import (
+    CardExecutionResult,
+    ExpansionBudget,
+    NewCardData,
+    TaskType,
+)
+
+logger = logging.getLogger(__name__)
+
+# Runs one leaf card from its prompt and returns its output and metadata.
+LeafRunner = Callable[[str], Awaitable[Dict[str, Any]]]
+# Splits a card into sub-cards; returns them and the tokens the split used.
+Decomposer = Callable[[NewCardData, str, int], Awaitable[Tuple[List[NewCardData], int]]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of `text`, for work that does not report usage."""
+    return len(text) // 4
+
+
+class BudgetTracker:
+    """
+    The share of an `ExpansionBudget` available to one card. Sub-cards get an
+    even split of the remaining tokens, the same deadline and the same
+    concurrency limit.
+    """
+
+    def __init__(
+        self,
+        budget: ExpansionBudget,
+        token_budget: int,
+        deadline: float,
+        semaphore: asyncio.Semaphore,
+        depth: int = 0,
+    ):
+        self.budget = budget
+        self.token_budget = token_budget
+        self.deadline = deadline
+        self.semaphore = semaphore
+        self.depth = depth
+        self.tokens_used = 0
+
+    @classmethod
+    def start(cls, budget: ExpansionBudget) -> "BudgetTracker":
+        return cls(
+            budget,
+            budget.token_budget,
+            time.monotonic() + budget.time_budget_seconds,
+            asyncio.Semaphore(budget.max_concurrency),
+        )
+
+    @property
+    def remaining_seconds(self) -> float:
+        return self.deadline - time.monotonic()
+
+    @property
+    def remaining_tokens(self) -> int:
+        return self.token_budget - self.tokens_used
+
+    @property
+    def can_expand(self) -> bool:
+        return self.depth < self.budget.max_depth and self.remaining_tokens > 0
+
+    def charge(self, tokens: int) -> None:
+        self.tokens_used += tokens
+
+    def split(self, count: int) -> List["BudgetTracker"]:
+        share = max(0, self.remaining_tokens) // count
+        return [
+            BudgetTracker(
+                self.budget, share, self.deadline, self.semaphore, self.depth + 1
+            )
+            for _ in range(count)
+        ]
+
+
+def shift_started_at(
+    results: List[CardExecutionResult], offset: float
+) -> List[CardExecutionResult]:
+    """
+    Moves the `started_at` of sub-card results, and of their own sub-cards,
+    `offset` seconds later.
+    """
+    return [
+        result.model_copy(
+            update={
+                "started_at": (
+                    None if result.started_at is None else result.started_at + offset
+                ),
+                "children": shift_started_at(result.children, offset),
+            }
+        )
+        for result in results
+    ]
+
+
+def _get_decompose_prompt(card: NewCardData, prompt: str, max_children: int) -> str:
+    return f"""
+    Split the research task below into at most {max_children} independent sub-questions that can be researched in parallel and together answer the task.
+    If the task is already narrow, return a single sub-question.
+
+    You MUST respond with a single JSON object of the form:
+    {{"subtasks": [{{"title": "...", "description": "..."}}]}}
+
+    Task: {card.title}
+    {prompt}
+    """
+
+
+async def decompose_card(
+    card: NewCardData, prompt: str, max_children: int
+) -> Tuple[List[NewCardData], int]:
+    """Asks the fast model tier to split a research card into sub-cards."""
+    if os.getenv("DEMO_MODE", "false").lower() == "true":
+        logger.info("DEMO_MODE is enabled. Not splitting research cards.")
+        return [], 0
+
+    try:
+        message, _ = await anthropic_rate_limiter.call(
+            new_card_service.claude_client.messages.create,
+            model=model_router.FAST_TIER.model_id,
+            max_tokens=model_router.output_budget(max_children),
+            messages=[
+                {
+                    "role": "user",
+                    "content": _get_decompose_prompt(card, prompt, max_children),
+                }
+            ],
+        )
+    except anthropic.APIError as e:
+        logger.warning(f"Could not split card '{card.card_id}': {e}")
+        return [], 0
+
+    tokens = message.usage.input_tokens + message.usage.output_tokens
+    try:
+        text = extract_json_object(message.content[0].text)
+        subtasks = json.loads(text)["subtasks"][:max_children]
+        children = [
+            NewCardData(
+                card_id=f"{card.card_id}.{index}",
+                title=subtask["title"],
+                description=subtask.get("description", ""),
+                task_type=TaskType.RESEARCH,
+                parent_card_id=card.card_id,
+            )
+            for index, subtask in enumerate(subtasks, start=1)
+        ]
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring invalid split of card '{card.card_id}': {e}")
+        return [], tokens
+    return children, tokens
+
+
+async def run_expanded(
+    card: NewCardData,
+    prompt: str,
+    tracker: BudgetTracker,
+    run_leaf: LeafRunner,
+    decompose: Decomposer = decompose_card,
+    context: str = "",
+) -> Dict[str, Any]:
+    """
+    Runs a research card, first splitting it into sub-cards when the budget
+    allows. Sub-cards run concurrently (and may split again up to
+    `max_depth`); their outputs are aggregated into the card's output and
+    their results returned as `children`. Sub-cards that do not fit in the
+    remaining time or tokens are skipped.
+
+    `prompt` ends with `context`, the results of the tasks the card depends
+    on, which is passed on to every sub-card. The `started_at` of sub-card
+    results is measured from the start of this call; the caller moves it to
+    its own clock with `shift_started_at`.
+    """
+    start_time = time.monotonic()
+    children: List[NewCardData] = []
+    if tracker.can_expand:
+        children, tokens = await decompose(card, prompt, tracker.budget.max_children)
+        tracker.charge(tokens)
+
+    if len(children) < 2:
+        async with tracker.semaphore:
+            try:
+                fields = await asyncio.wait_for(
+                    run_leaf(prompt), timeout=max(0.0, tracker.remaining_seconds)
+                )
+            except asyncio.TimeoutError:
+                raise RuntimeError("Expansion time budget exceeded.")
+        tracker.charge(estimate_tokens(prompt + (fields.get("output") or "")))
+        return fields
+
+    logger.info(f"Card '{card.card_id}' expanded into {len(children)} sub-cards.")
+
+    async def run_child(
+        child: NewCardData, child_tracker: BudgetTracker
+    ) -> CardExecutionResult:
+        started_at = time.monotonic()
+        if tracker.remaining_seconds <= 0 or child_tracker.remaining_tokens <= 0:
+            return CardExecutionResult(
+                card_id=child.card_id,
+                task_type=child.task_type,
+                status="skipped",
+                error="Expansion budget exhausted.",
+                parent_card_id=card.card_id,
+            )
+        child_prompt = (
+            f"{new_card_service.research_prompt(child)}\n\n"
+            f"This is part of the broader task: {card.title}{context}"
+        )
+        try:
+            fields = await run_expanded(
+                child, child_prompt, child_tracker, run_leaf, decompose, context
+            )
+            if "children" in fields:
+                fields["children"] = shift_started_at(
+                    fields["children"], started_at - start_time
+                )
+            status, error = "done", None
+        except Exception as e:
+            logger.error(f"Sub-card '{child.card_id}' failed: {e}")
+            fields, status, error = {}, "failed", str(e)
+        return CardExecutionResult(
+            card_id=child.card_id,
+            task_type=child.task_type,
+            status=status,
+            error=error,
+            started_at=started_at - start_time,
+            execution_time=time.monotonic() - started_at,
+            parent_card_id=card.card_id,
+            **fields,
+        )
+
+    child_trackers = tracker.split(len(children))
+    results = await asyncio.gather(
+        *(run_child(child, t) for child, t in zip(children, child_trackers))
+    )
+    tracker.charge(sum(t.tokens_used for t in child_trackers))
+
+    done = [result for result in results if result.status == "done"]
+    if not done:
+        raise RuntimeError(f"All {len(results)} sub-cards of '{card.card_id}' failed.")
+
+    titles = {child.card_id: child.title for child in children}
+    output = "\n\n".join(
+        f"### {titles[result.card_id]}\n{result.output}" for result in done
+    )
+    return {
+        "output": output,
+        "children": results,
+        "metadata": {
+            "expanded": True,
+            "child_count": len(results),
+            "failed": sum(result.status == "failed" for result in results),
+            "skipped": sum(result.status == "skipped" for result in results),
+            "tokens_used": tracker.tokens_used,
+            "token_budget": tracker.token_budget,
+        },
+    }
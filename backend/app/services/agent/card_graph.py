@@ -0,0 +1,137 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.services.github.schema import NewCardData, TaskType
+
+# Rough wall-clock cost of each task type, used to weight the critical path.
+TASK_DURATION_ESTIMATES: Dict[TaskType, float] = {
+    TaskType.RESEARCH: 60.0,
+    TaskType.IMAGE_GENERATION: 15.0,
+    TaskType.PHONE: 5.0,
+}
+
+
+class CardGraph:
+    """
+    Dependency graph over a board of `NewCardData`.
+
+    Building the graph validates it: duplicate `card_id`s, dependencies on
+    unknown cards and dependency cycles raise `ValueError`. All operations
+    run in time linear in the number of cards plus dependencies.
+    """
+
+    def __init__(self, cards: Sequence[NewCardData]):
+        self.cards: Dict[str, NewCardData] = {}
+        for card in cards:
+            if card.card_id in self.cards:
+                raise ValueError(
+                    f"Invalid dependency graph: card_id '{card.card_id}' is used "
+                    f"by more than one card."
+                )
+            self.cards[card.card_id] = card
+
+        self.dependents: Dict[str, List[str]] = {card_id: [] for card_id in self.cards}
+        for card in cards:
+            for dep_id in card.dependencies:
+                if dep_id not in self.cards:
+                    raise ValueError(
+                        f"Invalid dependency graph: Card '{card.title}' depends on "
+                        f"non-existent card_id '{dep_id}'."
+                    )
+                self.dependents[dep_id].append(card.card_id)
+
+        self.levels = self._compute_levels()
+
+    def _compute_levels(self) -> List[List[str]]:
+        """Kahn's algorithm, grouping cards whose dependencies are all satisfied."""
+        in_degree = {
+            card_id: len(set(card.dependencies)) for card_id, card in self.cards.items()
+        }
+        current = [card_id for card_id, degree in in_degree.items() if degree == 0]
+        levels: List[List[str]] = []
+        visited = 0
+
+        while current:
+            levels.append(current)
+            visited += len(current)
+            next_level: List[str] = []
+            for card_id in current:
+                for dependent_id in set(self.dependents[card_id]):
+                    in_degree[dependent_id] -= 1
+                    if in_degree[dependent_id] == 0:
+                        next_level.append(dependent_id)
+            current = next_level
+
+        if visited != len(self.cards):
+            remaining = {card_id for card_id, degree in in_degree.items() if degree > 0}
+            cycle = self._find_cycle(remaining)
+            raise ValueError(
+                "Invalid dependency graph: cards form a dependency cycle "
+                f"({' -> '.join(cycle)})."
+            )
+        return levels
+
+    def _find_cycle(self, remaining: Set[str]) -> List[str]:
+        """
+        Walks dependencies inside the unresolved set until a card repeats.
+        Every unresolved card has at least one unresolved dependency, so the
+        walk always closes a cycle.
+        """
+        path: List[str] = []
+        position: Dict[str, int] = {}
+        card_id = next(iter(remaining))
+        while card_id not in position:
+            position[card_id] = len(path)
+            path.append(card_id)
+            card_id = next(
+                dep_id
+                for dep_id in self.cards[card_id].dependencies
+                if dep_id in remaining
+            )
+        return path[position[card_id] :] + [card_id]
+
+    @property
+    def topological_order(self) -> List[str]:
+        return [card_id for level in self.levels for card_id in level]
+
+    def critical_path(
+        self, durations: Optional[Dict[TaskType, float]] = None
+    ) -> Tuple[List[str], float]:
+        """
+        Returns the longest chain of dependent cards, weighted by estimated
+        task duration, together with its total estimated duration.
+        """
+        durations = durations or TASK_DURATION_ESTIMATES
+        finish: Dict[str, float] = {}
+        previous: Dict[str, Optional[str]] = {}
+
+        for card_id in self.topological_order:
+            card = self.cards[card_id]
+            start, best_dep = 0.0, None
+            for dep_id in card.dependencies:
+                if finish[dep_id] > start:
+                    start, best_dep = finish[dep_id], dep_id
+            finish[card_id] = start + durations.get(card.task_type, 1.0)
+            previous[card_id] = best_dep
+
+        if not finish:
+            return [], 0.0
+
+        last: Optional[str] = max(finish, key=finish.__getitem__)
+        total = finish[last]
+        path: List[str] = []
+        while last is not None:
+            path.append(last)
+            last = previous[last]
+        return path[::-1], total
+
+    def descendants(self, card_ids: Iterable[str]) -> List[str]:
+        """All cards that transitively depend on any of `card_ids`, in topological order."""
+        seen: Set[str] = set()
+        queue = deque(card_ids)
+        while queue:
+            for dependent_id in self.dependents[queue.popleft()]:
+                if dependent_id not in seen:
+                    seen.add(dependent_id)
+                    queue.append(dependent_id)
+        return [card_id for card_id in self.topological_order if card_id in seen]
@@ -0,0 +1,228 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_CARDS_ARRAY_PATTERN = re.compile(r'"cards"\s*:\s*\[')
+
+
+def repair_json(raw: str) -> Optional[Tuple[Any, List[str]]]:
+    """
+    Parses a JSON value with the defects models commonly produce: trailing
+    commas before `}`/`]` and output that stops before the value is closed.
+    Returns the parsed value and the repairs applied, or None if the text
+    cannot be repaired.
+
+    A truncated value is first closed as-is; if that is not valid JSON, the
+    incomplete member after the last comma is dropped instead.
+    """
+    repairs: List[str] = []
+    out: List[str] = []
+    closers: List[str] = []
+    in_string = False
+    escaped = False
+    last_comma: Optional[Tuple[int, List[str]]] = None
+
+    for char in raw:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char in "}]":
+            end = len(out) - 1
+            while end >= 0 and out[end].isspace():
+                end -= 1
+            if end >= 0 and out[end] == ",":
+                del out[end]
+                repairs.append("removed trailing comma")
+            if closers and closers[-1] == char:
+                closers.pop()
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            closers.append("}")
+        elif char == "[":
+            closers.append("]")
+        elif char == "," and closers:
+            last_comma = (len(out), list(closers))
+        out.append(char)
+
+    candidates = []
+    if not in_string and not closers:
+        candidates.append(("".join(out), repairs))
+    else:
+        text = "".join(out) + '"' if in_string else "".join(out).rstrip().rstrip(",")
+        candidates.append(
+            (text + "".join(reversed(closers)), repairs + ["closed truncated value"])
+        )
+        if last_comma is not None:
+            position, open_closers = last_comma
+            candidates.append(
+                (
+                    "".join(out[:position]) + "".join(reversed(open_closers)),
+                    repairs + ["dropped truncated member"],
+                )
+            )
+
+    for text, applied in candidates:
+        try:
+            return json.loads(text), applied
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def extract_json_object(text: str) -> str:
+    """
+    Finds and extracts a JSON object from a string, even if it's wrapped
+    in markdown code fences.
+    """
+    # Find the first '{' which marks the beginning of the JSON
+    start_index = text.find("{")
+    # Find the last '}' which marks the end of the JSON
+    end_index = text.rfind("}")
+
+    if start_index == -1 or end_index == -1:
+        raise ValueError("No valid JSON object found in the AI response.")
+
+    return text[start_index : end_index + 1]
+
+
+class IncrementalCardParser:
+    """
+    Incrementally parses the `cards` array of a model response as text
+    arrives, returning each card object as soon as its closing brace has
+    been received.
+
+    Only the characters received since the previous call are scanned, so
+    feeding a whole response chunk by chunk stays linear in its length.
+
+    Card objects that are not valid JSON are passed through `repair_json`;
+    what was repaired is recorded in `repairs` and objects that cannot be
+    repaired are collected in `malformed`. Call `close()` once the response
+    has ended to salvage a final card that was never closed.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._array_found = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start: Optional[int] = None
+        self._object_count = 0
+        self.finished = False
+        self.malformed: List[str] = []
+        self.repairs: List[str] = []
+
+    @property
+    def array_found(self) -> bool:
+        """Whether the `"cards": [` opening has been received."""
+        return self._array_found
+
+    @property
+    def text(self) -> str:
+        """Everything fed to the parser so far."""
+        return self._buffer
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Adds a chunk of text and returns any card objects it completed."""
+        self._buffer += chunk
+        completed: List[Dict[str, Any]] = []
+
+        if self.finished:
+            return completed
+
+        if not self._array_found:
+            match = _CARDS_ARRAY_PATTERN.search(self._buffer)
+            if match is None:
+                return completed
+            self._array_found = True
+            self._pos = match.end()
+
+        buffer = self._buffer
+        for index in range(self._pos, len(buffer)):
+            char = buffer[index]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = index
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    raw_object = buffer[self._object_start : index + 1]
+                    self._object_start = None
+                    card = self._parse_object(raw_object)
+                    if card is not None:
+                        completed.append(card)
+            elif char == "]" and self._depth == 0:
+                self.finished = True
+                self._pos = index + 1
+                return completed
+
+        self._pos = len(buffer)
+        return completed
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        Marks the end of the response. If the `cards` array was cut off,
+        records it and returns the last card, repaired, if it can be salvaged.
+        """
+        if self.finished or not self._array_found:
+            return []
+        self.finished = True
+        self.repairs.append("closed unterminated 'cards' array")
+
+        if self._object_start is None:
+            return []
+        raw_object = self._buffer[self._object_start :]
+        self._object_start = None
+        card = self._parse_object(raw_object)
+        return [card] if card is not None else []
+
+    def _parse_object(self, raw_object: str) -> Optional[Dict[str, Any]]:
+        self._object_count += 1
+        try:
+            return json.loads(raw_object)
+        except json.JSONDecodeError:
+            pass
+
+        repaired = repair_json(raw_object)
+        if repaired is None or not isinstance(repaired[0], dict):
+            self.malformed.append(raw_object)
+            return None
+        card, applied = repaired
+        self.repairs.append(f"card {self._object_count}: {', '.join(applied)}")
+        return card
+
+
+def extract_cards(text: str) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+    """
+    Tolerantly extracts the card objects of a complete model response,
+    ignoring any prose around the JSON. Returns the cards, the repairs that
+    were applied and the raw objects that could not be salvaged.
+    """
+    parser = IncrementalCardParser()
+    cards = parser.feed(text)
+    if not parser.array_found:
+        raise ValueError("AI response is missing the 'cards' list.")
+    cards.extend(parser.close())
+    return cards, parser.repairs, parser.malformed
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+import anthropic
+
+from app.services.agent import model_router, new_card_service
+from app.services.agent.card_graph import CardGraph
+from app.services.agent.rate_limiter import anthropic_rate_limiter
+from app.services.github.schema import (
+    NewCardAgentResponse,
+    NewCardData,
+    ReplanCardsRequest,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _get_replan_system_prompt() -> str:
+    return """
+    You are an expert project manager. One task card of an existing plan was edited by the user, and the cards that depend on it must be updated to match.
+
+    You receive the edited card, the unchanged cards the affected cards may depend on, and the current versions of the affected downstream cards.
+
+    You MUST respond with a single JSON object with a single key, "cards", containing the updated downstream cards only:
+    1.  Keep the `card_id` of every card you update. Leave out cards that are no longer needed and give any new card a new unique `card_id`.
+    2.  Use `research_task`, `phone_task` or `image_generation_task` as `task_type`, as in the original plan.
+    3.  `dependencies` may only reference the `card_id`s of the edited card, the context cards or the cards in your response.
+    4.  Do not repeat the edited card or the context cards.
+    """
+
+
+def _get_replan_system_blocks() -> List[Dict[str, Any]]:
+    return [
+        {
+            "type": "text",
+            "text": _get_replan_system_prompt(),
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+
+
+def _card_json(cards: List[NewCardData]) -> str:
+    return json.dumps(
+        [card.model_dump(mode="json", exclude={"status"}) for card in cards],
+        separators=(",", ":"),
+    )
+
+
+def _replan_prompt(
+    edited_card: NewCardData,
+    context_cards: List[NewCardData],
+    downstream_cards: List[NewCardData],
+) -> str:
+    return (
+        f"Edited card:\n{_card_json([edited_card])}\n\n"
+        f"Context cards (unchanged):\n{_card_json(context_cards)}\n\n"
+        f"Downstream cards to update:\n{_card_json(downstream_cards)}"
+    )
+
+
+def _merge_board(
+    cards: List[NewCardData],
+    downstream_ids: List[str],
+    replanned: List[NewCardData],
+) -> List[NewCardData]:
+    """
+    Replaces the downstream cards in the board's order; downstream cards the
+    model dropped are removed and new ones appended.
+    """
+    replanned_by_id = {card.card_id: card for card in replanned}
+    board = []
+    for card in cards:
+        if card.card_id in replanned_by_id:
+            board.append(replanned_by_id.pop(card.card_id))
+        elif card.card_id not in downstream_ids:
+            board.append(card)
+    return board + list(replanned_by_id.values())
+
+
+async def replan_cards(request: ReplanCardsRequest) -> NewCardAgentResponse:
+    """
+    Regenerates only the transitive dependents of the edited card. Upstream
+    and unrelated cards keep their content and ids, and the model only sees
+    the affected subgraph, so tokens scale with the size of the change.
+    """
+    start_time = time.time()
+    edited_card = request.edited_card
+    original_ids = {card.card_id for card in request.cards}
+    if edited_card.card_id not in original_ids:
+        raise ValueError(
+            f"Edited card '{edited_card.card_id}' is not part of the board."
+        )
+
+    cards = [
+        edited_card if card.card_id == edited_card.card_id else card
+        for card in request.cards
+    ]
+    graph = CardGraph(cards)
+    downstream_ids = graph.descendants([edited_card.card_id])
+    downstream_cards = [graph.cards[card_id] for card_id in downstream_ids]
+    context_ids = {
+        dep_id
+        for card in downstream_cards
+        for dep_id in card.dependencies
+        if dep_id not in downstream_ids and dep_id != edited_card.card_id
+    }
+    context_cards = [card for card in cards if card.card_id in context_ids]
+    logger.info(
+        f"Replanning {len(downstream_cards)} of {len(cards)} cards downstream of "
+        f"'{edited_card.card_id}'."
+    )
+
+    metadata: Dict[str, Any] = {
+        "edited_card_id": edited_card.card_id,
+        "replanned_card_ids": downstream_ids,
+        "context_card_ids": [card.card_id for card in context_cards],
+        "unchanged_card_count": len(cards) - len(downstream_cards),
+        "json_repairs": [],
+    }
+
+    demo_mode = os.getenv("DEMO_MODE", "false").lower() == "true"
+    if not downstream_cards or demo_mode:
+        if demo_mode:
+            logger.info("DEMO_MODE is enabled. Keeping downstream cards unchanged.")
+            await asyncio.sleep(0.5)
+        else:
+            logger.info("Edited card has no dependents; nothing to replan.")
+        execution_time = time.time() - start_time
+        metadata = {
+            **metadata,
+            "model_used": "demo-mock" if demo_mode else None,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "card_count": len(cards),
+        }
+        return new_card_service.build_response(cards, graph, execution_time, metadata)
+
+    params = {
+        "model": new_card_service.MODEL_ID,
+        "max_tokens": model_router.output_budget(len(downstream_cards)),
+        "system": _get_replan_system_blocks(),
+        "messages": [
+            {
+                "role": "user",
+                "content": _replan_prompt(edited_card, context_cards, downstream_cards),
+            }
+        ],
+    }
+    try:
+        message, attempts = await anthropic_rate_limiter.call(
+            new_card_service.claude_client.messages.create, **params
+        )
+    except anthropic.APIError as e:
+        logger.error(f"Anthropic API error while replanning: {e}")
+        raise RuntimeError(f"AI service is currently unavailable: {e}")
+
+    upstream_ids = original_ids - set(downstream_ids)
+    text = next(block.text for block in message.content if hasattr(block, "text"))
+    replanned, repairs = new_card_service.parse_cards(text, known_ids=upstream_ids)
+    reused_ids = {card.card_id for card in replanned} & upstream_ids
+    if reused_ids:
+        raise ValueError(
+            f"AI model returned invalid data: replanned cards reuse the ids of "
+            f"unchanged cards ({', '.join(sorted(reused_ids))})."
+        )
+
+    board = _merge_board(cards, downstream_ids, replanned)
+    board_graph = new_card_service.validate_dependencies(board)
+    execution_time = time.time() - start_time
+    metadata = {
+        **metadata,
+        "model_used": message.model,
+        **new_card_service.usage_metadata(message.usage),
+        "card_count": len(board),
+        "attempts_made": attempts,
+        "max_tokens": params["max_tokens"],
+        "json_repairs": repairs,
+    }
+    return new_card_service.build_response(board, board_graph, execution_time, metadata)
@@ -0,0 +1,299 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Any, List, NamedTuple, Optional
+
+from smolagents.memory import ActionStep, MemoryStep, PlanningStep, TaskStep
+from smolagents.models import ChatMessage, MessageRole
+from smolagents.monitoring import Timing
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint(NamedTuple):
+    task: str
+    steps: List[MemoryStep]
+
+    @property
+    def action_steps(self) -> int:
+        return sum(isinstance(step, ActionStep) for step in self.steps)
+
+
+def _prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+def _text(value: Any) -> Optional[str]:
+    """Model outputs may be a list of content parts rather than a string."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return "\n".join(
+            part.get("text", "") for part in value if isinstance(part, dict)
+        )
+    return str(value)
+
+
+class CheckpointStore:
+    """
+    Durable record of the steps of unfinished agent runs, keyed by job id,
+    so a run interrupted by a restart can resume where it stopped instead of
+    repeating its model calls and searches. A run is stored with a hash of
+    the prompt it answers and only loaded for that prompt, since job ids
+    come from clients.
+
+    Each finished step is appended as it happens. Beyond the latest
+    `keep_full_steps` steps of a run, observations are compacted to their
+    first `compact_chars` characters. Runs not updated for `ttl_seconds` are
+    dropped and their space reclaimed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 24 * 3600.0,
+        keep_full_steps: int = 3,
+        compact_chars: int = 1000,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.keep_full_steps = keep_full_steps
+        self.compact_chars = compact_chars
+        with self._connect() as conn:
+            # Must be set before the first table is created to take effect.
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS runs (
+                    job_id TEXT PRIMARY KEY,
+                    prompt_hash TEXT NOT NULL,
+                    task TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS steps (
+                    job_id TEXT NOT NULL,
+                    step_index INTEGER NOT NULL,
+                    kind TEXT NOT NULL,
+                    step_number INTEGER,
+                    start_time REAL NOT NULL,
+                    end_time REAL,
+                    model_output TEXT,
+                    code_action TEXT,
+                    observations TEXT,
+                    error TEXT,
+                    PRIMARY KEY (job_id, step_index)
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def save_step(self, job_id: str, prompt: str, task: str, step: Any) -> None:
+        """
+        Appends a finished action or planning step to the checkpoint of the
+        run answering `prompt` with the agent task `task`. Never raises: a
+        failed checkpoint write must not fail the run.
+        """
+        try:
+            self._save_step(job_id, prompt, task, step)
+        except Exception as e:
+            logger.warning(f"Checkpoint write for {job_id} failed: {e}")
+
+    def _save_step(self, job_id: str, prompt: str, task: str, step: Any) -> None:
+        if isinstance(step, ActionStep):
+            row = (
+                "action",
+                step.step_number,
+                step.timing.start_time,
+                step.timing.end_time,
+                _text(step.model_output),
+                getattr(step, "code_action", None),
+                _text(step.observations),
+                str(step.error) if step.error is not None else None,
+            )
+        elif isinstance(step, PlanningStep):
+            row = (
+                "planning",
+                None,
+                step.timing.start_time,
+                step.timing.end_time,
+                step.plan,
+                None,
+                None,
+                None,
+            )
+        else:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?)",
+                (job_id, _prompt_hash(prompt), task, time.time()),
+            )
+            conn.execute(
+                "UPDATE runs SET updated_at = ? WHERE job_id = ?",
+                (time.time(), job_id),
+            )
+            step_index = conn.execute(
+                "SELECT COALESCE(MAX(step_index) + 1, 0) FROM steps WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, step_index, *row),
+            )
+            conn.execute(
+                "UPDATE steps SET observations = substr(observations, 1, ?) || "
+                "'\n[... compacted]' WHERE job_id = ? AND step_index <= ? "
+                "AND length(observations) > ?",
+                (
+                    self.compact_chars,
+                    job_id,
+                    step_index - self.keep_full_steps,
+                    self.compact_chars + 100,
+                ),
+            )
+
+    def load(self, job_id: str, prompt: str) -> Optional[Checkpoint]:
+        """
+        The checkpoint of an unfinished run of `prompt`, or None, also when
+        the job id was used for another prompt.
+        """
+        try:
+            with self._connect() as conn:
+                run = conn.execute(
+                    "SELECT task FROM runs WHERE job_id = ? AND prompt_hash = ? "
+                    "AND updated_at > ?",
+                    (job_id, _prompt_hash(prompt), time.time() - self.ttl_seconds),
+                ).fetchone()
+                if run is None:
+                    return None
+                rows = conn.execute(
+                    "SELECT kind, step_number, start_time, end_time, model_output, "
+                    "code_action, observations, error FROM steps "
+                    "WHERE job_id = ? ORDER BY step_index",
+                    (job_id,),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Checkpoint read for {job_id} failed: {e}")
+            return None
+        return Checkpoint(run[0], [_restore_step(*row) for row in rows])
+
+    def delete(self, job_id: str) -> None:
+        """Drops the checkpoint of a run that has finished."""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM steps WHERE job_id = ?", (job_id,))
+                conn.execute("DELETE FROM runs WHERE job_id = ?", (job_id,))
+        except sqlite3.Error as e:
+            logger.warning(f"Checkpoint delete for {job_id} failed: {e}")
+
+    def prune(self) -> int:
+        """Drops expired runs and reclaims their space. Returns their number."""
+        cutoff = time.time() - self.ttl_seconds
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM steps WHERE job_id IN "
+                    "(SELECT job_id FROM runs WHERE updated_at <= ?)",
+                    (cutoff,),
+                )
+                pruned = conn.execute(
+                    "DELETE FROM runs WHERE updated_at <= ?", (cutoff,)
+                ).rowcount
+            if pruned:
+                with self._connect() as conn:
+                    conn.execute("PRAGMA incremental_vacuum").fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Checkpoint pruning failed: {e}")
+            return 0
+        return pruned
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM steps")
+            conn.execute("DELETE FROM runs")
+
+
+def _restore_step(
+    kind: str,
+    step_number: Optional[int],
+    start_time: float,
+    end_time: Optional[float],
+    model_output: Optional[str],
+    code_action: Optional[str],
+    observations: Optional[str],
+    error: Optional[str],
+) -> MemoryStep:
+    timing = Timing(start_time=start_time, end_time=end_time)
+    if kind == "planning":
+        return PlanningStep(
+            model_input_messages=[],
+            model_output_message=ChatMessage(
+                role=MessageRole.ASSISTANT, content=model_output
+            ),
+            plan=model_output or "",
+            timing=timing,
+        )
+    # AgentError needs a logger to be created; the model only sees its text.
+    if error is not None:
+        observations = f"{observations or ''}\nError:\n{error}".strip()
+    return ActionStep(
+        step_number=step_number or 0,
+        timing=timing,
+        model_output=model_output,
+        code_action=code_action,
+        observations=observations,
+    )
+
+
+def restore(agent: Any, checkpoint: Checkpoint) -> None:
+    """Puts a checkpointed run back into the memory of a freshly reset agent."""
+    agent.memory.steps.extend([TaskStep(task=checkpoint.task), *checkpoint.steps])
+
+
+def resume_task(task: str) -> str:
+    return (
+        "Your earlier run of the task above was interrupted after the steps "
+        "shown. Continue from where it stopped rather than starting over. "
+        "Variables defined by earlier code no longer exist; define again what "
+        f"you still need.\n\nTask: {task}"
+    )
+
+
+def _create_checkpoint_store() -> Optional[CheckpointStore]:
+    if os.getenv("DEEP_SEARCH_CHECKPOINTS", "true").lower() != "true":
+        return None
+    try:
+        store = CheckpointStore(
+            os.getenv(
+                "DEEP_SEARCH_CHECKPOINTS_PATH",
+                os.path.join(tempfile.gettempdir(), "agent_hub_checkpoints.sqlite3"),
+            ),
+            ttl_seconds=float(
+                os.getenv("DEEP_SEARCH_CHECKPOINTS_TTL_SECONDS", str(24 * 3600))
+            ),
+            keep_full_steps=int(
+                os.getenv("DEEP_SEARCH_CHECKPOINTS_KEEP_FULL_STEPS", "3")
+            ),
+            compact_chars=int(
+                os.getenv("DEEP_SEARCH_CHECKPOINTS_COMPACT_CHARS", "1000")
+            ),
+        )
+    except sqlite3.Error as e:
+        logger.warning(f"Deep search checkpoints disabled: {e}")
+        return None
+    store.prune()
+    return store
+
+
+# --- One-Time Initialization ---
+checkpoint_store = _create_checkpoint_store()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from app.services.agent import deep_search_service
+from app.services.agent.research_jobs import research_jobs
+from app.services.github.schema import (
+    AgentRequest,
+    AgentResponse,
+    DeepSearchJobResponse,
+    DeepSearchRequest,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _request_key(request: AgentRequest) -> str:
+    """Everything a search depends on: the request without its job id."""
+    return json.dumps(
+        request.model_dump(exclude={"job_id"}), sort_keys=True, default=str
+    )
+
+
+class DeepSearchJob:
+    """A deep search submitted through the job API."""
+
+    def __init__(self, job_id: str, request: AgentRequest):
+        self.job_id = job_id
+        self.request = request
+        self.status = "queued"
+        self.created_at = time.time()
+        self.completed_at: Optional[float] = None
+        self.result: Optional[AgentResponse] = None
+        self.error: Optional[str] = None
+        self.finished = asyncio.Event()
+
+    def response(self) -> DeepSearchJobResponse:
+        return DeepSearchJobResponse(
+            job_id=self.job_id,
+            status=self.status,
+            created_at=self.created_at,
+            completed_at=self.completed_at,
+            result=self.result,
+            error=self.error,
+        )
+
+
+class DeepSearchJobQueue:
+    """
+    Runs deep searches in background workers so no HTTP request has to stay
+    open for a whole agent run.
+
+    `submit` returns a job immediately; at most `max_running` jobs run at a
+    time and the rest wait their turn. Clients poll `get`, long-poll `wait`
+    or follow `events`. Ended jobs are kept for `retention_seconds`.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[AgentRequest], Awaitable[AgentResponse]],
+        max_running: int = 4,
+        max_pending: int = 100,
+        retention_seconds: float = 3600.0,
+    ):
+        self.run = run
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._semaphore = asyncio.Semaphore(max_running)
+        self._jobs: Dict[str, DeepSearchJob] = {}
+        self._by_request: Dict[str, str] = {}
+        self._workers: Set["asyncio.Task[None]"] = set()
+        self._submitted = 0
+        self._failed = 0
+
+    def submit(self, request: AgentRequest) -> DeepSearchJob:
+        """
+        Queues a search and returns its job, or the job already running the
+        same request (prompt, context and deadline) or known under the
+        request's `job_id`. The job id is passed on with the request, so its
+        run is checkpointed and a job resubmitted after a restart resumes.
+
+        Raises `ValueError` when the `job_id` is known for a different
+        request and `RuntimeError` when `max_pending` jobs are waiting or
+        running.
+        """
+        key = _request_key(request)
+        job_id = getattr(request, "job_id", None)
+        if job_id in self._jobs:
+            job = self._jobs[job_id]
+            if _request_key(job.request) != key:
+                raise ValueError(f"Job {job_id} was submitted for another request.")
+            return job
+        existing = self._by_request.get(key)
+        if existing is not None:
+            return self._jobs[existing]
+        if len(self._by_request) >= self.max_pending:
+            raise RuntimeError(
+                f"{len(self._by_request)} deep search jobs are already pending."
+            )
+
+        if job_id is None:
+            job_id = f"search-{uuid.uuid4().hex[:12]}"
+            if isinstance(request, DeepSearchRequest):
+                request = request.model_copy(update={"job_id": job_id})
+        job = DeepSearchJob(job_id, request)
+        self._jobs[job.job_id] = job
+        self._by_request[key] = job.job_id
+        self._submitted += 1
+        worker = asyncio.create_task(self._work(job))
+        self._workers.add(worker)
+        worker.add_done_callback(self._workers.discard)
+        logger.info(f"Queued deep search job {job.job_id}.")
+        return job
+
+    async def _work(self, job: DeepSearchJob) -> None:
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                try:
+                    job.result = await self.run(job.request)
+                    job.status = "done"
+                except Exception as e:
+                    logger.error(f"Deep search job {job.job_id} failed: {e}")
+                    job.error = str(e)
+                    job.status = "failed"
+                    self._failed += 1
+        finally:
+            if job.status not in ("done", "failed"):
+                job.error = "Job was cancelled."
+                job.status = "failed"
+            job.completed_at = time.time()
+            job.finished.set()
+            key = _request_key(job.request)
+            if self._by_request.get(key) == job.job_id:
+                del self._by_request[key]
+            asyncio.get_running_loop().call_later(
+                self.retention_seconds, self._jobs.pop, job.job_id, None
+            )
+
+    def get(self, job_id: str) -> Optional[DeepSearchJob]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[DeepSearchJob]:
+        """
+        Returns the job once it has ended or `timeout` seconds have passed,
+        whichever is first. Returns None for unknown or expired jobs.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        try:
+            await asyncio.wait_for(job.finished.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def events(
+        self, job: DeepSearchJob, heartbeat_seconds: float = 15.0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Emits a `status` event now and every `heartbeat_seconds` while the
+        job is pending, then one `done` or `error` event with its result.
+        """
+        while not job.finished.is_set():
+            yield {"event": "status", "data": job.response().model_dump()}
+            await self.wait(job.job_id, heartbeat_seconds)
+        event = "done" if job.status == "done" else "error"
+        yield {"event": event, "data": job.response().model_dump()}
+
+    def stats(self) -> Dict[str, Any]:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "jobs": len(statuses),
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "submitted": self._submitted,
+            "failed": self._failed,
+        }
+
+
+async def _run_deep_search(request: AgentRequest) -> AgentResponse:
+    # Reuse the search /new-card may already have started for this card.
+    response = await research_jobs.claim_request(request)
+    if response is not None:
+        return response
+    return await deep_search_service.run_deep_search(request)
+
+
+# --- One-Time Initialization ---
+deep_search_jobs = DeepSearchJobQueue(
+    _run_deep_search,
+    max_running=int(os.getenv("DEEP_SEARCH_JOBS_MAX_RUNNING", "4")),
+    max_pending=int(os.getenv("DEEP_SEARCH_JOBS_MAX_PENDING", "100")),
+    retention_seconds=float(os.getenv("DEEP_SEARCH_JOBS_RETENTION_SECONDS", "3600")),
+)
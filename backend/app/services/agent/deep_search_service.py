@@ -1,18 +1,64 @@
 import asyncio
 import logging
 import os
+import re
 import time
 import uuid
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 from smolagents import CodeAgent, LiteLLMModel
+from smolagents.agents import FinalAnswerStep
+from smolagents.memory import ActionStep
 from smolagents.default_tools import DuckDuckGoSearchTool
 
 # Using the requested import path
 from app.services.github.schema import AgentRequest, AgentResponse
+from app.services.agent.agent_pool import AgentPool
+from app.services.agent import page_visit
+from app.services.agent.checkpoints import (
+    Checkpoint,
+    checkpoint_store,
+    restore,
+    resume_task,
+)
+from app.services.agent.knowledge_base import (
+    KnowledgeEntry,
+    context_for,
+    knowledge_base,
+)
+from app.services.agent.batch_search import (
+    BatchSearchTool,
+    search_executor,
+    search_rate_limiter,
+)
+from app.services.agent.rate_limiter import anthropic_rate_limiter
+from app.services.agent.response_cache import TTLCache
+from app.services.agent.search_cache import CachedSearchTool, search_cache
 
 logger = logging.getLogger(__name__)
 
 
+class _RateLimitedLiteLLMClient:
+    """
+    Stands in for the `litellm` module as the model's client so that every
+    completion the agent makes goes through the shared Anthropic limiter.
+    """
+
+    def __init__(self):
+        import litellm
+
+        self._litellm = litellm
+
+    def completion(self, **kwargs):
+        response, _ = anthropic_rate_limiter.call_sync(
+            self._litellm.completion, **kwargs
+        )
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._litellm, name)
+
+
 def _create_agent() -> CodeAgent:
     """Initializes the expensive agent object."""
     logger.info("Initializing Deep Search Agent...")
@@ -25,25 +71,236 @@ def _create_agent() -> CodeAgent:
         raise RuntimeError("ANTHROPIC_API_KEY environment variable not set.")
 
     model_id = "claude-sonnet-4-20250514"
-    model = LiteLLMModel(model_id=model_id, temperature=0.1)
-    search_tool = DuckDuckGoSearchTool()
-    agent = CodeAgent(tools=[search_tool], model=model, max_steps=2)
+    model = LiteLLMModel(
+        model_id=model_id, temperature=0.1, client=_RateLimitedLiteLLMClient()
+    )
+    search_tool = CachedSearchTool(
+        DuckDuckGoSearchTool(), search_cache, rate_limiter=search_rate_limiter
+    )
+    batch_search_tool = BatchSearchTool(search_tool, search_executor)
+    visit_tool = page_visit.VisitPagesTool(
+        page_visit.page_client,
+        page_visit.page_fetch_executor,
+        page_visit.page_extract_executor,
+        page_visit.page_cache,
+    )
+    agent = CodeAgent(
+        tools=[search_tool, batch_search_tool, visit_tool], model=model, max_steps=2
+    )
     logger.info("Deep Search Agent created successfully!")
     return agent
 
 
+def _create_pool() -> Optional[AgentPool[CodeAgent]]:
+    """Pre-initializes the agents deep searches are run with."""
+    if os.getenv("DEMO_MODE", "false").lower() == "true":
+        logger.info("DEMO_MODE enabled: Skipping Deep Search Agent pool.")
+        return None
+    return AgentPool(
+        _create_agent,
+        size=int(os.getenv("DEEP_SEARCH_POOL_SIZE", "4")),
+        name="deep search agents",
+        max_waiting=int(os.getenv("DEEP_SEARCH_POOL_MAX_WAITING", "32")),
+        checkout_timeout=float(os.getenv("DEEP_SEARCH_POOL_TIMEOUT_SECONDS", "300")),
+    )
+
+
 # --- One-Time Initialization ---
-# This agent is created once when the module is first imported.
-deep_search_agent = _create_agent()
+# The agents are created once when the module is first imported; each
+# search checks one out so concurrent searches never share an agent.
+deep_search_pool = _create_pool()
 AGENT_ID = f"deep-search-func-{str(uuid.uuid4())[:8]}"
+DEADLINE_SECONDS = float(os.getenv("DEEP_SEARCH_DEADLINE_SECONDS", "120"))
+# Answers of recent searches, reused when the same prompt comes again in
+# another case, spacing or punctuation. Reworded prompts are not matched:
+# text similarity can't tell "is X good for Y" from "is X bad for Y".
+ANSWER_CACHE = os.getenv("DEEP_SEARCH_ANSWER_CACHE", "true").lower() == "true"
+answer_cache: TTLCache[Tuple[str, AgentResponse]] = TTLCache(
+    max_size=int(os.getenv("DEEP_SEARCH_ANSWER_CACHE_MAX_SIZE", "500")),
+    ttl_seconds=float(os.getenv("DEEP_SEARCH_ANSWER_CACHE_TTL_SECONDS", "3600")),
+)
 
 
-async def run_deep_search(agent_request: AgentRequest) -> AgentResponse:
-    """Runs the agent with a user's prompt."""
-    start_time = time.time()
-    prompt = (
+def _answer_cache_key(agent_request: AgentRequest) -> str:
+    """
+    The words of the prompt, lowercased and in order, under the request's
+    session: answers drawn from a session's knowledge base stay in it.
+    """
+    words = " ".join(re.findall(r"\w+", agent_request.prompt.lower()))
+    return f"{getattr(agent_request, 'session_id', None) or ''}\n{words}"
+
+
+def search_prompt(agent_request: AgentRequest) -> str:
+    return (
         agent_request.prompt + "\n\nThe final answer should be less then 50 sentences."
     )
+
+
+def demo_answer(agent_request: AgentRequest) -> str:
+    return (
+        f"**[DEMO MODE] Deep Search Result for: {agent_request.prompt}**\n\n"
+        "Based on the analysis of the request, here are the key findings:\n\n"
+        "1. **Market Trends**: The AI agent market is rapidly evolving with a focus on autonomous task execution.\n"
+        "2. **Competitor Analysis**: Key players are integrating multi-modal capabilities (text, image, voice).\n"
+        "3. **Strategic Recommendations**: Focus on user experience and seamless integration with existing workflows.\n\n"
+        "This is a simulated response for demonstration purposes."
+    )
+
+
+class AgentRun(NamedTuple):
+    answer: Any
+    search_counts: Dict[str, int]
+    partial: bool
+    sources: Tuple[str, ...] = ()
+
+
+_URL_PATTERN = re.compile(r"https?://[^\s)\]>\"']+")
+
+
+def _sources(agent: CodeAgent, final_answer: Any, limit: int = 20) -> Tuple[str, ...]:
+    """URLs the run found, from its observations and its answer, in order."""
+    texts = [
+        str(step.observations)
+        for step in getattr(getattr(agent, "memory", None), "steps", [])
+        if isinstance(step, ActionStep) and step.observations
+    ]
+    texts.append(str(final_answer))
+    urls = dict.fromkeys(url for text in texts for url in _URL_PATTERN.findall(text))
+    return tuple(urls)[:limit]
+
+
+def _partial_answer(agent: CodeAgent, prompt: str) -> str:
+    """Has the agent answer the task from the steps it has taken so far."""
+    message = agent.provide_final_answer(prompt)
+    content = getattr(message, "content", message)
+    if isinstance(content, list):
+        content = "\n".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return content
+
+
+def run_agent(
+    agent: CodeAgent,
+    prompt: str,
+    on_step: Optional[Callable[[Any], None]] = None,
+    deadline: Optional[float] = None,
+    resume_from: Optional[Checkpoint] = None,
+) -> AgentRun:
+    """
+    Runs `agent` and returns its answer and this run's search cache counts.
+    With `on_step`, each step is passed to it as soon as it has finished.
+    With a `deadline` (a `time.monotonic()` value), the agent stops after
+    the first step that ends past it and answers from the steps so far; the
+    answer is then marked partial. With `resume_from`, the agent continues
+    the checkpointed run of `prompt` with the steps it has left.
+    """
+    search_tool = agent.tools.get(CachedSearchTool.name)
+    if isinstance(search_tool, CachedSearchTool):
+        search_tool.reset_counts()
+    task = prompt
+    run_args: Dict[str, Any] = {}
+    if resume_from is not None:
+        restore(agent, resume_from)
+        task = resume_task(prompt)
+        max_steps = getattr(agent, "max_steps", 20)
+        run_args = {
+            "reset": False,
+            "max_steps": max(1, max_steps - resume_from.action_steps),
+        }
+    partial = False
+    if on_step is None and deadline is None:
+        final_answer = agent.run(task, **run_args)
+    else:
+        final_answer = None
+        steps = agent.run(task, stream=True, **run_args)
+        for step in steps:
+            if on_step is not None:
+                on_step(step)
+            if isinstance(step, FinalAnswerStep):
+                final_answer = step.output
+            elif (
+                isinstance(step, ActionStep)
+                and deadline is not None
+                and time.monotonic() >= deadline
+                and not getattr(step, "is_final_answer", False)
+            ):
+                steps.close()
+                logger.info(
+                    f"Deep search deadline reached after step {step.step_number}; "
+                    "answering from the steps so far."
+                )
+                final_answer = _partial_answer(agent, prompt)
+                partial = True
+                break
+    counts = search_tool.counts() if isinstance(search_tool, CachedSearchTool) else {}
+    return AgentRun(final_answer, counts, partial, _sources(agent, final_answer))
+
+
+def deadline_for(agent_request: AgentRequest, start: float) -> float:
+    """The `time.monotonic()` deadline of a request started at `start`."""
+    seconds = getattr(agent_request, "deadline_seconds", None) or DEADLINE_SECONDS
+    return start + seconds
+
+
+def _load_checkpoint(job_id: str, prompt: str) -> Optional[Checkpoint]:
+    """
+    The checkpoint of an unfinished run of `prompt` under `job_id`. Any other
+    run under the id is dropped so the new run starts from scratch.
+    """
+    checkpoint_store.prune()
+    checkpoint = checkpoint_store.load(job_id, prompt)
+    if checkpoint is None:
+        checkpoint_store.delete(job_id)
+    return checkpoint
+
+
+def _cached_answer(
+    agent_request: AgentRequest, start_time: float
+) -> Optional[AgentResponse]:
+    cached = answer_cache.get(_answer_cache_key(agent_request))
+    if cached is None:
+        return None
+    cached_prompt, response = cached
+    logger.info(f"Reusing answer for '{cached_prompt[:70]}'.")
+    return response.model_copy(
+        update={
+            "execution_time": time.time() - start_time,
+            "metadata": {
+                **(response.metadata or {}),
+                "answer_cache": {"hit": True, "cached_prompt": cached_prompt},
+            },
+        }
+    )
+
+
+async def run_deep_search(agent_request: AgentRequest) -> AgentResponse:
+    """
+    Runs the agent with a user's prompt, unless a recent search for the same
+    prompt already answered it. Runs with a `job_id` are
+    checkpointed after every step; running the same prompt under the same
+    job id again resumes an unfinished run from its last checkpoint. Answers
+    of runs with a `session_id` are kept in the session's knowledge base and
+    given to its later searches on related questions.
+    """
+    start_time = time.time()
+    deadline = deadline_for(agent_request, time.monotonic())
+    # Requests with extra context are not interchangeable by prompt alone.
+    use_cache = ANSWER_CACHE and not agent_request.context
+    if use_cache:
+        cached = _cached_answer(agent_request, start_time)
+        if cached is not None:
+            return cached
+
+    pool_wait = 0.0
+    search_counts: Dict[str, int] = {}
+    partial = False
+    sources: Tuple[str, ...] = ()
+    notes: List[KnowledgeEntry] = []
+    checkpoint: Optional[Checkpoint] = None
+    job_id = getattr(agent_request, "job_id", None)
+    session_id = getattr(agent_request, "session_id", None)
+    prompt = search_prompt(agent_request)
     logger.info(f"Agent running search for: '{prompt[:70]}...'")
 
     try:
@@ -51,28 +308,90 @@ async def run_deep_search(agent_request: AgentRequest) -> AgentResponse:
         if os.getenv("DEMO_MODE", "false").lower() == "true":
             logger.info("DEMO_MODE is enabled. Returning mock deep search response.")
             await asyncio.sleep(2.0)  # Simulate search time
-            final_answer = (
-                f"**[DEMO MODE] Deep Search Result for: {agent_request.prompt}**\n\n"
-                "Based on the analysis of the request, here are the key findings:\n\n"
-                "1. **Market Trends**: The AI agent market is rapidly evolving with a focus on autonomous task execution.\n"
-                "2. **Competitor Analysis**: Key players are integrating multi-modal capabilities (text, image, voice).\n"
-                "3. **Strategic Recommendations**: Focus on user experience and seamless integration with existing workflows.\n\n"
-                "This is a simulated response for demonstration purposes."
-            )
+            final_answer = demo_answer(agent_request)
         else:
             # Run the synchronous agent.run in a separate thread
-            if deep_search_agent is None:
+            if deep_search_pool is None:
                 raise RuntimeError(
                     "Deep Search Agent not initialized (check API keys)."
                 )
-            final_answer = await asyncio.to_thread(deep_search_agent.run, prompt)
+            task = prompt
+            save_step: Optional[Callable[[Any], None]] = None
+            if job_id and checkpoint_store is not None:
+                checkpoint = await asyncio.to_thread(_load_checkpoint, job_id, prompt)
+            if checkpoint is not None:
+                logger.info(
+                    f"Resuming deep search {job_id} after "
+                    f"{len(checkpoint.steps)} checkpointed steps."
+                )
+                task = checkpoint.task
+            else:
+                if knowledge_base is not None and session_id:
+                    notes = await asyncio.to_thread(
+                        knowledge_base.search, session_id, agent_request.prompt
+                    )
+                if notes:
+                    logger.info(
+                        f"Found {len(notes)} related answers in the knowledge base."
+                    )
+                    task = f"{context_for(notes)}\n\n---\n\nTask: {prompt}"
+            if job_id and checkpoint_store is not None:
+
+                def save_step(step: Any) -> None:
+                    checkpoint_store.save_step(job_id, prompt, task, step)
+
+            run, pool_wait = await deep_search_pool.run(
+                lambda agent: run_agent(
+                    agent,
+                    task,
+                    on_step=save_step,
+                    deadline=deadline,
+                    resume_from=checkpoint,
+                )
+            )
+            final_answer, search_counts, partial, sources = run
+            # A partial answer keeps its checkpoint so the job can be run
+            # again to finish the research.
+            if save_step is not None and not partial:
+                await asyncio.to_thread(checkpoint_store.delete, job_id)
+            if knowledge_base is not None and session_id and not partial:
+                await asyncio.to_thread(
+                    knowledge_base.add,
+                    session_id,
+                    agent_request.prompt,
+                    str(final_answer),
+                    sources,
+                )
     except Exception as e:
         raise RuntimeError(f"Agent execution failed: {e}")
 
     execution_time = time.time() - start_time
-    return AgentResponse(
+    response = AgentResponse(
         response=final_answer,
         agent_id=AGENT_ID,
         execution_time=execution_time,
-        metadata={"prompt_length": len(prompt)},
+        metadata={
+            "prompt_length": len(prompt),
+            "pool_wait_seconds": pool_wait,
+            "search_cache": search_counts,
+            "partial": partial,
+            "sources": list(sources),
+            "resumed_steps": len(checkpoint.steps) if checkpoint else 0,
+            "knowledge_base": [
+                {"prompt": note.prompt, "coverage": note.coverage} for note in notes
+            ],
+        },
     )
+    # A partial answer is not what a later search for this prompt would find.
+    if use_cache and not partial:
+        answer_cache.set(
+            _answer_cache_key(agent_request), (agent_request.prompt, response)
+        )
+    return response
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Size, utilization and wait times of the deep search agent pool."""
+    if deep_search_pool is None:
+        return {}
+    return deep_search_pool.stats()
@@ -0,0 +1,234 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set
+
+from smolagents.memory import ActionStep, PlanningStep
+
+from app.services.agent import deep_search_service
+from app.services.github.schema import AgentRequest
+
+logger = logging.getLogger(__name__)
+
+# Longest text sent per field of a step; agent observations can be huge.
+MAX_FIELD_CHARS = 4000
+
+
+def _truncate(text: Any) -> Optional[str]:
+    if text is None:
+        return None
+    text = str(text)
+    if len(text) <= MAX_FIELD_CHARS:
+        return text
+    return text[:MAX_FIELD_CHARS] + f"... [{len(text) - MAX_FIELD_CHARS} more chars]"
+
+
+def step_event(step: Any) -> Optional[Dict[str, Any]]:
+    """
+    Serializes a finished smolagents step as a stream event. Returns None for
+    steps clients do not need (the task itself, streamed token deltas).
+    """
+    if isinstance(step, PlanningStep):
+        return {"event": "planning", "data": {"plan": _truncate(step.plan)}}
+    if isinstance(step, ActionStep):
+        timing = getattr(step, "timing", None)
+        return {
+            "event": "step",
+            "data": {
+                "step_number": step.step_number,
+                "model_output": _truncate(step.model_output),
+                "code_action": _truncate(getattr(step, "code_action", None)),
+                "tool_calls": [
+                    {"name": call.name, "arguments": _truncate(call.arguments)}
+                    for call in step.tool_calls or []
+                ],
+                "observations": _truncate(step.observations),
+                "error": _truncate(step.error),
+                "duration": timing.duration
+                if timing
+                else getattr(step, "duration", None),
+            },
+        }
+    return None
+
+
+class StepBuffer:
+    """
+    Bounded buffer between the agent's worker thread and the client stream.
+    When a slow client lets `max_events` pile up, the oldest step events are
+    dropped; the final event is always the newest and is never lost.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_events: int):
+        self._loop = loop
+        self.max_events = max_events
+        self._events: Deque[Optional[Dict[str, Any]]] = deque()
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def put_threadsafe(self, event: Optional[Dict[str, Any]]) -> None:
+        self._loop.call_soon_threadsafe(self.put, event)
+
+    def put(self, event: Optional[Dict[str, Any]]) -> None:
+        """Appends an event; None marks the end of the stream."""
+        if len(self._events) >= self.max_events:
+            self._events.popleft()
+            self.dropped += 1
+        self._events.append(event)
+        self._ready.set()
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        while not self._events:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._events.popleft()
+
+
+class DeepSearchStreams:
+    """Streams the steps of deep searches and lets clients stop them."""
+
+    def __init__(self, max_buffered_events: int = 32):
+        self.max_buffered_events = max_buffered_events
+        self._agents: Dict[str, Any] = {}
+        self._runs: Dict[str, "asyncio.Task[Any]"] = {}
+        self._stopped: Set[str] = set()
+
+    def stop(self, run_id: str) -> bool:
+        """
+        Interrupts a streaming run after its current step, or cancels it if it
+        is still waiting for an agent. Returns False if the run is unknown or
+        has already ended.
+        """
+        task = self._runs.get(run_id)
+        if task is None or task.done():
+            return False
+        logger.info(f"Stopping deep search run {run_id}.")
+        self._stopped.add(run_id)
+        agent = self._agents.get(run_id)
+        if agent is not None:
+            agent.interrupt()
+        else:
+            task.cancel()
+        return True
+
+    async def stream(
+        self, agent_request: AgentRequest
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Runs a deep search and emits a `started` event with the run id, one
+        `planning` or `step` event per finished agent step, then `done` with
+        the answer, `stopped`, or `error`. Closing the stream stops the run.
+        """
+        start_time = time.time()
+        deadline = deep_search_service.deadline_for(agent_request, time.monotonic())
+        run_id = f"run-{uuid.uuid4().hex[:12]}"
+        prompt = deep_search_service.search_prompt(agent_request)
+        yield {"event": "started", "data": {"run_id": run_id}}
+
+        if os.getenv("DEMO_MODE", "false").lower() == "true":
+            logger.info("DEMO_MODE is enabled. Streaming mock deep search steps.")
+            await asyncio.sleep(1.0)
+            yield {
+                "event": "step",
+                "data": {
+                    "step_number": 1,
+                    "model_output": "[DEMO MODE] Searching the web.",
+                    "code_action": None,
+                    "tool_calls": [],
+                    "observations": None,
+                    "error": None,
+                    "duration": 1.0,
+                },
+            }
+            await asyncio.sleep(1.0)
+            demo_run = deep_search_service.AgentRun(
+                deep_search_service.demo_answer(agent_request), {}, False
+            )
+            yield self._done(demo_run, start_time, 0.0)
+            return
+
+        pool = deep_search_service.deep_search_pool
+        if pool is None:
+            yield {
+                "event": "error",
+                "data": {
+                    "detail": "Deep Search Agent not initialized (check API keys)."
+                },
+            }
+            return
+
+        buffer = StepBuffer(asyncio.get_running_loop(), self.max_buffered_events)
+
+        def on_step(step: Any) -> None:
+            event = step_event(step)
+            if event is not None:
+                buffer.put_threadsafe(event)
+
+        def run(agent: Any) -> Any:
+            self._agents[run_id] = agent
+            try:
+                return deep_search_service.run_agent(agent, prompt, on_step, deadline)
+            finally:
+                self._agents.pop(run_id, None)
+
+        def forget(_: Any) -> None:
+            self._runs.pop(run_id, None)
+            self._stopped.discard(run_id)
+
+        task = asyncio.create_task(pool.run(run))
+        self._runs[run_id] = task
+        # Runs after every step event the worker thread has queued.
+        task.add_done_callback(lambda _: buffer.put(None))
+
+        try:
+            while (event := await buffer.get()) is not None:
+                yield event
+            stopped = run_id in self._stopped
+        finally:
+            # If the client went away, free the agent after its current step.
+            self.stop(run_id)
+            task.add_done_callback(forget)
+
+        if buffer.dropped:
+            logger.info(f"Dropped {buffer.dropped} step events of run {run_id}.")
+        if stopped or task.cancelled():
+            yield {"event": "stopped", "data": {"run_id": run_id}}
+        elif task.exception() is not None:
+            yield {
+                "event": "error",
+                "data": {"detail": f"Agent execution failed: {task.exception()}"},
+            }
+        else:
+            run, pool_wait = task.result()
+            yield self._done(run, start_time, pool_wait, buffer.dropped)
+
+    @staticmethod
+    def _done(
+        run: deep_search_service.AgentRun,
+        start_time: float,
+        pool_wait: float,
+        dropped_events: int = 0,
+    ) -> Dict[str, Any]:
+        return {
+            "event": "done",
+            "data": {
+                "response": str(run.answer),
+                "agent_id": deep_search_service.AGENT_ID,
+                "execution_time": time.time() - start_time,
+                "metadata": {
+                    "pool_wait_seconds": pool_wait,
+                    "search_cache": run.search_counts,
+                    "partial": run.partial,
+                    "dropped_events": dropped_events,
+                },
+            },
+        }
+
+
+# --- One-Time Initialization ---
+deep_search_streams = DeepSearchStreams(
+    max_buffered_events=int(os.getenv("DEEP_SEARCH_STREAM_BUFFER_EVENTS", "32"))
+)
@@ -0,0 +1,234 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from typing import List, NamedTuple, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+_TERM_PATTERN = re.compile(r"\w+")
+# Words that say how to research rather than what; they don't make two
+# prompts related.
+_STOPWORDS = set(
+    "a about an and are as at be by do does find for from how in is it me of on "
+    "or out please research tell the this to what which who with".split()
+)
+# A query word found only in an entry's answer counts for this much of one
+# found in its prompt: a long answer mentions most words of any query on its
+# topic without having answered it.
+_ANSWER_TERM_WEIGHT = 0.5
+
+
+def terms(text: str) -> Set[str]:
+    """The distinct content words of `text`."""
+    return {
+        term
+        for term in _TERM_PATTERN.findall(text.lower())
+        if len(term) > 1 and term not in _STOPWORDS
+    }
+
+
+class KnowledgeEntry(NamedTuple):
+    entry_id: int
+    prompt: str
+    answer: str
+    sources: List[str]
+    created_at: float
+    coverage: float
+
+
+def coverage(query_terms: Set[str], prompt: str, answer: str) -> float:
+    """
+    The share of `query_terms` an entry covers, words found only in its
+    answer counting for `_ANSWER_TERM_WEIGHT` of one found in its prompt.
+    """
+    prompt_terms = terms(prompt)
+    in_prompt = len(query_terms & prompt_terms)
+    in_answer = len((query_terms - prompt_terms) & terms(answer))
+    return (in_prompt + _ANSWER_TERM_WEIGHT * in_answer) / len(query_terms)
+
+
+class KnowledgeBase:
+    """
+    Local corpus of earlier deep-search answers and their sources, indexed
+    with SQLite FTS5 and kept per session: a search only finds the answers
+    stored under its own session id.
+
+    `search` ranks entries by BM25 and keeps those covering at least
+    `min_coverage` of the query's content words. Entries older than
+    `ttl_seconds` and the oldest beyond `max_entries` are dropped.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        min_coverage: float = 0.6,
+        max_entries: int = 5000,
+        ttl_seconds: float = 30 * 24 * 3600.0,
+    ):
+        self.path = path
+        self.min_coverage = min_coverage
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            if columns and "session_id" not in columns:
+                # Entries stored before answers were kept per session belong
+                # to no session.
+                conn.execute("DROP TABLE IF EXISTS entries_fts")
+                conn.execute("DROP TABLE entries")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    prompt TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    sources TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    UNIQUE (session_id, prompt)
+                )
+                """
+            )
+            # Raises sqlite3.OperationalError where SQLite lacks FTS5.
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts "
+                "USING fts5(prompt, answer)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def add(
+        self, session_id: str, prompt: str, answer: str, sources: Sequence[str]
+    ) -> Optional[int]:
+        """
+        Stores an answer of the session, replacing any earlier answer of the
+        session to the same prompt.
+        """
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                self._delete(
+                    conn, "session_id = ? AND prompt = ?", (session_id, prompt)
+                )
+                cursor = conn.execute(
+                    "INSERT INTO entries (session_id, prompt, answer, sources, "
+                    "created_at) VALUES (?, ?, ?, ?, ?)",
+                    (session_id, prompt, answer, json.dumps(list(sources)), now),
+                )
+                entry_id = cursor.lastrowid
+                conn.execute(
+                    "INSERT INTO entries_fts (rowid, prompt, answer) VALUES (?, ?, ?)",
+                    (entry_id, prompt, answer),
+                )
+                self._delete(conn, "created_at <= ?", (now - self.ttl_seconds,))
+                self._delete(
+                    conn,
+                    "id NOT IN (SELECT id FROM entries ORDER BY created_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Knowledge base write failed: {e}")
+            return None
+        return entry_id
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, where: str, params: tuple) -> None:
+        conn.execute(
+            f"DELETE FROM entries_fts WHERE rowid IN (SELECT id FROM entries WHERE {where})",
+            params,
+        )
+        conn.execute(f"DELETE FROM entries WHERE {where}", params)
+
+    def search(
+        self, session_id: str, query: str, limit: int = 3
+    ) -> List[KnowledgeEntry]:
+        """
+        The best entries of the session covering enough of the query's
+        content words.
+        """
+        query_terms = terms(query)
+        if not query_terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in sorted(query_terms))
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT e.id, e.prompt, e.answer, e.sources, e.created_at "
+                    "FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid "
+                    "WHERE entries_fts MATCH ? AND e.session_id = ? "
+                    "AND e.created_at > ? "
+                    "ORDER BY bm25(entries_fts, 2.0, 1.0) LIMIT ?",
+                    (match, session_id, time.time() - self.ttl_seconds, limit * 5),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Knowledge base search failed: {e}")
+            return []
+
+        entries = []
+        for entry_id, prompt, answer, sources, created_at in rows:
+            covered = coverage(query_terms, prompt, answer)
+            if covered >= self.min_coverage:
+                entries.append(
+                    KnowledgeEntry(
+                        entry_id,
+                        prompt,
+                        answer,
+                        json.loads(sources),
+                        created_at,
+                        covered,
+                    )
+                )
+        return entries[:limit]
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries_fts")
+            conn.execute("DELETE FROM entries")
+
+
+def context_for(entries: List[KnowledgeEntry], max_chars: int = 2000) -> str:
+    """Earlier research formatted as notes to prepend to the agent's task."""
+    notes = []
+    for entry in entries:
+        researched = time.strftime("%Y-%m-%d", time.gmtime(entry.created_at))
+        answer = entry.answer[:max_chars]
+        sources = "".join(f"\n- {source}" for source in entry.sources[:10])
+        notes.append(
+            f"### {entry.prompt} (researched {researched})\n{answer}"
+            + (f"\nSources:{sources}" if sources else "")
+        )
+    return (
+        "Notes from earlier research on related questions. If they already "
+        "answer the task, answer from them without searching the web; "
+        "otherwise only search for what they are missing.\n\n" + "\n\n".join(notes)
+    )
+
+
+def _create_knowledge_base() -> Optional[KnowledgeBase]:
+    if os.getenv("KNOWLEDGE_BASE", "true").lower() != "true":
+        return None
+    try:
+        return KnowledgeBase(
+            os.getenv(
+                "KNOWLEDGE_BASE_PATH",
+                os.path.join(tempfile.gettempdir(), "agent_hub_knowledge.sqlite3"),
+            ),
+            min_coverage=float(os.getenv("KNOWLEDGE_BASE_MIN_COVERAGE", "0.6")),
+            max_entries=int(os.getenv("KNOWLEDGE_BASE_MAX_ENTRIES", "5000")),
+            ttl_seconds=float(
+                os.getenv("KNOWLEDGE_BASE_TTL_SECONDS", str(30 * 24 * 3600))
+            ),
+        )
+    except sqlite3.Error as e:
+        logger.warning(f"Knowledge base disabled: {e}")
+        return None
+
+
+# --- One-Time Initialization ---
+knowledge_base = _create_knowledge_base()
@@ -0,0 +1,128 @@
+import os
+import re
+from typing import Any, Dict, List, NamedTuple
+
+
+class ModelTier(NamedTuple):
+    """A model used for card planning and its rough latency profile."""
+
+    name: str
+    model_id: str
+    first_token_seconds: float
+    output_tokens_per_second: float
+
+    def predicted_latency(self, output_tokens: int) -> float:
+        return self.first_token_seconds + output_tokens / self.output_tokens_per_second
+
+
+FAST_TIER = ModelTier(
+    name="fast",
+    model_id=os.getenv("NEW_CARD_FAST_MODEL", "claude-3-5-haiku-20241022"),
+    first_token_seconds=0.7,
+    output_tokens_per_second=120.0,
+)
+FLAGSHIP_TIER = ModelTier(
+    name="flagship",
+    model_id=os.getenv("NEW_CARD_FLAGSHIP_MODEL", "claude-sonnet-4-20250514"),
+    first_token_seconds=1.5,
+    output_tokens_per_second=60.0,
+)
+
+# Output size: the JSON envelope plus a typical card, and the budget's
+# more generous allowance per card.
+OUTPUT_OVERHEAD_TOKENS = 200
+EXPECTED_TOKENS_PER_CARD = 180
+TOKENS_PER_CARD = 300
+MIN_OUTPUT_TOKENS = 1024
+MAX_OUTPUT_TOKENS = 5000
+
+ROUTING_ENABLED = os.getenv("NEW_CARD_MODEL_ROUTING", "true").lower() == "true"
+LATENCY_SLO_SECONDS = float(os.getenv("NEW_CARD_LATENCY_SLO_SECONDS", "30"))
+SHORT_PROMPT_CHARS = int(os.getenv("NEW_CARD_ROUTER_SHORT_PROMPT_CHARS", "400"))
+MAX_FAST_CARDS = int(os.getenv("NEW_CARD_ROUTER_MAX_FAST_CARDS", "4"))
+
+# Words and punctuation that usually separate one requested task from the next.
+_TASK_SEPARATOR_PATTERN = re.compile(
+    r"[;\n]|\b(?:then|and then|after that|afterwards|also|finally)\b|\.\s+\S|,\s*and\b",
+    re.IGNORECASE,
+)
+_TASK_HINT_PATTERN = re.compile(
+    r"\b(?:research|analy[sz]e|investigate|call|phone|image|poster|picture|draw|generate)\w*",
+    re.IGNORECASE,
+)
+
+
+class RoutingDecision(NamedTuple):
+    tier: ModelTier
+    max_tokens: int
+    estimated_cards: int
+    reason: str
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "tier": self.tier.name,
+            "model_id": self.tier.model_id,
+            "max_tokens": self.max_tokens,
+            "estimated_cards": self.estimated_cards,
+            "reason": self.reason,
+        }
+
+
+def estimate_card_count(prompt: str) -> int:
+    """
+    Rough number of cards a prompt will produce: the larger of the number of
+    task-separating clauses and the number of task-type keywords.
+    """
+    clauses = len(_TASK_SEPARATOR_PATTERN.findall(prompt.strip())) + 1
+    hints = len(_TASK_HINT_PATTERN.findall(prompt))
+    return max(1, min(12, max(clauses, hints)))
+
+
+def output_budget(estimated_cards: int) -> int:
+    """`max_tokens` for a plan of about `estimated_cards` cards, with headroom."""
+    budget = OUTPUT_OVERHEAD_TOKENS + TOKENS_PER_CARD * (estimated_cards + 2)
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, budget))
+
+
+def route(prompt: str, slo_seconds: float = LATENCY_SLO_SECONDS) -> RoutingDecision:
+    """
+    Picks the model tier and output budget for a planning prompt.
+
+    Short prompts asking for a handful of cards go to the fast tier. Longer
+    ones go to the flagship tier unless its predicted latency would exceed
+    the SLO, in which case the fast tier is used and escalation on invalid
+    output remains the safety net.
+    """
+    estimated_cards = estimate_card_count(prompt)
+    if not ROUTING_ENABLED:
+        return RoutingDecision(
+            FLAGSHIP_TIER, MAX_OUTPUT_TOKENS, estimated_cards, "routing disabled"
+        )
+    max_tokens = output_budget(estimated_cards)
+
+    if len(prompt) <= SHORT_PROMPT_CHARS and estimated_cards <= MAX_FAST_CARDS:
+        return RoutingDecision(FAST_TIER, max_tokens, estimated_cards, "short prompt")
+
+    expected_tokens = (
+        OUTPUT_OVERHEAD_TOKENS + EXPECTED_TOKENS_PER_CARD * estimated_cards
+    )
+    predicted = FLAGSHIP_TIER.predicted_latency(expected_tokens)
+    if predicted > slo_seconds:
+        return RoutingDecision(
+            FAST_TIER,
+            max_tokens,
+            estimated_cards,
+            f"flagship predicted {predicted:.1f}s exceeds SLO of {slo_seconds:.1f}s",
+        )
+    return RoutingDecision(FLAGSHIP_TIER, max_tokens, estimated_cards, "complex prompt")
+
+
+def escalation(decision: RoutingDecision) -> List[RoutingDecision]:
+    """The tiers to retry with, in order, if `decision`'s output fails validation."""
+    if decision.tier is FLAGSHIP_TIER:
+        return []
+    return [
+        RoutingDecision(
+            FLAGSHIP_TIER, MAX_OUTPUT_TOKENS, decision.estimated_cards, "escalation"
+        )
+    ]
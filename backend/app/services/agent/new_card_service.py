@@ -1,27 +1,158 @@
 import asyncio
+import hashlib
 import os
 import json
 import logging
+import re
 import time
 import uuid
+from typing import AbstractSet, Any, AsyncIterator, Dict, Optional, Tuple
 
 
 import anthropic
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 
 from app.services.github.schema import (
     AgentRequest,
     NewCardAgentResponse,
     NewCardData,
+    TaskType,
 )
+from app.services.agent import model_router
+from app.services.agent.card_dedup import card_deduplicator
+from app.services.agent.card_graph import CardGraph
+from app.services.agent.card_json import (
+    IncrementalCardParser,
+    extract_cards,
+    extract_json_object,
+)
+from app.services.agent.rate_limiter import anthropic_rate_limiter
+from app.services.agent.research_jobs import research_jobs
+from app.services.agent.response_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
 
 # --- One-Time Initialization ---
 # This client is created once when the module is first imported.
-claude_client = anthropic.AsyncAnthropic()
+# Retries are handled by the shared `anthropic_rate_limiter`, not the SDK.
+claude_client = anthropic.AsyncAnthropic(max_retries=0)
 AGENT_ID = f"new-card-func-{str(uuid.uuid4())[:8]}"
+MODEL_ID = model_router.FLAGSHIP_TIER.model_id
+
+DEDUPLICATE_CARDS = os.getenv("NEW_CARD_DEDUP", "true").lower() == "true"
+SPECULATIVE_RESEARCH = (
+    os.getenv("NEW_CARD_SPECULATIVE_RESEARCH", "false").lower() == "true"
+)
+
+GENERATION_MODES = ("text", "tool")
+DEFAULT_GENERATION_MODE = os.getenv("NEW_CARD_GENERATION_MODE", "text").lower()
+if DEFAULT_GENERATION_MODE not in GENERATION_MODES:
+    raise ValueError(
+        f"NEW_CARD_GENERATION_MODE must be one of {GENERATION_MODES}, "
+        f"got '{DEFAULT_GENERATION_MODE}'."
+    )
+
+# Planning responses keyed by normalized prompt, system prompt, generation
+# mode and model.
+response_cache: TTLCache[NewCardAgentResponse] = TTLCache(
+    max_size=int(os.getenv("NEW_CARD_CACHE_MAX_SIZE", "256")),
+    ttl_seconds=float(os.getenv("NEW_CARD_CACHE_TTL_SECONDS", "900")),
+)
+
+# Mock planning output returned when DEMO_MODE is enabled.
+DEMO_CARDS = {
+    "cards": [
+        {
+            "card_id": "task-1",
+            "title": "Research Competitors",
+            "description": "Analyze key competitors in the market.",
+            "task_type": "research_task",
+            "status": "todo",
+            "parameters": {
+                "topics": ["pricing", "features"],
+                "scope": "Global",
+            },
+            "dependencies": [],
+        },
+        {
+            "card_id": "task-2",
+            "title": "Draft Strategy Report",
+            "description": "Compile research findings into a strategy report.",
+            "task_type": "research_task",
+            "status": "todo",
+            "parameters": None,
+            "dependencies": ["task-1"],
+        },
+        {
+            "card_id": "task-3",
+            "title": "Generate Cover Image",
+            "description": "Create a cover image for the strategy report.",
+            "task_type": "image_generation_task",
+            "status": "todo",
+            "parameters": None,
+            "dependencies": ["task-2"],
+        },
+    ]
+}
+
+
+# Validates the cards of a tool-use response in a single pass.
+_CARD_LIST_ADAPTER: TypeAdapter[list[NewCardData]] = TypeAdapter(list[NewCardData])
+
+
+def _card_tool() -> Dict[str, Any]:
+    """The `create_cards` tool whose input schema is the list of `NewCardData`."""
+    cards_schema = _CARD_LIST_ADAPTER.json_schema()
+    definitions = cards_schema.pop("$defs", {})
+    return {
+        "name": "create_cards",
+        "description": "Creates the task cards for the user's request.",
+        "input_schema": {
+            "type": "object",
+            "properties": {"cards": cards_schema},
+            "required": ["cards"],
+            "$defs": definitions,
+        },
+    }
+
+
+class GenerationStats:
+    """Per-generation-mode counts of generations, failures and latency."""
+
+    def __init__(self):
+        self._modes = {
+            mode: {"generations": 0, "failures": 0, "total_latency": 0.0}
+            for mode in GENERATION_MODES
+        }
+
+    def record(self, mode: str, latency: float, failed: bool) -> None:
+        counters = self._modes[mode]
+        counters["generations"] += 1
+        counters["failures"] += int(failed)
+        counters["total_latency"] += latency
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            mode: {
+                "generations": counters["generations"],
+                "failures": counters["failures"],
+                "failure_rate": counters["failures"] / counters["generations"]
+                if counters["generations"]
+                else 0.0,
+                "average_latency": counters["total_latency"] / counters["generations"]
+                if counters["generations"]
+                else 0.0,
+            }
+            for mode, counters in self._modes.items()
+        }
+
+
+# Generations that could not be turned into valid cards, by mode.
+generation_stats = GenerationStats()
 
 
 def _get_system_prompt() -> str:
@@ -63,13 +194,13 @@ def _get_system_prompt() -> str:
           "dependencies": ["task-1"]
         },
         {
-          "card_id": "task-2",
+          "card_id": "task-3",
           "title": "Create Marketing Poster",
           "description": "Generate a poster for the new marketing campaign based on the research. The image should contain a sleek, futuristic marketing poster for electric vehicles in Germany. Show a modern EV on a road with wind turbines in the background. Use a blue and green color palette. Text: 'The Future is Electric'.",
           "task_type": "image_generation_task",
           "status": "todo",
           "parameters": null,
-          "dependencies": ["task-1"],
+          "dependencies": ["task-1"]
         }
       ]
     }
@@ -77,20 +208,347 @@ def _get_system_prompt() -> str:
     """
 
 
-def _extract_json_from_response(text: str) -> str:
+def _get_system_blocks() -> list[Dict[str, Any]]:
+    """
+    The system prompt as content blocks, marked with `cache_control` so that
+    Anthropic caches the static planning instructions between requests.
+
+    The marker caches everything before it: the tool definitions (in `tool`
+    mode) and the system prompt. Anthropic only creates a cache entry once
+    that prefix reaches the model's minimum cacheable length (1024 tokens
+    for Sonnet, 2048 for Haiku). The system prompt alone is about 600
+    tokens, so text-mode requests are not cached until the prompt grows;
+    tool-mode requests on the flagship tier clear the minimum with the
+    `create_cards` schema. The marker costs nothing when it doesn't apply.
+    """
+    return [
+        {
+            "type": "text",
+            "text": _get_system_prompt(),
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+
+
+def usage_metadata(usage: Any) -> Dict[str, int]:
+    """Token usage of a message, including prompt-cache reads and writes."""
+    return {
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", 0)
+        or 0,
+    }
+
+
+def _normalize_prompt(prompt: str) -> str:
+    """
+    Collapses whitespace, case and surrounding punctuation so that trivially
+    reworded prompts share a cache entry.
+    """
+    normalized = re.sub(r"\s+", " ", prompt).strip().lower()
+    return normalized.strip(" .!?;:,")
+
+
+def _cache_key(prompt: str, generation_mode: str, model_id: str) -> str:
+    """
+    Builds the cache key from the prompt, the system prompt, the generation
+    mode and the model the request is first sent to.
+    """
+    system_hash = hashlib.sha256(_get_system_prompt().encode("utf-8")).hexdigest()
+    raw_key = (
+        f"{model_id}\x00{generation_mode}\x00{system_hash}\x00"
+        f"{_normalize_prompt(prompt)}"
+    )
+    return hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+
+
+def message_params(
+    prompt: str,
+    generation_mode: Optional[str] = None,
+    model_id: str = MODEL_ID,
+    max_tokens: int = model_router.MAX_OUTPUT_TOKENS,
+) -> Dict[str, Any]:
+    """
+    The `messages.create` parameters for planning cards from `prompt`. In
+    `tool` mode the model is forced to answer through the `create_cards` tool.
+    `generation_mode` defaults to `DEFAULT_GENERATION_MODE`.
+    """
+    generation_mode = generation_mode or DEFAULT_GENERATION_MODE
+    params = {
+        "model": model_id,
+        "max_tokens": max_tokens,
+        "system": _get_system_blocks(),
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    if generation_mode == "tool":
+        params["tools"] = [_card_tool()]
+        params["tool_choice"] = {"type": "tool", "name": "create_cards"}
+    return params
+
+
+def _salvage_cards(
+    card_list_json: list[Any], repairs: list[str], known_ids: AbstractSet[str]
+) -> list[NewCardData]:
+    """
+    Validates each card on its own, dropping invalid cards and every card
+    that depends on a dropped or missing card (other than `known_ids`).
+    Drops are added to `repairs`.
+    """
+    validated_cards = []
+    for index, card_json in enumerate(card_list_json, start=1):
+        try:
+            validated_cards.append(NewCardData(**card_json))
+        except (ValidationError, TypeError) as e:
+            logger.warning(f"Dropping invalid card {index} from AI response: {e}")
+            repairs.append(f"card {index}: dropped invalid card")
+
+    kept_ids = {card.card_id for card in validated_cards}
+    while True:
+        orphans = [
+            card
+            for card in validated_cards
+            if any(
+                dep_id not in kept_ids and dep_id not in known_ids
+                for dep_id in card.dependencies
+            )
+        ]
+        if not orphans:
+            return validated_cards
+        for card in orphans:
+            repairs.append(f"{card.card_id}: dropped, depends on a dropped card")
+            kept_ids.discard(card.card_id)
+        validated_cards = [card for card in validated_cards if card.card_id in kept_ids]
+
+
+def parse_cards(
+    text: str, known_ids: AbstractSet[str] = frozenset()
+) -> Tuple[list[NewCardData], list[str]]:
+    """
+    Extracts and validates the cards in a model response, returning the
+    repairs that were needed as well. `known_ids` are card_ids outside the
+    response that its cards may depend on.
+
+    Well-formed responses are validated strictly. Otherwise the `cards` array
+    is extracted tolerantly (see `card_json.extract_cards`) and the valid
+    cards are salvaged. Unusable output is raised as a `ValueError`.
+    """
+    try:
+        response_json = json.loads(extract_json_object(text))
+    except ValueError:
+        response_json = None
+
+    if isinstance(response_json, dict) and "error" in response_json:
+        raise ValueError(response_json["error"])
+
+    if isinstance(response_json, dict) and isinstance(response_json.get("cards"), list):
+        try:
+            return [NewCardData(**card) for card in response_json["cards"]], []
+        except (ValidationError, TypeError) as e:
+            logger.warning(f"AI response failed validation, salvaging cards: {e}")
+            card_list_json, repairs = response_json["cards"], []
+    else:
+        logger.warning("AI response is not valid JSON, attempting repair.")
+        card_list_json, repairs, malformed = extract_cards(text)
+        repairs.extend(f"dropped unparseable card: {raw[:80]}" for raw in malformed)
+
+    validated_cards = _salvage_cards(card_list_json, repairs, known_ids)
+    if not validated_cards:
+        logger.error(f"No valid cards could be salvaged from AI response: {repairs}")
+        raise ValueError(
+            f"AI model returned invalid data: no valid cards ({'; '.join(repairs)})."
+        )
+    logger.info(f"Salvaged {len(validated_cards)} cards with repairs: {repairs}")
+    return validated_cards, repairs
+
+
+def cards_from_response_text(
+    text: str,
+) -> Tuple[list[NewCardData], CardGraph, list[str]]:
+    """
+    Parses the cards in a model response (see `parse_cards`) and validates
+    their dependency graph.
+    """
+    validated_cards, repairs = parse_cards(text)
+    return validated_cards, validate_dependencies(validated_cards), repairs
+
+
+def cards_from_tool_input(tool_input: Any) -> Tuple[list[NewCardData], CardGraph]:
+    """
+    Validates the structured `create_cards` input in a single `TypeAdapter`
+    pass and builds its dependency graph. Invalid input raises `ValueError`.
+    """
+    if not isinstance(tool_input, dict) or "cards" not in tool_input:
+        raise ValueError("AI tool call is missing the 'cards' list.")
+    try:
+        validated_cards = _CARD_LIST_ADAPTER.validate_python(tool_input["cards"])
+    except ValidationError as e:
+        logger.error(f"AI tool input failed validation: {e}")
+        raise ValueError(f"AI model returned invalid data: {e}")
+    return validated_cards, validate_dependencies(validated_cards)
+
+
+def response_from_message(
+    message: Any, execution_time: float, attempts: int = 1
+) -> NewCardAgentResponse:
+    """
+    Builds the validated response for a planning message from Anthropic,
+    either from its `create_cards` tool call or from its text.
+    """
+    tool_use = next(
+        (
+            block
+            for block in message.content
+            if getattr(block, "type", None) == "tool_use"
+        ),
+        None,
+    )
+    if tool_use is not None:
+        validated_cards, graph = cards_from_tool_input(tool_use.input)
+        generation_mode, repairs = "tool", []
+    else:
+        text = next(block.text for block in message.content if hasattr(block, "text"))
+        validated_cards, graph, repairs = cards_from_response_text(text)
+        generation_mode = "text"
+
+    metadata = {
+        "model_used": message.model,
+        **usage_metadata(message.usage),
+        "card_count": len(validated_cards),
+        "attempts_made": attempts,
+        "generation_mode": generation_mode,
+        "json_repairs": repairs,
+    }
+    return build_response(validated_cards, graph, execution_time, metadata)
+
+
+def _dropped_cards(repairs: list[str]) -> list[str]:
+    """The repairs of `parse_cards` that dropped a card rather than fixed it."""
+    return [repair for repair in repairs if "dropped" in repair]
+
+
+async def _generate_with_routing(
+    prompt: str,
+    generation_mode: str,
+    start_time: float,
+    decision: model_router.RoutingDecision,
+) -> NewCardAgentResponse:
+    """
+    Generates cards with the model tier of `decision`, escalating to the next
+    tier when the output fails validation, had cards dropped while salvaging
+    it, or hits its budget.
+    """
+    decisions = [decision, *model_router.escalation(decision)]
+    escalations: list[Dict[str, Any]] = []
+    total_attempts = 0
+
+    for index, decision in enumerate(decisions):
+        is_last = index == len(decisions) - 1
+        generation_start = time.time()
+        try:
+            # Rate limiting, backoff and retries are shared with every other
+            # Anthropic caller in the process.
+            message, attempts = await anthropic_rate_limiter.call(
+                claude_client.messages.create,
+                **message_params(
+                    prompt, generation_mode, decision.tier.model_id, decision.max_tokens
+                ),
+            )
+        except anthropic.APIError as e:
+            logger.error(f"Anthropic API error: {e}")
+            raise RuntimeError(f"AI service is currently unavailable: {e}")
+        total_attempts += attempts
+
+        try:
+            if getattr(message, "stop_reason", None) == "max_tokens" and not is_last:
+                raise ValueError(
+                    f"AI response exceeded its {decision.max_tokens} token budget."
+                )
+            response = response_from_message(
+                message, time.time() - start_time, total_attempts
+            )
+            dropped = _dropped_cards(response.metadata["json_repairs"])
+            if dropped and not is_last:
+                raise ValueError(f"AI response had cards dropped: {'; '.join(dropped)}")
+        except ValueError as e:
+            generation_stats.record(
+                generation_mode, time.time() - generation_start, failed=True
+            )
+            if is_last:
+                raise
+            next_tier = decisions[index + 1].tier
+            logger.warning(
+                f"{decision.tier.name} tier output was rejected, escalating to "
+                f"{next_tier.name}: {e}"
+            )
+            escalations.append(
+                {"from": decision.tier.name, "to": next_tier.name, "error": str(e)}
+            )
+            continue
+
+        generation_stats.record(
+            generation_mode, time.time() - generation_start, failed=False
+        )
+        return response.model_copy(
+            update={
+                "metadata": {
+                    **response.metadata,
+                    "model_tier": decision.tier.name,
+                    "routing": {
+                        **decisions[0].metadata(),
+                        "escalations": escalations,
+                    },
+                }
+            }
+        )
+    raise AssertionError("unreachable")
+
+
+def research_prompt(card: NewCardData) -> str:
+    """The deep-search prompt the board sends for a research card."""
+    return f"{card.title} - {card.description}" if card.description else card.title
+
+
+def _deduplicate_cards(
+    response: NewCardAgentResponse, session_id: Optional[str] = None
+) -> NewCardAgentResponse:
     """
-    Finds and extracts a JSON object from a string, even if it's wrapped
-    in markdown code fences.
+    Merges equivalent cards of the board into one execution node and reports
+    cards equivalent to ones of the session's recent boards (see
+    `CardDeduplicator`).
     """
-    # Find the first '{' which marks the beginning of the JSON
-    start_index = text.find("{")
-    # Find the last '}' which marks the end of the JSON
-    end_index = text.rfind("}")
+    cards, deduplication = card_deduplicator.deduplicate(
+        response.card_data, session_id=session_id
+    )
+    if not deduplication["merged"]:
+        return response.model_copy(
+            update={"metadata": {**response.metadata, "deduplication": deduplication}}
+        )
+
+    metadata = {
+        **response.metadata,
+        "card_count": len(cards),
+        "deduplication": deduplication,
+    }
+    return build_response(
+        cards, validate_dependencies(cards), response.execution_time, metadata
+    )
 
-    if start_index == -1 or end_index == -1:
-        raise ValueError("No valid JSON object found in the AI response.")
 
-    return text[start_index : end_index + 1]
+def _start_speculative_research(
+    response: NewCardAgentResponse,
+) -> NewCardAgentResponse:
+    """
+    Starts the deep search of every research card without dependencies, which
+    is almost always executed next, and attaches the job ids to the response.
+    """
+    jobs = {}
+    for card in response.card_data:
+        if card.task_type == TaskType.RESEARCH and not card.dependencies:
+            job = research_jobs.start(research_prompt(card))
+            if job is not None:
+                jobs[card.card_id] = job.job_id
+    return response.model_copy(update={"research_jobs": jobs})
 
 
 async def create_new_card_from_prompt(
@@ -98,160 +556,259 @@ async def create_new_card_from_prompt(
 ) -> NewCardAgentResponse:
     """
     Processes a prompt to create one or more structured cards with dependencies.
+    Identical (normalized) prompts are served from `response_cache`.
+
+    Equivalent cards are merged unless NEW_CARD_DEDUP is false (see
+    `_deduplicate_cards`).
+    A `NewCardRequest` can choose the generation mode (see `message_params`),
+    opt into speculative research (see `_start_speculative_research`) and
+    name its session.
     """
+    response = await _plan_cards(agent_request)
+    if DEDUPLICATE_CARDS:
+        response = _deduplicate_cards(
+            response, getattr(agent_request, "session_id", None)
+        )
+    speculative = getattr(agent_request, "speculative_research", None)
+    if speculative is None:
+        speculative = SPECULATIVE_RESEARCH
+    if speculative:
+        response = _start_speculative_research(response)
+    return response
+
+
+async def _plan_cards(agent_request: AgentRequest) -> NewCardAgentResponse:
     start_time = time.time()
     logger.info(f"Agent processing prompt: '{agent_request.prompt[:70]}...'")
+    generation_mode = (
+        getattr(agent_request, "generation_mode", None) or DEFAULT_GENERATION_MODE
+    )
 
-    max_retries = 3
-    base_delay = 2  # seconds
-
-    for attempt in range(max_retries):
-        try:
-            # Check for DEMO_MODE
-            if os.getenv("DEMO_MODE", "false").lower() == "true":
-                logger.info("DEMO_MODE is enabled. Returning mock response.")
-                # Simulate a short delay
-                await asyncio.sleep(1.5)
-
-                # Mock response based on the prompt
-                mock_cards = {
-                    "cards": [
-                        {
-                            "card_id": "task-1",
-                            "title": "Research Competitors",
-                            "description": "Analyze key competitors in the market.",
-                            "task_type": "research_task",
-                            "status": "todo",
-                            "parameters": {
-                                "topics": ["pricing", "features"],
-                                "scope": "Global",
-                            },
-                            "dependencies": [],
-                        },
-                        {
-                            "card_id": "task-2",
-                            "title": "Draft Strategy Report",
-                            "description": "Compile research findings into a strategy report.",
-                            "task_type": "research_task",
-                            "status": "todo",
-                            "parameters": None,
-                            "dependencies": ["task-1"],
-                        },
-                        {
-                            "card_id": "task-3",
-                            "title": "Generate Cover Image",
-                            "description": "Create a cover image for the strategy report.",
-                            "task_type": "image_generation_task",
-                            "status": "todo",
-                            "parameters": None,
-                            "dependencies": ["task-2"],
-                        },
-                    ]
+    demo_mode = os.getenv("DEMO_MODE", "false").lower() == "true"
+    decision = model_router.route(agent_request.prompt)
+    cache_key = _cache_key(
+        agent_request.prompt, generation_mode, decision.tier.model_id
+    )
+    if not demo_mode:
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            logger.info("Serving new-card response from cache.")
+            return cached_response.model_copy(
+                update={
+                    "execution_time": time.time() - start_time,
+                    "metadata": {
+                        **cached_response.metadata,
+                        "cache": "hit",
+                        "cache_stats": response_cache.stats(),
+                    },
                 }
+            )
 
-                # Return the mock response as if it came from the LLM
-                response_text = json.dumps(mock_cards)
-                cleaned_json_text = response_text
-                response_json = mock_cards
-
-                # Validate each card and then validate the dependency graph
-                # Validate each card and then validate the dependency graph
-                card_list_json = mock_cards["cards"]
-                validated_cards = [NewCardData(**card) for card in card_list_json]
-                _validate_dependencies(validated_cards)
-
-                execution_time = time.time() - start_time
-                metadata = {
-                    "model_used": "demo-mock",
-                    "input_tokens": 0,
-                    "output_tokens": 0,
-                    "card_count": len(validated_cards),
-                    "attempts_made": 1,
-                }
+    # Check for DEMO_MODE
+    if demo_mode:
+        logger.info("DEMO_MODE is enabled. Returning mock response.")
+        # Simulate a short delay
+        await asyncio.sleep(1.5)
+
+        # Validate each card and then validate the dependency graph
+        card_list_json = DEMO_CARDS["cards"]
+        validated_cards = [NewCardData(**card) for card in card_list_json]
+        graph = validate_dependencies(validated_cards)
+
+        execution_time = time.time() - start_time
+        metadata = {
+            "model_used": "demo-mock",
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "card_count": len(validated_cards),
+            "attempts_made": 1,
+            "generation_mode": generation_mode,
+            "json_repairs": [],
+        }
 
-                return NewCardAgentResponse(
-                    card_data=validated_cards,
-                    agent_id=AGENT_ID,
-                    execution_time=execution_time,
-                    metadata=metadata,
-                )
+        return build_response(validated_cards, graph, execution_time, metadata)
 
-            message = await claude_client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=5000,  # Increased for more complex structures
-                system=_get_system_prompt(),
-                messages=[{"role": "user", "content": agent_request.prompt}],
-            )
+    response = await _generate_with_routing(
+        agent_request.prompt, generation_mode, start_time, decision
+    )
+    response_cache.set(cache_key, response)
+
+    return response.model_copy(
+        update={
+            "metadata": {
+                **response.metadata,
+                "cache": "miss",
+                "cache_stats": response_cache.stats(),
+                "generation_stats": generation_stats.stats(),
+            }
+        }
+    )
 
-            response_text = message.content[0].text
-            cleaned_json_text = _extract_json_from_response(response_text)
-            response_json = json.loads(cleaned_json_text)
 
-            if "error" in response_json:
-                raise ValueError(response_json["error"])
+async def stream_new_cards_from_prompt(
+    agent_request: AgentRequest,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of `create_new_card_from_prompt`.
 
-            card_list_json = response_json.get("cards")
-            if not isinstance(card_list_json, list):
+    Yields `{"event": ..., "data": ...}` dicts: one `card` event per validated
+    card as soon as its JSON object is complete, `card_error` for cards that
+    fail validation, and a final `done` (dependency graph valid) or `error`
+    event. Cards are parsed from streamed text, so the stream always uses
+    `text` generation mode.
+    """
+    start_time = time.time()
+    logger.info(f"Agent streaming cards for prompt: '{agent_request.prompt[:70]}...'")
+
+    demo_mode = os.getenv("DEMO_MODE", "false").lower() == "true"
+    cache_key = _cache_key(agent_request.prompt, "text", MODEL_ID)
+    if not demo_mode:
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            logger.info("Streaming new-card response from cache.")
+            for card in cached_response.card_data:
+                yield {"event": "card", "data": card.model_dump(mode="json")}
+            yield {
+                "event": "done",
+                "data": {
+                    "agent_id": AGENT_ID,
+                    "execution_time": time.time() - start_time,
+                    "execution_levels": cached_response.execution_levels,
+                    "critical_path": cached_response.critical_path,
+                    "metadata": {
+                        **cached_response.metadata,
+                        "cache": "hit",
+                        "cache_stats": response_cache.stats(),
+                    },
+                },
+            }
+            return
+
+    parser = IncrementalCardParser()
+    validated_cards: list[NewCardData] = []
+    first_card_time = None
+
+    def _accept(card_json: Dict[str, Any]) -> Dict[str, Any]:
+        nonlocal first_card_time
+        try:
+            card = NewCardData(**card_json)
+        except (ValidationError, TypeError) as e:
+            logger.error(f"Streamed card failed validation: {e}")
+            return {"event": "card_error", "data": {"detail": str(e)}}
+        if first_card_time is None:
+            first_card_time = time.time() - start_time
+        validated_cards.append(card)
+        return {"event": "card", "data": card.model_dump(mode="json")}
+
+    try:
+        if demo_mode:
+            logger.info("DEMO_MODE is enabled. Streaming mock response.")
+            for card_json in DEMO_CARDS["cards"]:
+                await asyncio.sleep(0.5)
+                yield _accept(card_json)
+            model_used = "demo-mock"
+            usage = {
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "cache_read_input_tokens": 0,
+                "cache_creation_input_tokens": 0,
+            }
+        else:
+            async with anthropic_rate_limiter.slot(), claude_client.messages.stream(
+                **message_params(agent_request.prompt, generation_mode="text")
+            ) as stream:
+                async for text in stream.text_stream:
+                    for card_json in parser.feed(text):
+                        yield _accept(card_json)
+                message = await stream.get_final_message()
+            model_used = message.model
+            usage = usage_metadata(message.usage)
+
+            if not parser.array_found:
                 raise ValueError("AI response is missing the 'cards' list.")
+            # Salvage a final card the response stopped in the middle of.
+            for card_json in parser.close():
+                yield _accept(card_json)
+            for raw_object in parser.malformed:
+                yield {
+                    "event": "card_error",
+                    "data": {"detail": f"Unparseable card: {raw_object[:80]}"},
+                }
 
-            # Validate each card and then validate the dependency graph
-            validated_cards = [NewCardData(**card) for card in card_list_json]
-            _validate_dependencies(validated_cards)
-
-            # Success, break out of retry loop
-            break
-
-        except (ValidationError, json.JSONDecodeError, TypeError) as e:
-            logger.error(f"AI response failed validation: {e}")
-            raise ValueError(f"AI model returned invalid data: {e}")
-        except anthropic.APIError as e:
-            error_msg = str(e).lower()
-
-            # Check if it's a rate limit or overload error
-            if (
-                "overloaded" in error_msg
-                or "rate limit" in error_msg
-                or "429" in error_msg
-                or "529" in error_msg
-            ) and attempt < max_retries - 1:
-                delay = base_delay * (2**attempt)  # Exponential backoff
-                logger.warning(
-                    f"Anthropic API overloaded/rate limited (attempt {attempt + 1}/{max_retries}). Retrying in {delay} seconds..."
-                )
-                await asyncio.sleep(delay)
-                continue
-            else:
-                logger.error(f"Anthropic API error: {e}")
-                raise RuntimeError(
-                    f"AI service is currently unavailable after {attempt + 1} attempts: {e}"
-                )
+        if not validated_cards:
+            raise ValueError("AI model returned invalid data: no valid cards.")
+        graph = validate_dependencies(validated_cards)
+    except anthropic.APIError as e:
+        logger.error(f"Anthropic API error while streaming: {e}")
+        yield {
+            "event": "error",
+            "data": {"detail": f"AI service is currently unavailable: {e}"},
+        }
+        return
+    except ValueError as e:
+        if not demo_mode:
+            generation_stats.record("text", time.time() - start_time, failed=True)
+        yield {"event": "error", "data": {"detail": str(e)}}
+        return
 
     execution_time = time.time() - start_time
     metadata = {
-        "model_used": message.model,
-        "input_tokens": message.usage.input_tokens,
-        "output_tokens": message.usage.output_tokens,
+        "model_used": model_used,
+        **usage,
         "card_count": len(validated_cards),
-        "attempts_made": attempt + 1,
+        "attempts_made": 1,
+        "time_to_first_card": first_card_time,
+        "generation_mode": "text",
+        "json_repairs": parser.repairs,
+    }
+    response = build_response(validated_cards, graph, execution_time, metadata)
+    if not demo_mode:
+        generation_stats.record("text", execution_time, failed=False)
+        response_cache.set(cache_key, response)
+
+    yield {
+        "event": "done",
+        "data": {
+            "agent_id": AGENT_ID,
+            "execution_time": execution_time,
+            "execution_levels": response.execution_levels,
+            "critical_path": response.critical_path,
+            "metadata": {
+                **response.metadata,
+                "cache": "miss",
+                "cache_stats": response_cache.stats(),
+                "generation_stats": generation_stats.stats(),
+            },
+        },
     }
 
+
+def validate_dependencies(cards: list[NewCardData]) -> CardGraph:
+    """
+    Ensures that card_ids are unique, that all listed dependencies refer to
+    card_ids that actually exist and that the dependencies form no cycle.
+    """
+    return CardGraph(cards)
+
+
+def build_response(
+    cards: list[NewCardData],
+    graph: CardGraph,
+    execution_time: float,
+    metadata: Dict[str, Any],
+) -> NewCardAgentResponse:
+    """Assembles the response, including the parallel levels and critical path."""
+    critical_path, critical_path_seconds = graph.critical_path()
     return NewCardAgentResponse(
-        card_data=validated_cards,
+        card_data=cards,
         agent_id=AGENT_ID,
         execution_time=execution_time,
-        metadata=metadata,
+        metadata={
+            **metadata,
+            "estimated_critical_path_seconds": critical_path_seconds,
+        },
+        execution_levels=graph.levels,
+        critical_path=critical_path,
     )
-
-
-def _validate_dependencies(cards: list[NewCardData]):
-    """
-    Ensures that all listed dependencies refer to card_ids that actually exist.
-    """
-    all_card_ids = {card.card_id for card in cards}
-    for card in cards:
-        for dep_id in card.dependencies:
-            if dep_id not in all_card_ids:
-                raise ValueError(
-                    f"Invalid dependency graph: Card '{card.title}' depends on "
-                    f"non-existent card_id '{dep_id}'."
-                )
@@ -0,0 +1,414 @@
+import ipaddress
+import logging
+import multiprocessing
+import os
+import re
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+from typing import Any, Collection, List, NamedTuple, Optional, Tuple
+
+import httpx
+from smolagents import Tool
+
+logger = logging.getLogger(__name__)
+
+_SKIPPED_TAGS = {"script", "style", "noscript", "svg", "template", "nav", "footer"}
+_BLOCK_TAGS = {"p", "div", "section", "article", "main", "br", "li", "tr", "table"}
+_BLOCK_TAGS |= {"h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "header"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.parts: List[str] = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "title":
+            self._in_title = False
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.parts.append(data)
+
+
+def extract_text(html: str, max_chars: int) -> Tuple[str, str]:
+    """
+    Returns the title and readable text of an HTML page, without scripts,
+    styles and navigation. Runs in a worker process, so it must stay a
+    picklable module-level function.
+    """
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    lines = (
+        re.sub(r"[ \t\r\f\v]+", " ", line).strip()
+        for line in "".join(parser.parts).split("\n")
+    )
+    text = "\n".join(line for line in lines if line)
+    return parser.title.strip(), text[:max_chars]
+
+
+def check_public_url(
+    url: httpx.URL, allowed_hosts: Collection[str] = ()
+) -> Optional[str]:
+    """
+    Raises `ValueError` unless `url` is http(s) and every address its host
+    resolves to is public, so the agent can't be pointed at loopback,
+    private or link-local services such as the cloud metadata endpoint at
+    169.254.169.254. Returns one of the checked addresses to connect to, or
+    None for hosts in `allowed_hosts`, which are not checked.
+    """
+    if url.scheme not in ("http", "https"):
+        raise ValueError("only http(s) URLs can be visited.")
+    if url.host in allowed_hosts:
+        return None
+    port = url.port or (443 if url.scheme == "https" else 80)
+    try:
+        addresses = socket.getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise ValueError(f"Could not resolve {url.host}: {e}")
+    checked: List[str] = []
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"{url.host} resolves to non-public address {address}.")
+        checked.append(str(address))
+    return checked[0]
+
+
+class CachedPage(NamedTuple):
+    title: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+
+class PageCache:
+    """
+    On-disk cache of extracted pages, shared by all agents and worker
+    processes on the host. Pages are fresh for `ttl_seconds`; stale pages
+    keep their ETag and Last-Modified validators so they can be revalidated
+    with a conditional request. Beyond `max_entries` the least recently used
+    pages are evicted.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600.0, max_entries: int = 2000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fresh_until REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Returns the cached page, fresh or stale, or None."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT title, text, etag, last_modified, fresh_until "
+                    "FROM pages WHERE url = ?",
+                    (url,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE pages SET last_used = ? WHERE url = ?",
+                        (time.time(), url),
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache read failed: {e}")
+            return None
+        if row is None:
+            return None
+        title, text, etag, last_modified, fresh_until = row
+        return CachedPage(title, text, etag, last_modified, fresh_until > time.time())
+
+    def set(
+        self,
+        url: str,
+        title: str,
+        text: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> None:
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        url,
+                        title,
+                        text,
+                        etag,
+                        last_modified,
+                        now + self.ttl_seconds,
+                        now,
+                    ),
+                )
+                conn.execute(
+                    "DELETE FROM pages WHERE rowid IN ("
+                    "SELECT rowid FROM pages ORDER BY last_used DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache write failed: {e}")
+
+    def refresh(self, url: str) -> None:
+        """Marks a revalidated page fresh for another `ttl_seconds`."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE pages SET fresh_until = ? WHERE url = ?",
+                    (time.time() + self.ttl_seconds, url),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Page cache write failed: {e}")
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages")
+
+
+class VisitPagesTool(Tool):
+    """
+    Fetches web pages concurrently over one keep-alive HTTP client and
+    returns their readable text. HTML is parsed in `extract_executor`, a
+    process pool by default, so parsing never holds up the interpreter the
+    agents run in. Extracted pages are cached in `cache` and revalidated with
+    conditional requests once stale.
+
+    Redirects are followed here rather than by the client, so every hop is
+    checked with `check_public_url`, and plain http requests connect to the
+    address that was checked. Bodies are streamed and cut off after
+    `max_bytes_per_page`.
+    """
+
+    name = "visit_webpages"
+    description = """Fetches one or more web pages, e.g. promising links from search results, and returns their readable text. Use it when the search snippets are not enough to answer."""
+    inputs = {
+        "urls": {
+            "type": "array",
+            "description": 'The http(s) URLs of the pages to read, e.g. ["https://example.com/report"].',
+        }
+    }
+    output_type = "string"
+
+    def __init__(
+        self,
+        client: httpx.Client,
+        fetch_executor: Executor,
+        extract_executor: Executor,
+        cache: PageCache,
+        max_urls: int = 5,
+        max_chars_per_page: int = 8000,
+        max_bytes_per_page: int = 2_000_000,
+        max_redirects: int = 5,
+        allowed_hosts: Collection[str] = (),
+    ):
+        super().__init__()
+        self.client = client
+        self.fetch_executor = fetch_executor
+        self.extract_executor = extract_executor
+        self.cache = cache
+        self.max_urls = max_urls
+        self.max_chars_per_page = max_chars_per_page
+        self.max_bytes_per_page = max_bytes_per_page
+        self.max_redirects = max_redirects
+        self.allowed_hosts = allowed_hosts
+
+    def _extract(self, html: str) -> Tuple[str, str]:
+        try:
+            return self.extract_executor.submit(
+                extract_text, html, self.max_chars_per_page
+            ).result()
+        except BrokenProcessPool:
+            logger.warning("Page extraction pool is broken; extracting in-thread.")
+            return extract_text(html, self.max_chars_per_page)
+
+    def _read(self, response: httpx.Response) -> str:
+        """The response body, decoded, up to `max_bytes_per_page` bytes."""
+        body = bytearray()
+        for chunk in response.iter_bytes():
+            body += chunk
+            if len(body) >= self.max_bytes_per_page:
+                del body[self.max_bytes_per_page :]
+                break
+        return body.decode(response.encoding or "utf-8", errors="replace")
+
+    def _visit(self, url: str) -> Tuple[str, str]:
+        cached = self.cache.get(url)
+        if cached is not None and cached.fresh:
+            return cached.title, cached.text
+
+        headers = {}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+        target = httpx.URL(url)
+        for _ in range(self.max_redirects + 1):
+            address = check_public_url(target, self.allowed_hosts)
+            request_url, request_headers = target, headers
+            if address is not None and target.scheme == "http":
+                # Connect to the address that was checked rather than
+                # resolving the host again, which a rebinding DNS server
+                # could answer with a private address. Over https, such an
+                # answer fails certificate verification for the host.
+                request_url = target.copy_with(host=address)
+                request_headers = {**headers, "Host": target.netloc.decode("ascii")}
+            with self.client.stream(
+                "GET", request_url, headers=request_headers
+            ) as response:
+                if response.status_code == 304 and cached is not None:
+                    self.cache.refresh(url)
+                    return cached.title, cached.text
+                if response.has_redirect_location:
+                    target = target.join(response.headers["location"])
+                    continue
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "")
+                if "html" not in content_type and not (
+                    content_type.startswith("text/") or "json" in content_type
+                ):
+                    raise ValueError(f"Unsupported content type '{content_type}'.")
+                body = self._read(response)
+                break
+        else:
+            raise ValueError(f"More than {self.max_redirects} redirects.")
+
+        if "html" in content_type:
+            title, text = self._extract(body)
+        else:
+            title, text = "", body[: self.max_chars_per_page]
+        self.cache.set(
+            url,
+            title,
+            text,
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+        )
+        return title, text
+
+    def _section(self, url: str) -> str:
+        if not url.startswith(("http://", "https://")):
+            return f"## {url}\nError: only http(s) URLs can be visited."
+        try:
+            title, text = self._visit(url)
+        except Exception as e:
+            logger.info(f"Visiting {url} failed: {e}")
+            return f"## {url}\nError: {e}"
+        return f"## {title or url}\nURL: {url}\n\n{text or '(no readable text)'}"
+
+    def forward(self, urls: List[str]) -> str:
+        if isinstance(urls, str):
+            urls = [urls]
+        urls = list(dict.fromkeys(url.strip() for url in urls if url))
+        sections = list(self.fetch_executor.map(self._section, urls[: self.max_urls]))
+        if len(urls) > self.max_urls:
+            sections.append(
+                f"Skipped {len(urls) - self.max_urls} URLs beyond the limit of "
+                f"{self.max_urls}."
+            )
+        return "\n\n".join(sections)
+
+
+def _create_client() -> httpx.Client:
+    max_connections = int(os.getenv("PAGE_VISIT_MAX_CONNECTIONS", "16"))
+    # Redirects are followed by `VisitPagesTool`, which checks every hop.
+    return httpx.Client(
+        follow_redirects=False,
+        timeout=float(os.getenv("PAGE_VISIT_TIMEOUT_SECONDS", "15")),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        ),
+        headers={"User-Agent": "Mozilla/5.0 (compatible; agent-hub-research/1.0)"},
+    )
+
+
+class _LazyProcessPool(Executor):
+    """
+    Starts the extraction processes on first use rather than on import.
+    Workers are spawned rather than forked: the pool is created from one of
+    many fetch threads, and forking a threaded process can copy locks held
+    by other threads into the child.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Any, /, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, **kwargs: Any) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, **kwargs)
+
+
+# --- One-Time Initialization ---
+page_client = _create_client()
+page_fetch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PAGE_VISIT_MAX_CONCURRENCY", "8")),
+    thread_name_prefix="page-visit",
+)
+page_extract_executor = _LazyProcessPool(
+    max_workers=int(os.getenv("PAGE_EXTRACT_WORKERS", "2"))
+)
+page_cache = PageCache(
+    os.getenv(
+        "PAGE_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "agent_hub_page_cache.sqlite3"),
+    ),
+    ttl_seconds=float(os.getenv("PAGE_CACHE_TTL_SECONDS", "3600")),
+    max_entries=int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "2000")),
+)
@@ -0,0 +1,293 @@
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Upstream statuses that mean "slow down": rate limited, overloaded, unavailable.
+THROTTLING_STATUS_CODES = {429, 503, 529}
+# Transient upstream failures worth retrying without shrinking the limits.
+TRANSIENT_STATUS_CODES = {500, 502, 504}
+
+_POLL_INTERVAL = 0.05  # seconds
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    """True for 429/529/503 style errors from the Anthropic SDK or LiteLLM."""
+    if _status_code(exc) in THROTTLING_STATUS_CODES:
+        return True
+    name = type(exc).__name__
+    return "RateLimit" in name or "Overloaded" in name or "ServiceUnavailable" in name
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    if is_throttling_error(exc) or _status_code(exc) in TRANSIENT_STATUS_CODES:
+        return True
+    name = type(exc).__name__
+    return "Connection" in name or "Timeout" in name
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Reads `retry-after-ms` / `retry-after` from the error's HTTP response."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+        if retry_at is None:
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+
+class AdaptiveRateLimiter:
+    """
+    Process-wide limiter for an upstream API.
+
+    Combines a token bucket (requests per second with a burst allowance) with
+    an AIMD concurrency limit: every success raises the limit additively,
+    every throttling response halves it and pauses all callers for the
+    upstream's `retry-after`. Works from the event loop and from worker
+    threads, so agents running in `asyncio.to_thread` share the same limits.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float = 5.0,
+        burst: int = 10,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_retries: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        self.name = name
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._concurrency_limit = float(max_concurrency)
+        self._in_flight = 0
+        self._waiting = 0
+        self._blocked_until = 0.0
+        self._throttled = 0
+        self._retries = 0
+
+    # --- Slot bookkeeping ---
+
+    def _try_acquire(self) -> float:
+        """Takes a slot and returns 0, or returns how long to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                float(self.burst),
+                self._tokens + (now - self._last_refill) * self.requests_per_second,
+            )
+            self._last_refill = now
+
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._in_flight >= int(self._concurrency_limit):
+                return _POLL_INTERVAL
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.requests_per_second
+
+            self._tokens -= 1
+            self._in_flight += 1
+            return 0.0
+
+    def _release(
+        self,
+        success: bool,
+        throttled: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if throttled:
+                self._throttled += 1
+                self._concurrency_limit = max(
+                    float(self.min_concurrency), self._concurrency_limit / 2
+                )
+                if retry_after:
+                    self._blocked_until = max(
+                        self._blocked_until, time.monotonic() + retry_after
+                    )
+            elif success:
+                self._concurrency_limit = min(
+                    float(self.max_concurrency),
+                    self._concurrency_limit + 1 / self._concurrency_limit,
+                )
+
+    async def acquire(self) -> None:
+        with self._lock:
+            self._waiting += 1
+        try:
+            while (wait := self._try_acquire()) > 0:
+                await asyncio.sleep(wait)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def acquire_sync(self) -> None:
+        with self._lock:
+            self._waiting += 1
+        try:
+            while (wait := self._try_acquire()) > 0:
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Holds one request slot for the duration of the block."""
+        await self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self._release(False, is_throttling_error(e), retry_after_seconds(e))
+            raise
+        else:
+            self._release(True)
+
+    @contextmanager
+    def slot_sync(self) -> Iterator[None]:
+        self.acquire_sync()
+        try:
+            yield
+        except BaseException as e:
+            self._release(False, is_throttling_error(e), retry_after_seconds(e))
+            raise
+        else:
+            self._release(True)
+
+    # --- Retrying calls ---
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        """Full-jitter exponential backoff, never shorter than `retry-after`."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return backoff
+
+    def _should_retry(self, attempt: int, exc: BaseException) -> bool:
+        if attempt >= self.max_retries - 1 or not is_retryable_error(exc):
+            return False
+        with self._lock:
+            self._retries += 1
+        return True
+
+    async def call(
+        self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> Tuple[T, int]:
+        """
+        Awaits `fn` under the limiter, retrying throttled and transient
+        failures. Returns the result and the number of attempts made.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                async with self.slot():
+                    return await fn(*args, **kwargs), attempt + 1
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(
+                    f"{self.name} call failed ({e.__class__.__name__}, attempt "
+                    f"{attempt + 1}/{self.max_retries}). Retrying in {delay:.2f}s..."
+                )
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def call_sync(
+        self, fn: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> Tuple[T, int]:
+        """Blocking counterpart of `call` for code running in worker threads."""
+        for attempt in range(self.max_retries):
+            try:
+                with self.slot_sync():
+                    return fn(*args, **kwargs), attempt + 1
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(
+                    f"{self.name} call failed ({e.__class__.__name__}, attempt "
+                    f"{attempt + 1}/{self.max_retries}). Retrying in {delay:.2f}s..."
+                )
+                time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limits and queue depth."""
+        with self._lock:
+            return {
+                "name": self.name,
+                "requests_per_second": self.requests_per_second,
+                "burst": self.burst,
+                "concurrency_limit": int(self._concurrency_limit),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "blocked_for_seconds": max(0.0, self._blocked_until - time.monotonic()),
+                "throttled_responses": self._throttled,
+                "retries": self._retries,
+            }
+
+
+# --- One-Time Initialization ---
+# Shared by every Anthropic call in the process, including LiteLLM agents.
+anthropic_rate_limiter = AdaptiveRateLimiter(
+    name="anthropic",
+    requests_per_second=float(os.getenv("ANTHROPIC_REQUESTS_PER_SECOND", "5")),
+    burst=int(os.getenv("ANTHROPIC_BURST", "10")),
+    max_concurrency=int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8")),
+    max_retries=int(os.getenv("ANTHROPIC_MAX_RETRIES", "4")),
+)
@@ -0,0 +1,83 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _normalize(value: Any) -> Any:
+    """Normalizes whitespace in strings so trivially different payloads match."""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    return value
+
+
+class RequestCoalescer:
+    """
+    Single-flight execution of identical in-flight requests.
+
+    The first caller for a key starts the work as a task; every concurrent
+    caller with the same key awaits that same task instead of starting a
+    duplicate upstream run. The task is shielded, so a caller disconnecting
+    does not cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, "asyncio.Task[Any]"] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(endpoint: str, payload: BaseModel | Dict[str, Any]) -> str:
+        """Builds a key from the endpoint name and the normalized payload."""
+        if isinstance(payload, BaseModel):
+            payload = payload.model_dump(mode="json")
+        canonical = json.dumps(_normalize(payload), sort_keys=True, default=str)
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        return f"{endpoint}:{digest}"
+
+    async def run(
+        self, key: str, factory: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        """
+        Returns the result of `factory()` for `key` and whether it was
+        coalesced onto a run that was already in flight.
+        """
+        task = self._in_flight.get(key)
+        coalesced = task is not None
+
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"Coalescing request onto in-flight run '{key[:40]}'.")
+
+        return await asyncio.shield(task), coalesced
+
+    def _forget(self, key: str, task: "asyncio.Task[Any]") -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every waiter went away.
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._in_flight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }
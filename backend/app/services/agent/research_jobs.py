@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.services.agent import deep_search_service
+from app.services.github.schema import AgentRequest, AgentResponse
+
+logger = logging.getLogger(__name__)
+
+
+class ResearchJob:
+    """A deep search running in the background, waiting to be claimed."""
+
+    def __init__(self, job_id: str, prompt: str, task: "asyncio.Task[AgentResponse]"):
+        self.job_id = job_id
+        self.prompt = prompt
+        self.task = task
+        self.created_at = time.time()
+
+    @property
+    def status(self) -> str:
+        if not self.task.done():
+            return "running"
+        if self.task.cancelled() or self.task.exception() is not None:
+            return "failed"
+        return "done"
+
+
+class ResearchJobRegistry:
+    """
+    Runs deep searches ahead of the client asking for them.
+
+    `start` launches a search and returns its job; the client later claims
+    the result by job id or by sending the same prompt, with no other
+    field, to `/deep-search`. Jobs nobody claims within
+    `unclaimed_ttl_seconds` are cancelled and their results dropped.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[AgentRequest], Awaitable[AgentResponse]],
+        unclaimed_ttl_seconds: float = 600.0,
+        max_running: int = 4,
+    ):
+        self.run = run
+        self.unclaimed_ttl_seconds = unclaimed_ttl_seconds
+        self.max_running = max_running
+        self._jobs: Dict[str, ResearchJob] = {}
+        self._by_prompt: Dict[str, str] = {}
+        self._started = 0
+        self._claimed = 0
+        self._expired = 0
+
+    def start(self, prompt: str) -> Optional[ResearchJob]:
+        """
+        Starts a search for `prompt`, or returns the job already running it.
+        Returns None when `max_running` searches are already in flight.
+        """
+        existing = self._by_prompt.get(prompt)
+        if existing is not None:
+            return self._jobs[existing]
+
+        running = sum(job.status == "running" for job in self._jobs.values())
+        if running >= self.max_running:
+            logger.info("Not starting speculative research: too many jobs running.")
+            return None
+
+        job_id = f"research-{uuid.uuid4().hex[:12]}"
+        task = asyncio.create_task(self.run(AgentRequest(prompt=prompt)))
+        # Failures are surfaced on claim; don't log them as never retrieved.
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        job = ResearchJob(job_id, prompt, task)
+        self._jobs[job_id] = job
+        self._by_prompt[prompt] = job_id
+        self._started += 1
+        asyncio.get_running_loop().call_later(
+            self.unclaimed_ttl_seconds, self._expire, job_id
+        )
+        logger.info(f"Started speculative research job {job_id}: '{prompt[:70]}...'")
+        return job
+
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        return self._jobs.get(job_id)
+
+    def find(self, prompt: str) -> Optional[ResearchJob]:
+        job_id = self._by_prompt.get(prompt)
+        return self._jobs.get(job_id) if job_id is not None else None
+
+    async def claim(self, job_id: str) -> Optional[AgentResponse]:
+        """
+        Waits for the job's result and removes the job. Returns None for
+        unknown or expired jobs; a failed search raises its error.
+        """
+        job = self._forget(job_id)
+        if job is None:
+            return None
+        self._claimed += 1
+        # A claimant that goes away must not cancel the search itself.
+        response = await asyncio.shield(job.task)
+        return response.model_copy(
+            update={
+                "metadata": {
+                    **(response.metadata or {}),
+                    "research_job_id": job_id,
+                    "speculative": True,
+                }
+            }
+        )
+
+    async def claim_prompt(self, prompt: str) -> Optional[AgentResponse]:
+        """
+        Claims the job running `prompt`, if any. A failed speculative search
+        returns None so the caller can run the search itself.
+        """
+        job = self.find(prompt)
+        if job is None:
+            return None
+        try:
+            return await self.claim(job.job_id)
+        except Exception as e:
+            logger.warning(f"Speculative research job {job.job_id} failed: {e}")
+            return None
+
+    async def claim_request(self, request: AgentRequest) -> Optional[AgentResponse]:
+        """
+        Claims the job started for the same request. Jobs run the bare
+        prompt, so a request that adds context, a deadline, a session or
+        a checkpoint id never claims one and runs its own search.
+        """
+        if any(value for field, value in request if field != "prompt"):
+            return None
+        return await self.claim_prompt(request.prompt)
+
+    def _forget(self, job_id: str) -> Optional[ResearchJob]:
+        job = self._jobs.pop(job_id, None)
+        if job is not None and self._by_prompt.get(job.prompt) == job_id:
+            del self._by_prompt[job.prompt]
+        return job
+
+    def _expire(self, job_id: str) -> None:
+        job = self._forget(job_id)
+        if job is None:
+            return
+        self._expired += 1
+        job.task.cancel()
+        logger.info(f"Dropped unclaimed research job {job_id}.")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self._jobs),
+            "running": sum(job.status == "running" for job in self._jobs.values()),
+            "started": self._started,
+            "claimed": self._claimed,
+            "expired": self._expired,
+        }
+
+
+# --- One-Time Initialization ---
+research_jobs = ResearchJobRegistry(
+    deep_search_service.run_deep_search,
+    unclaimed_ttl_seconds=float(os.getenv("SPECULATIVE_RESEARCH_TTL_SECONDS", "600")),
+    max_running=int(os.getenv("SPECULATIVE_RESEARCH_MAX_JOBS", "4")),
+)
@@ -0,0 +1,200 @@
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from smolagents import Tool
+
+from app.services.agent.rate_limiter import AdaptiveRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+class SearchCache:
+    """
+    On-disk cache of search results, shared by every agent and worker
+    process on the host through one SQLite file. Entries expire after
+    `ttl_seconds`; beyond `max_entries` the least recently used are evicted.
+    """
+
+    def __init__(
+        self, path: str, ttl_seconds: float = 86400.0, max_entries: int = 10000
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS search_results (
+                    query TEXT NOT NULL,
+                    region TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (query, region)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS search_results_last_used "
+                "ON search_results (last_used)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation keeps this safe to call
+        # from the worker threads agents run in.
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def get(self, query: str, region: str) -> Optional[str]:
+        key = normalize_query(query)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT result FROM search_results "
+                    "WHERE query = ? AND region = ? AND expires_at > ?",
+                    (key, region, now),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE search_results SET last_used = ? "
+                        "WHERE query = ? AND region = ?",
+                        (now, key, region),
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Search cache read failed: {e}")
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row is not None else None
+
+    def set(self, query: str, region: str, result: str) -> None:
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?, ?)",
+                    (
+                        normalize_query(query),
+                        region,
+                        result,
+                        now + self.ttl_seconds,
+                        now,
+                    ),
+                )
+                conn.execute("DELETE FROM search_results WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM search_results WHERE rowid IN ("
+                    "SELECT rowid FROM search_results ORDER BY last_used DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Search cache write failed: {e}")
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM search_results")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            (entries,) = conn.execute("SELECT COUNT(*) FROM search_results").fetchone()
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class CachedSearchTool(Tool):
+    """
+    Wraps a web search tool so results come from `cache` when the same query
+    was searched recently, by this or any other agent. Counts its own hits
+    and misses so each run can report them.
+
+    Searches that miss the cache run under `rate_limiter`, which every agent
+    and batched search shares, since the wrapped tool's own rate limiting is
+    not thread-safe.
+    """
+
+    name = "web_search"
+    description = """Performs a duckduckgo web search based on your query (think a Google search) then returns the top search results."""
+    inputs = {
+        "query": {"type": "string", "description": "The search query to perform."}
+    }
+    output_type = "string"
+
+    def __init__(
+        self,
+        search_tool: Tool,
+        cache: SearchCache,
+        region: str = "wt-wt",
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+    ):
+        super().__init__()
+        self.search_tool = search_tool
+        self.cache = cache
+        self.region = region
+        self.rate_limiter = rate_limiter
+        # Batched searches call `forward` from several threads at once.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def forward(self, query: str) -> str:
+        cached = self.cache.get(query, self.region)
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is not None:
+            return cached
+        # Failed searches raise and are therefore never cached.
+        if self.rate_limiter is None:
+            result = self.search_tool.forward(query)
+        else:
+            with self.rate_limiter.slot_sync():
+                result = self.search_tool.forward(query)
+        self.cache.set(query, self.region, result)
+        return result
+
+    def reset_counts(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    def counts(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+# --- One-Time Initialization ---
+search_cache = SearchCache(
+    os.getenv(
+        "SEARCH_CACHE_PATH",
+        os.path.join(tempfile.gettempdir(), "agent_hub_search_cache.sqlite3"),
+    ),
+    ttl_seconds=float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400")),
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "10000")),
+)
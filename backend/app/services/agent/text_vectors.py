@@ -0,0 +1,81 @@
+import re
+import zlib
+from typing import FrozenSet, List, Sequence
+
+import numpy as np
+
+_NON_WORD_PATTERN = re.compile(r"\W+")
+_WORD_PATTERN = re.compile(r"\w+")
+# Words that don't change what a card or prompt is about.
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is its of on or our that the "
+    "their these this those to with your".split()
+)
+
+
+def _fold_plural(word: str) -> str:
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def content_words(text: str) -> FrozenSet[str]:
+    """
+    The distinct words of `text` other than stopwords, lowercased and with
+    plural "s" endings dropped. Texts with equal content words differ only
+    in case, punctuation, word order, number and filler words.
+    """
+    return frozenset(
+        _fold_plural(word)
+        for word in _WORD_PATTERN.findall(text.lower())
+        if word not in _STOPWORDS
+    )
+
+
+class HashedNgramVectorizer:
+    """
+    Embeds short texts as L2-normalized vectors of hashed character n-grams
+    and words, so cosine similarity is a single matrix product. Needs no
+    model or vocabulary, and hashing with CRC32 keeps vectors stable across
+    processes.
+    """
+
+    def __init__(self, ngram_size: int = 3, dimensions: int = 4096):
+        if dimensions & (dimensions - 1):
+            raise ValueError("dimensions must be a power of two.")
+        self.ngram_size = ngram_size
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> List[str]:
+        normalized = _NON_WORD_PATTERN.sub(" ", text.lower()).strip()
+        padded = f" {normalized} "
+        ngrams = [
+            padded[index : index + self.ngram_size]
+            for index in range(len(padded) - self.ngram_size + 1)
+        ]
+        return ngrams + [f"w:{word}" for word in normalized.split()]
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """Returns one unit-length row per text (all zeros for empty texts)."""
+        rows: List[int] = []
+        columns: List[int] = []
+        mask = self.dimensions - 1
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                rows.append(row)
+                columns.append(zlib.crc32(feature.encode("utf-8")) & mask)
+
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(
+            matrix,
+            (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)),
+            1.0,
+        )
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def cosine_similarities(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Pairwise cosine similarity of two sets of normalized row vectors."""
+    return left @ right.T
@@ -38,6 +38,49 @@ class AgentResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+class DeepSearchRequest(AgentRequest):
+    """Request to research a prompt with the web-searching agent."""
+
+    deadline_seconds: Optional[float] = Field(
+        None,
+        gt=0,
+        description=(
+            "Time after which the agent stops and answers from the steps it has "
+            "taken so far. Defaults to DEEP_SEARCH_DEADLINE_SECONDS."
+        ),
+    )
+    job_id: Optional[str] = Field(
+        None,
+        min_length=1,
+        max_length=100,
+        description=(
+            "Checkpoints the run under this id after every agent step. A request "
+            "with the id and prompt of an unfinished run resumes it from its last "
+            "checkpoint; with another prompt, the run starts from scratch."
+        ),
+    )
+    session_id: Optional[str] = Field(
+        None,
+        max_length=100,
+        description=(
+            "Identifies the user's session. Answers are stored in the session's "
+            "knowledge base and earlier answers of the session to related "
+            "questions are given to the agent; without it, none are."
+        ),
+    )
+
+
+class DeepSearchJobResponse(BaseModel):
+    """State of a background deep search, with its result once it has ended."""
+
+    job_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    created_at: float
+    completed_at: Optional[float] = None
+    result: Optional[AgentResponse] = None
+    error: Optional[str] = None
+
+
 class TaskType(str, Enum):
     """The types of tasks our agent can create. Start with one, add more later."""
 
@@ -63,6 +106,37 @@ class NewCardData(BaseModel):
         default_factory=list,
         description="List of card_ids this card depends on.",
     )
+    parent_card_id: Optional[str] = Field(
+        None,
+        description="For sub-cards created while a card runs, the card it expanded from.",
+    )
+
+
+class NewCardRequest(AgentRequest):
+    """Request to plan a board of cards from a prompt."""
+
+    generation_mode: Optional[Literal["text", "tool"]] = Field(
+        None,
+        description=(
+            "`text` parses the cards out of the model's text; `tool` has the model "
+            "return them as structured tool input. Defaults to NEW_CARD_GENERATION_MODE."
+        ),
+    )
+    speculative_research: Optional[bool] = Field(
+        None,
+        description=(
+            "Start the deep search of root research cards right away. "
+            "Defaults to NEW_CARD_SPECULATIVE_RESEARCH."
+        ),
+    )
+    session_id: Optional[str] = Field(
+        None,
+        max_length=100,
+        description=(
+            "Identifies the user's session. Cards equivalent to ones of the "
+            "session's recent boards are reported in the deduplication metadata."
+        ),
+    )
 
 
 class NewCardAgentResponse(BaseModel):
@@ -72,6 +146,66 @@ class NewCardAgentResponse(BaseModel):
     agent_id: str
     execution_time: float
     metadata: Dict[str, Any]
+    execution_levels: list[list[str]] = Field(
+        default_factory=list,
+        description="card_ids grouped by dependency level; cards in one level can run in parallel.",
+    )
+    critical_path: list[str] = Field(
+        default_factory=list,
+        description="The longest chain of dependent card_ids, by estimated duration.",
+    )
+    research_jobs: Dict[str, str] = Field(
+        default_factory=dict,
+        description=(
+            "card_id -> id of the deep search already started for it. Claim it via "
+            "/research-jobs/{job_id} or by sending the card's prompt, with no "
+            "other field, to /deep-search."
+        ),
+    )
+
+
+class ReplanCardsRequest(BaseModel):
+    """An existing board and one card of it that the user edited."""
+
+    cards: list[NewCardData] = Field(..., min_length=1)
+    edited_card: NewCardData = Field(
+        ...,
+        description="The new version of one card of `cards`, with the same card_id.",
+    )
+
+
+class BatchNewCardRequest(BaseModel):
+    """Plans boards for many prompts in one request."""
+
+    requests: list[AgentRequest] = Field(..., min_length=1, max_length=100)
+    max_concurrency: int = Field(
+        4, ge=1, le=16, description="How many prompts are planned at once."
+    )
+    mode: Literal["sync", "async"] = Field(
+        "sync",
+        description="`async` submits a message batch and returns a batch_id to poll.",
+    )
+
+
+class BatchNewCardItem(BaseModel):
+    """The outcome of planning one prompt of a batch."""
+
+    index: int
+    status: Literal["succeeded", "errored"]
+    response: Optional[NewCardAgentResponse] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+
+class BatchNewCardResponse(BaseModel):
+    """Per-item results of a batch, or the handle of a pending async batch."""
+
+    batch_id: Optional[str] = None
+    mode: Literal["sync", "async"]
+    status: Literal["in_progress", "ended"]
+    results: list[BatchNewCardItem] = Field(default_factory=list)
+    execution_time: float
+    metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
 class ImageGenerationRequest(BaseModel):
@@ -93,3 +227,69 @@ class ImageGenerationResponse(BaseModel):
         ..., description="The generated image, encoded as a Base64 string."
     )
     model_id: str = Field(..., description="The model used for generation.")
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class PhoneContact(BaseModel):
+    """Who to call when a board contains phone tasks."""
+
+    target_number: str = Field(
+        ..., description="Phone number of the recipient (E.164 format)."
+    )
+    name: str = Field(..., description="Name of the person being called.")
+
+
+class ExpansionBudget(BaseModel):
+    """Limits for research cards that expand into sub-cards while they run."""
+
+    max_children: int = Field(4, ge=2, le=10, description="Sub-cards per card.")
+    max_depth: int = Field(1, ge=1, le=3, description="Levels of expansion.")
+    max_concurrency: int = Field(
+        3, ge=1, le=10, description="Sub-cards of one card running at once."
+    )
+    token_budget: int = Field(
+        40_000, ge=1_000, description="Approximate tokens for a card and its sub-cards."
+    )
+    time_budget_seconds: float = Field(
+        180.0, gt=0, description="Wall-clock limit for a card and its sub-cards."
+    )
+
+
+class BoardExecutionRequest(BaseModel):
+    """A board of cards with dependencies to execute on the server."""
+
+    cards: list[NewCardData]
+    phone_contact: Optional[PhoneContact] = None
+    expansion: Optional[ExpansionBudget] = Field(
+        None,
+        description="Let research cards split into concurrent sub-cards within this budget.",
+    )
+
+
+class CardExecutionResult(BaseModel):
+    """The outcome of executing a single card."""
+
+    card_id: str
+    task_type: TaskType
+    status: Literal["done", "failed", "skipped"]
+    output: Optional[str] = None
+    image_base64: Optional[str] = None
+    error: Optional[str] = None
+    started_at: Optional[float] = Field(
+        None, description="Seconds after the start of the board execution."
+    )
+    execution_time: float = 0.0
+    metadata: Optional[Dict[str, Any]] = None
+    parent_card_id: Optional[str] = None
+    children: list["CardExecutionResult"] = Field(
+        default_factory=list,
+        description="Results of the sub-cards this card expanded into.",
+    )
+
+
+class BoardExecutionResponse(BaseModel):
+    """Results of a board execution, in completion order."""
+
+    results: list[CardExecutionResult]
+    execution_time: float
+    metadata: Dict[str, Any]
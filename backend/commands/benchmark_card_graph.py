@@ -0,0 +1,61 @@
+import argparse
+import random
+import time
+
+from app.services.agent.card_graph import CardGraph
+from app.services.github.schema import NewCardData, TaskType
+
+
+def generate_cards(card_count, max_dependencies=3, seed=0):
+    """
+    Generates a random acyclic board: every card depends only on cards
+    created before it, so the graph is valid by construction.
+    """
+    rng = random.Random(seed)
+    task_types = list(TaskType)
+    cards = []
+    for index in range(card_count):
+        dependency_count = min(index, rng.randint(0, max_dependencies))
+        dependencies = [
+            f"task-{dep}" for dep in rng.sample(range(index), dependency_count)
+        ]
+        cards.append(
+            NewCardData(
+                card_id=f"task-{index}",
+                title=f"Task {index}",
+                description="Generated benchmark card.",
+                task_type=rng.choice(task_types),
+                dependencies=dependencies,
+            )
+        )
+    return cards
+
+
+def benchmark(card_count, repeats=3):
+    cards = generate_cards(card_count)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        graph = CardGraph(cards)
+        graph.critical_path()
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    print(
+        f"{card_count:>7} cards: {best * 1000:8.2f} ms "
+        f"({len(graph.levels)} levels, {best / card_count * 1e6:.2f} us/card)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark dependency-graph validation, levels and critical path."
+    )
+    parser.add_argument(
+        "--cards", type=int, nargs="+", default=[10_000, 20_000, 50_000, 100_000]
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    for card_count in args.cards:
+        benchmark(card_count, args.repeats)
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.agent.agent_pool import AgentPool, reset_agent_state
+
+
+class FakeMemory:
+    def __init__(self):
+        self.steps = []
+
+    def reset(self):
+        self.steps = []
+
+
+class FakeAgent:
+    def __init__(self):
+        self.memory = FakeMemory()
+        self.monitor = FakeMemory()
+        self.python_executor = type("Executor", (), {})()
+        self.python_executor.state = {"__name__": "__main__"}
+        self.interrupt_switch = False
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def run(self, prompt):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.memory.steps.append(prompt)
+        self.python_executor.state["result"] = prompt
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline and not self.interrupt_switch:
+            time.sleep(0.005)
+        with self._lock:
+            self.running -= 1
+        if self.interrupt_switch:
+            raise RuntimeError("Agent interrupted.")
+        return f"answer to {prompt}"
+
+    def interrupt(self):
+        self.interrupt_switch = True
+
+
+def make_pool(size=2, **kwargs):
+    agents = []
+
+    def factory():
+        agents.append(FakeAgent())
+        return agents[-1]
+
+    return AgentPool(factory, size, **kwargs), agents
+
+
+async def test_concurrent_runs_never_share_an_agent():
+    pool, agents = make_pool(size=2)
+
+    results = await asyncio.gather(
+        *(pool.run(lambda agent, i=i: agent.run(f"q{i}")) for i in range(5))
+    )
+
+    assert sorted(answer for answer, _ in results) == [
+        f"answer to q{i}" for i in range(5)
+    ]
+    assert len(agents) == 2
+    assert all(agent.max_running == 1 for agent in agents)
+    stats = pool.stats()
+    assert stats["checkouts"] == 5
+    assert stats["available"] == 2
+    assert stats["max_wait_seconds"] > 0
+    assert max(waited for _, waited in results) > 0
+
+
+async def test_agent_state_is_reset_on_check_in_even_after_errors():
+    pool, (agent,) = make_pool(size=1)
+
+    with pytest.raises(ValueError):
+        async with pool.checkout() as checked_out:
+            checked_out.run("secret")
+            raise ValueError("boom")
+
+    assert agent.memory.steps == []
+    assert agent.python_executor.state == {"__name__": "__main__"}
+    assert pool.stats()["available"] == 1
+
+
+def test_reset_agent_state_clears_interrupt():
+    agent = FakeAgent()
+    agent.interrupt()
+
+    reset_agent_state(agent)
+
+    assert agent.interrupt_switch is False
+
+
+async def test_excess_waiters_are_rejected():
+    pool, _ = make_pool(size=1, max_waiting=1)
+
+    first = asyncio.create_task(pool.run(lambda agent: agent.run("first")))
+    second = asyncio.create_task(pool.run(lambda agent: agent.run("second")))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(RuntimeError, match="already waiting"):
+        await pool.run(lambda agent: agent.run("third"))
+
+    await asyncio.gather(first, second)
+    assert pool.stats()["rejected"] == 1
+
+
+async def test_checkout_times_out():
+    pool, _ = make_pool(size=1, checkout_timeout=0.01)
+
+    async with pool.checkout():
+        with pytest.raises(RuntimeError, match="Timed out"):
+            async with pool.checkout():
+                pass
+
+
+async def test_cancelled_run_interrupts_agent_before_check_in():
+    pool, (agent,) = make_pool(size=1)
+
+    task = asyncio.create_task(pool.run(lambda a: a.run("slow")))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert agent.running == 0
+    assert agent.interrupt_switch is False
+    assert pool.stats()["available"] == 1
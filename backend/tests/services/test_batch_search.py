@@ -0,0 +1,89 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.agent.batch_search import BatchSearchTool, parse_results
+
+RESULTS = {
+    "ev sales": [
+        ("EV Sales", "https://a.com", "Sales grew."),
+        ("Stats", "https://b.com", "Numbers."),
+    ],
+    "ev charging": [
+        ("Stats", "https://b.com", "Numbers."),
+        ("Chargers", "https://c.com", "More chargers."),
+    ],
+}
+
+
+def format_results(results):
+    return "## Search Results\n\n" + "\n\n".join(
+        f"[{title}]({href})\n{body}" for title, href, body in results
+    )
+
+
+class SlowSearchTool:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def forward(self, query):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        if query not in RESULTS:
+            raise Exception("No results found!")
+        return format_results(RESULTS[query])
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+def test_parse_results_splits_formatted_output():
+    parsed = parse_results(format_results(RESULTS["ev sales"]))
+
+    assert parsed == [
+        ("https://a.com", "[EV Sales](https://a.com)\nSales grew."),
+        ("https://b.com", "[Stats](https://b.com)\nNumbers."),
+    ]
+
+
+def test_queries_run_concurrently_and_links_are_listed_once(executor):
+    search = SlowSearchTool()
+    tool = BatchSearchTool(search, executor)
+
+    start = time.monotonic()
+    output = tool.forward(["ev sales", "ev charging"])
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.09
+    assert search.max_running == 2
+    assert output.count("https://b.com") == 1
+    assert "### ev charging\n[Chargers](https://c.com)" in output
+
+
+def test_concurrency_is_capped_by_the_executor(executor):
+    search = SlowSearchTool(delay=0.01)
+
+    BatchSearchTool(search, executor).forward([f"q{i}" for i in range(6)])
+
+    assert search.max_running == 2
+
+
+def test_failed_and_excess_queries_are_reported(executor):
+    tool = BatchSearchTool(SlowSearchTool(delay=0), executor, max_queries=2)
+
+    output = tool.forward(["ev sales", "nothing", "ev charging"])
+
+    assert "### nothing\nSearch failed: No results found!" in output
+    assert "Skipped 1 queries beyond the limit of 2: ev charging" in output
@@ -0,0 +1,90 @@
+import asyncio
+
+from app.services.agent.board_executor import BoardExecutor
+from app.services.github.schema import (
+    BoardExecutionRequest,
+    NewCardData,
+    TaskType,
+)
+
+
+def make_card(card_id, task_type="research_task", dependencies=()):
+    return NewCardData(
+        card_id=card_id,
+        title=f"Card {card_id}",
+        description=f"Description of {card_id}",
+        task_type=task_type,
+        dependencies=list(dependencies),
+    )
+
+
+def make_runner(log, delay=0.05, fail=()):
+    async def runner(card, upstream, request):
+        log.append(("start", card.card_id, [result.card_id for result in upstream]))
+        await asyncio.sleep(delay)
+        if card.card_id in fail:
+            raise RuntimeError("boom")
+        return {"output": f"result of {card.card_id}"}
+
+    return runner
+
+
+async def test_independent_cards_run_concurrently_and_pass_results():
+    log = []
+    runner = make_runner(log)
+    executor = BoardExecutor(
+        runners={task_type: runner for task_type in TaskType},
+        concurrency={TaskType.RESEARCH: 5},
+    )
+    request = BoardExecutionRequest(
+        cards=[
+            make_card("a"),
+            make_card("b"),
+            make_card("c"),
+            make_card("d", "phone_task", ["a", "b", "c"]),
+        ]
+    )
+
+    response = await executor.execute(request)
+
+    assert response.metadata["max_parallel_cards"] == 3
+    assert response.execution_time < 0.15
+    assert ("start", "d", ["a", "b", "c"]) in log
+    assert [result.card_id for result in response.results][-1] == "d"
+    assert all(result.status == "done" for result in response.results)
+
+
+async def test_concurrency_caps_are_per_task_type():
+    log = []
+    runner = make_runner(log)
+    executor = BoardExecutor(
+        runners={task_type: runner for task_type in TaskType},
+        concurrency={TaskType.IMAGE_GENERATION: 1},
+    )
+    request = BoardExecutionRequest(
+        cards=[make_card(f"img-{index}", "image_generation_task") for index in range(3)]
+    )
+
+    response = await executor.execute(request)
+
+    assert response.metadata["max_parallel_cards"] == 1
+
+
+async def test_failed_card_skips_its_dependents_only():
+    log = []
+    runner = make_runner(log, fail={"a"})
+    executor = BoardExecutor(runners={task_type: runner for task_type in TaskType})
+    request = BoardExecutionRequest(
+        cards=[
+            make_card("a"),
+            make_card("b"),
+            make_card("c", "image_generation_task", ["a"]),
+            make_card("d", "image_generation_task", ["b"]),
+        ]
+    )
+
+    response = await executor.execute(request)
+    statuses = {result.card_id: result.status for result in response.results}
+
+    assert statuses == {"a": "failed", "b": "done", "c": "skipped", "d": "done"}
+    assert response.metadata["skipped"] == 1
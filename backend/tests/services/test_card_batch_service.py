@@ -0,0 +1,148 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.agent import card_batch_service, new_card_service
+from app.services.agent.card_batch_service import LocalMessageBatches
+from app.services.github.schema import AgentRequest, NewCardAgentResponse
+
+CARDS = {
+    "cards": [
+        {
+            "card_id": "task-1",
+            "title": "Research",
+            "description": "Research the market.",
+            "task_type": "research_task",
+            "dependencies": [],
+        }
+    ]
+}
+
+
+def make_message(text):
+    return SimpleNamespace(
+        model="fake-model",
+        content=[SimpleNamespace(text=text)],
+        usage=SimpleNamespace(input_tokens=10, output_tokens=5),
+    )
+
+
+@pytest.fixture
+def local_backend(mocker):
+    sent = []
+
+    async def create_message(**params):
+        sent.append(params)
+        await asyncio.sleep(0.01)
+        prompt = params["messages"][0]["content"]
+        if "broken" in prompt:
+            return make_message("no json here")
+        return make_message(json.dumps(CARDS))
+
+    backend = LocalMessageBatches(create_message)
+    mocker.patch.object(card_batch_service, "batch_backend", backend)
+    card_batch_service.submitted_batches.clear()
+    return sent
+
+
+async def test_async_batch_returns_per_item_results(local_backend):
+    submitted = await card_batch_service.submit_batch(
+        [AgentRequest(prompt="Plan a launch."), AgentRequest(prompt="broken prompt")]
+    )
+    assert submitted.status == "in_progress"
+
+    while (
+        batch := await card_batch_service.get_batch(submitted.batch_id)
+    ).status != "ended":
+        await asyncio.sleep(0.01)
+
+    assert [item.status for item in batch.results] == ["succeeded", "errored"]
+    assert batch.results[0].response.card_data[0].card_id == "task-1"
+    assert batch.results[1].status_code == 400
+    assert local_backend[0]["system"] == new_card_service.message_params("x")["system"]
+
+
+async def test_ended_batch_can_be_polled_again(local_backend):
+    submitted = await card_batch_service.submit_batch(
+        [AgentRequest(prompt="Plan a launch.")]
+    )
+    while (
+        first := await card_batch_service.get_batch(submitted.batch_id)
+    ).status != "ended":
+        await asyncio.sleep(0.01)
+
+    second = await card_batch_service.get_batch(submitted.batch_id)
+
+    assert second.status == "ended"
+    assert second.results == first.results
+
+
+async def test_unknown_batch_returns_none(local_backend):
+    assert await card_batch_service.get_batch("missing") is None
+
+
+async def test_sync_batch_bounds_concurrency_and_isolates_errors(mocker):
+    running = 0
+    peak = 0
+
+    async def fake_create(request):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if "fail" in request.prompt:
+            raise RuntimeError("AI service is currently unavailable")
+        return NewCardAgentResponse(
+            card_data=[], agent_id="fake", execution_time=0.0, metadata={}
+        )
+
+    mocker.patch.object(
+        new_card_service, "create_new_card_from_prompt", side_effect=fake_create
+    )
+
+    prompts = ["a", "b", "fail", "c", "d", " "]
+    batch = await card_batch_service.plan_batch(
+        [AgentRequest(prompt=prompt) for prompt in prompts], max_concurrency=2
+    )
+
+    assert peak == 2
+    assert [item.index for item in batch.results] == list(range(len(prompts)))
+    assert [item.status_code for item in batch.results] == [
+        None,
+        None,
+        503,
+        None,
+        None,
+        400,
+    ]
+    assert batch.metadata == {"request_count": 6, "succeeded": 4, "errored": 2}
+
+
+async def test_local_batches_that_are_never_collected_expire():
+    async def create_message(**params):
+        return make_message(json.dumps(CARDS))
+
+    backend = LocalMessageBatches(create_message, retention_seconds=-1)
+    batch_id = await backend.create([{"custom_id": "item-0", "params": {}}])
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(KeyError):
+        await backend.status(batch_id)
+    assert len(backend._batches) == 0
+
+
+async def test_local_batches_beyond_the_limit_are_dropped():
+    async def create_message(**params):
+        return make_message(json.dumps(CARDS))
+
+    backend = LocalMessageBatches(create_message, max_batches=1)
+    first = await backend.create([{"custom_id": "item-0", "params": {}}])
+    second = await backend.create([{"custom_id": "item-0", "params": {}}])
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(KeyError):
+        await backend.status(first)
+    assert [entry["custom_id"] for entry in await backend.results(second)] == ["item-0"]
@@ -0,0 +1,175 @@
+import numpy as np
+
+import pytest
+
+from app.services.agent.card_dedup import CardDeduplicator, RecentCards
+from app.services.agent.text_vectors import HashedNgramVectorizer, cosine_similarities
+from app.services.github.schema import NewCardData
+
+
+def card(card_id, title, description, task_type="research_task", dependencies=()):
+    return NewCardData(
+        card_id=card_id,
+        title=title,
+        description=description,
+        task_type=task_type,
+        dependencies=list(dependencies),
+    )
+
+
+EV_RESEARCH = (
+    "Research German EV Market",
+    "Analyze the German market for electric vehicles.",
+)
+EV_RESEARCH_REWORDED = (
+    "Research the German EV market",
+    "Analyze the German market for electric vehicles",
+)
+
+
+def test_vectors_are_normalized_and_similarity_is_textual():
+    vectors = HashedNgramVectorizer().transform(
+        [
+            " ".join(EV_RESEARCH),
+            " ".join(EV_RESEARCH_REWORDED),
+            "Call the supplier.",
+            "",
+        ]
+    )
+    similarities = cosine_similarities(vectors, vectors)
+
+    assert np.allclose(np.linalg.norm(vectors[:3], axis=1), 1.0)
+    assert similarities[0, 1] > 0.95
+    assert similarities[0, 2] < 0.3
+    assert not vectors[3].any()
+
+
+def test_equivalent_cards_are_merged_and_dependents_rewired():
+    cards = [
+        card("task-1", *EV_RESEARCH),
+        card("task-2", *EV_RESEARCH_REWORDED, dependencies=[]),
+        card(
+            "task-3", "Call Supervisor", "Report the results.", "phone_task", ["task-2"]
+        ),
+        card(
+            "task-4", "Call Supervisor", "Report the results.", "phone_task", ["task-1"]
+        ),
+    ]
+
+    deduplicated, summary = CardDeduplicator().deduplicate(cards)
+
+    assert summary["merged"] == {"task-2": "task-1"}
+    assert [c.card_id for c in deduplicated] == ["task-1", "task-3", "task-4"]
+    assert deduplicated[1].dependencies == ["task-1"]
+
+
+def test_merges_that_would_create_a_cycle_are_skipped():
+    cards = [
+        card("task-1", *EV_RESEARCH),
+        card(
+            "task-2", "Call Expert", "Discuss the findings.", "phone_task", ["task-1"]
+        ),
+        card("task-3", *EV_RESEARCH_REWORDED, dependencies=["task-2"]),
+    ]
+
+    deduplicated, summary = CardDeduplicator().deduplicate(cards)
+
+    assert summary["merged"] == {}
+    assert deduplicated == cards
+
+
+def test_reworded_cards_are_merged():
+    cards = [
+        card("task-1", *EV_RESEARCH),
+        card(
+            "task-2",
+            "Research the German EV market",
+            "Study the German electric vehicle market.",
+        ),
+        card(
+            "task-3",
+            "Research Competitors",
+            "Identify the main competitors of the product.",
+        ),
+        card(
+            "task-4", "Competitor Research", "Find the main competitors of our product."
+        ),
+    ]
+
+    _, summary = CardDeduplicator().deduplicate(cards)
+
+    assert summary["merged"] == {"task-2": "task-1", "task-4": "task-3"}
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (
+            ("Research Italian Market", "Analyze the solar market in Italy."),
+            ("Research Spanish Market", "Analyze the solar market in Spain."),
+        ),
+        (
+            ("Research Greece Tourism", "Analyze tourism trends in Greece."),
+            ("Research Portugal Tourism", "Analyze tourism trends in Portugal."),
+        ),
+        (
+            ("Research EV Sales 2023", "Collect the EV sales figures for 2023."),
+            ("Research EV Sales 2024", "Collect the EV sales figures for 2024."),
+        ),
+    ],
+)
+def test_cards_naming_different_things_are_kept(first, second):
+    cards = [card("task-1", *first), card("task-2", *second)]
+
+    deduplicated, summary = CardDeduplicator(threshold=0.5).deduplicate(cards)
+
+    assert summary["merged"] == {}
+    assert deduplicated == cards
+
+
+def test_cards_differing_in_a_key_word_are_kept():
+    cards = [
+        card(
+            "task-1", "Design Red Poster", "Create a red poster for the launch event."
+        ),
+        card(
+            "task-2", "Design Blue Poster", "Create a blue poster for the launch event."
+        ),
+    ]
+
+    deduplicated, summary = CardDeduplicator().deduplicate(cards)
+
+    assert summary["merged"] == {}
+    assert deduplicated == cards
+
+
+def test_equivalent_cards_of_the_same_session_are_reported_not_rewritten():
+    deduplicator = CardDeduplicator()
+    deduplicator.deduplicate([card("task-1", *EV_RESEARCH)], session_id="alice")
+    board = [
+        card("task-1", *EV_RESEARCH_REWORDED),
+        card("task-2", *EV_RESEARCH_REWORDED, "image_generation_task"),
+    ]
+
+    deduplicated, summary = deduplicator.deduplicate(board, session_id="alice")
+    _, other_session = deduplicator.deduplicate(board, session_id="bob")
+    _, no_session = deduplicator.deduplicate(board)
+
+    assert summary["cross_board"] == {"task-1": EV_RESEARCH[0]}
+    assert deduplicated == board
+    assert other_session["cross_board"] == {}
+    assert no_session["cross_board"] == {}
+
+
+def test_recent_cards_expire_and_are_bounded():
+    vectorizer = HashedNgramVectorizer()
+    recent = RecentCards(max_cards=2, ttl_seconds=60)
+    cards = [card(f"task-{i}", f"Title {i}", "Description.") for i in range(3)]
+    recent.add(cards, vectorizer.transform([c.title for c in cards]))
+
+    kept, vectors = recent.snapshot()
+    assert [c.card_id for c in kept] == ["task-1", "task-2"]
+    assert vectors.shape[0] == 2
+
+    recent.ttl_seconds = -1
+    assert recent.snapshot() == ([], None)
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.services.agent.card_expansion import BudgetTracker, run_expanded
+from app.services.github.schema import ExpansionBudget, NewCardData
+
+CARD = NewCardData(
+    card_id="task-1",
+    title="Research EV Market",
+    description="Analyze the European EV market.",
+    task_type="research_task",
+)
+
+
+def make_decompose(children_per_card=3):
+    calls = []
+
+    async def decompose(card, prompt, max_children):
+        calls.append(card.card_id)
+        count = min(children_per_card, max_children)
+        children = [
+            NewCardData(
+                card_id=f"{card.card_id}.{index}",
+                title=f"Subtopic {index}",
+                description="",
+                task_type="research_task",
+                parent_card_id=card.card_id,
+            )
+            for index in range(1, count + 1)
+        ]
+        return children, 100
+
+    return decompose, calls
+
+
+def make_leaf(delay=0.02, fail=()):
+    state = {"running": 0, "peak": 0, "prompts": []}
+
+    async def run_leaf(prompt):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        state["prompts"].append(prompt)
+        try:
+            await asyncio.sleep(delay)
+            if any(marker in prompt for marker in fail):
+                raise RuntimeError("search failed")
+            return {"output": f"findings for {prompt.splitlines()[0]}"}
+        finally:
+            state["running"] -= 1
+
+    return run_leaf, state
+
+
+async def test_card_expands_into_concurrent_children_and_aggregates():
+    decompose, _ = make_decompose()
+    run_leaf, state = make_leaf(fail=("Subtopic 2",))
+    tracker = BudgetTracker.start(ExpansionBudget(max_concurrency=2))
+
+    fields = await run_expanded(CARD, "prompt", tracker, run_leaf, decompose)
+
+    assert [child.status for child in fields["children"]] == ["done", "failed", "done"]
+    assert all(child.parent_card_id == "task-1" for child in fields["children"])
+    assert "### Subtopic 1" in fields["output"] and "Subtopic 2" not in fields["output"]
+    assert fields["metadata"]["failed"] == 1
+    assert fields["metadata"]["tokens_used"] >= 100
+    assert state["peak"] == 2
+    assert "broader task: Research EV Market" in state["prompts"][0]
+
+
+async def test_expansion_respects_max_depth():
+    decompose, calls = make_decompose(children_per_card=2)
+    run_leaf, state = make_leaf()
+    tracker = BudgetTracker.start(ExpansionBudget(max_depth=2, max_children=2))
+
+    fields = await run_expanded(CARD, "prompt", tracker, run_leaf, decompose)
+
+    assert calls == ["task-1", "task-1.1", "task-1.2"]
+    assert len(state["prompts"]) == 4
+    assert [len(child.children) for child in fields["children"]] == [2, 2]
+
+
+async def test_sub_cards_get_the_dependency_results_and_the_parent_clock():
+    decompose, _ = make_decompose(children_per_card=2)
+    run_leaf, state = make_leaf()
+    tracker = BudgetTracker.start(ExpansionBudget(max_depth=2, max_children=2))
+    context = "\n\nResults of the tasks this one depends on:\n[task-0] EV sales"
+
+    fields = await run_expanded(
+        CARD, "prompt" + context, tracker, run_leaf, decompose, context
+    )
+
+    assert len(state["prompts"]) == 4
+    assert all(prompt.endswith(context) for prompt in state["prompts"])
+    for child in fields["children"]:
+        for grandchild in child.children:
+            assert grandchild.started_at >= child.started_at
+
+
+async def test_narrow_card_runs_as_a_single_leaf():
+    decompose, _ = make_decompose(children_per_card=1)
+    run_leaf, state = make_leaf()
+
+    fields = await run_expanded(
+        CARD, "prompt", BudgetTracker.start(ExpansionBudget()), run_leaf, decompose
+    )
+
+    assert fields == {"output": "findings for prompt"}
+    assert state["prompts"] == ["prompt"]
+
+
+async def test_children_are_skipped_once_tokens_run_out():
+    decompose, _ = make_decompose()
+    run_leaf, state = make_leaf()
+    budget = ExpansionBudget(token_budget=1_000)
+    tracker = BudgetTracker.start(budget)
+    tracker.charge(850)
+
+    fields = await run_expanded(CARD, "prompt", tracker, run_leaf, decompose)
+
+    assert [child.status for child in fields["children"]] == ["done"] * 3
+    tracker = BudgetTracker.start(budget)
+    tracker.charge(950)
+    with pytest.raises(RuntimeError):
+        # The split itself uses the last tokens, so every child is skipped.
+        await run_expanded(CARD, "prompt", tracker, run_leaf, decompose)
+
+
+async def test_time_budget_fails_slow_leaves():
+    decompose, _ = make_decompose(children_per_card=1)
+    run_leaf, _ = make_leaf(delay=1)
+    tracker = BudgetTracker.start(ExpansionBudget(time_budget_seconds=0.01))
+
+    with pytest.raises(RuntimeError, match="time budget"):
+        await run_expanded(CARD, "prompt", tracker, run_leaf, decompose)
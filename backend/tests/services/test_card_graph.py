@@ -0,0 +1,70 @@
+import pytest
+
+from app.services.agent.card_graph import CardGraph
+from app.services.github.schema import NewCardData
+
+
+def make_card(card_id, task_type="research_task", dependencies=()):
+    return NewCardData(
+        card_id=card_id,
+        title=f"Card {card_id}",
+        description=f"Description of {card_id}",
+        task_type=task_type,
+        dependencies=list(dependencies),
+    )
+
+
+def test_levels_group_independent_cards():
+    graph = CardGraph(
+        [
+            make_card("a"),
+            make_card("b"),
+            make_card("c", "image_generation_task", ["a"]),
+            make_card("d", "phone_task", ["a", "b"]),
+            make_card("e", "phone_task", ["c", "d"]),
+        ]
+    )
+
+    assert graph.levels == [["a", "b"], ["c", "d"], ["e"]]
+    assert graph.descendants(["b"]) == ["d", "e"]
+
+
+def test_critical_path_follows_the_longest_weighted_chain():
+    graph = CardGraph(
+        [
+            make_card("research"),
+            make_card("image", "image_generation_task", ["research"]),
+            make_card("call", "phone_task", ["research"]),
+        ]
+    )
+
+    path, seconds = graph.critical_path()
+
+    assert path == ["research", "image"]
+    assert seconds == 75.0
+
+
+def test_duplicate_card_ids_are_rejected():
+    with pytest.raises(ValueError, match="more than one card"):
+        CardGraph([make_card("a"), make_card("a")])
+
+
+def test_unknown_dependencies_are_rejected():
+    with pytest.raises(ValueError, match="non-existent card_id 'x'"):
+        CardGraph([make_card("a", dependencies=["x"])])
+
+
+def test_cycles_are_rejected_with_the_cycle_members():
+    with pytest.raises(ValueError, match="cycle") as error:
+        CardGraph(
+            [
+                make_card("root"),
+                make_card("a", dependencies=["root", "c"]),
+                make_card("b", dependencies=["a"]),
+                make_card("c", dependencies=["b"]),
+            ]
+        )
+
+    assert "root" not in str(error.value)
+    for card_id in ("a", "b", "c"):
+        assert card_id in str(error.value)
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from app.services.agent.card_json import (
+    IncrementalCardParser,
+    extract_cards,
+    repair_json,
+)
+
+
+RESPONSE_TEXT = (
+    "Here is the plan:\n```json\n"
+    + json.dumps(
+        {
+            "cards": [
+                {"card_id": "task-1", "title": 'Braces {in} a "string"'},
+                {"card_id": "task-2", "parameters": {"nested": [1, 2]}},
+            ]
+        }
+    )
+    + "\n```"
+)
+
+
+def test_cards_are_emitted_as_soon_as_they_close():
+    parser = IncrementalCardParser()
+    emitted = []
+    for index in range(0, len(RESPONSE_TEXT), 7):
+        emitted.extend(parser.feed(RESPONSE_TEXT[index : index + 7]))
+
+    assert [card["card_id"] for card in emitted] == ["task-1", "task-2"]
+    assert emitted[0]["title"] == 'Braces {in} a "string"'
+    assert emitted[1]["parameters"] == {"nested": [1, 2]}
+    assert parser.finished
+
+
+def test_first_card_is_available_before_the_array_closes():
+    parser = IncrementalCardParser()
+    cut = RESPONSE_TEXT.index("task-2")
+
+    assert [card["card_id"] for card in parser.feed(RESPONSE_TEXT[:cut])] == ["task-1"]
+    assert not parser.finished
+
+
+def test_malformed_objects_are_collected():
+    parser = IncrementalCardParser()
+    parser.feed('{"cards": [{"card_id": task-1}]}')
+
+    assert parser.malformed == ['{"card_id": task-1}']
+
+
+def test_trailing_commas_are_repaired():
+    parser = IncrementalCardParser()
+    cards = parser.feed('{"cards": [{"card_id": "task-1", "deps": ["a",],},]}')
+
+    assert cards == [{"card_id": "task-1", "deps": ["a"]}]
+    assert parser.repairs == ["card 1: removed trailing comma, removed trailing comma"]
+    assert not parser.malformed
+
+
+def test_truncated_values_are_closed_or_dropped():
+    assert repair_json('{"a": "text", "b": ["x", "y"') == (
+        {"a": "text", "b": ["x", "y"]},
+        ["closed truncated value"],
+    )
+    assert repair_json('{"a": "text", "b": ') == (
+        {"a": "text"},
+        ["dropped truncated member"],
+    )
+    assert repair_json('{"a": tru') is None
+
+
+def test_extract_cards_salvages_truncated_response():
+    text = "Sure! Here is the plan:\n" + RESPONSE_TEXT[: RESPONSE_TEXT.index("]}") + 1]
+
+    cards, repairs, malformed = extract_cards(text)
+
+    assert [card["card_id"] for card in cards] == ["task-1", "task-2"]
+    assert repairs == [
+        "closed unterminated 'cards' array",
+        "card 2: closed truncated value",
+    ]
+    assert malformed == []
+
+
+def test_extract_cards_requires_cards_array():
+    with pytest.raises(ValueError):
+        extract_cards('{"plan": []}')
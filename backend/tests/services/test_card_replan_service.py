@@ -0,0 +1,118 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.agent import card_replan_service, new_card_service
+from app.services.github.schema import NewCardData, ReplanCardsRequest
+
+
+def card(card_id, dependencies=(), task_type="research_task", title=None):
+    return NewCardData(
+        card_id=card_id,
+        title=title or f"Card {card_id}",
+        description=f"Description of {card_id}.",
+        task_type=task_type,
+        dependencies=list(dependencies),
+    )
+
+
+# a -> b -> c -> d, and x -> c; e is unrelated.
+BOARD = [
+    card("a"),
+    card("x"),
+    card("b", ["a"]),
+    card("c", ["b", "x"], task_type="phone_task"),
+    card("d", ["c"], task_type="image_generation_task"),
+    card("e"),
+]
+
+
+class FakeMessages:
+    def __init__(self, cards):
+        self.cards = cards
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(
+            model="fake-model",
+            content=[
+                SimpleNamespace(type="text", text=json.dumps({"cards": self.cards}))
+            ],
+            usage=SimpleNamespace(input_tokens=50, output_tokens=40),
+        )
+
+
+@pytest.fixture
+def fake_messages(mocker, monkeypatch):
+    monkeypatch.setenv("DEMO_MODE", "false")
+    messages = FakeMessages(
+        [
+            {
+                **card(
+                    "c", ["b", "x"], task_type="phone_task", title="New c"
+                ).model_dump()
+            },
+            {**card("f", ["c"]).model_dump()},
+        ]
+    )
+    mocker.patch.object(
+        new_card_service, "claude_client", SimpleNamespace(messages=messages)
+    )
+    return messages
+
+
+async def test_only_the_downstream_subgraph_is_regenerated(fake_messages):
+    edited = card("b", ["a"], title="Edited b")
+
+    response = await card_replan_service.replan_cards(
+        ReplanCardsRequest(cards=BOARD, edited_card=edited)
+    )
+
+    prompt = fake_messages.calls[0]["messages"][0]["content"]
+    assert '"card_id":"x"' in prompt and '"card_id":"d"' in prompt
+    assert '"card_id":"e"' not in prompt and '"card_id":"a"' not in prompt
+    assert response.metadata["replanned_card_ids"] == ["c", "d"]
+    assert response.metadata["context_card_ids"] == ["x"]
+
+    by_id = {card.card_id: card for card in response.card_data}
+    assert [card.card_id for card in response.card_data] == [
+        "a",
+        "x",
+        "b",
+        "c",
+        "e",
+        "f",
+    ]
+    assert by_id["b"].title == "Edited b"
+    assert by_id["c"].title == "New c"
+    assert by_id["a"] == BOARD[0] and by_id["e"] == BOARD[-1]
+
+
+async def test_leaf_edit_needs_no_model_call(fake_messages):
+    edited = card("e", title="Edited e")
+
+    response = await card_replan_service.replan_cards(
+        ReplanCardsRequest(cards=BOARD, edited_card=edited)
+    )
+
+    assert fake_messages.calls == []
+    assert response.card_data[-1].title == "Edited e"
+    assert response.metadata["replanned_card_ids"] == []
+
+
+async def test_replanned_cards_may_not_overwrite_upstream_cards(fake_messages):
+    fake_messages.cards = [card("a").model_dump()]
+
+    with pytest.raises(ValueError):
+        await card_replan_service.replan_cards(
+            ReplanCardsRequest(cards=BOARD, edited_card=card("b", ["a"]))
+        )
+
+
+async def test_unknown_edited_card_is_rejected(fake_messages):
+    with pytest.raises(ValueError):
+        await card_replan_service.replan_cards(
+            ReplanCardsRequest(cards=BOARD, edited_card=card("zzz"))
+        )
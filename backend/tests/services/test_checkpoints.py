@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+from smolagents.memory import ActionStep, FinalAnswerStep, PlanningStep, TaskStep
+from smolagents.models import ChatMessage, MessageRole
+from smolagents.monitoring import Timing
+
+from app.services.agent.checkpoints import CheckpointStore, restore
+
+
+def action(number, observations="found it", error=None):
+    return ActionStep(
+        step_number=number,
+        timing=Timing(start_time=float(number), end_time=number + 0.5),
+        model_output=f"Thought: step {number}",
+        code_action=f"web_search('q{number}')",
+        observations=observations,
+        error=error,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+
+
+def test_steps_are_restored_in_order(store):
+    plan = PlanningStep(
+        model_input_messages=[],
+        model_output_message=ChatMessage(role=MessageRole.ASSISTANT, content="plan"),
+        plan="1. search",
+        timing=Timing(start_time=0.0, end_time=0.1),
+    )
+    store.save_step("job-1", "EV market", "EV market", plan)
+    store.save_step("job-1", "EV market", "EV market", action(1))
+    store.save_step(
+        "job-1", "EV market", "EV market", action(2, error="ValueError: boom")
+    )
+    store.save_step(
+        "job-1", "EV market", "EV market", FinalAnswerStep(output="ignored")
+    )
+
+    checkpoint = store.load("job-1", "EV market")
+
+    assert checkpoint.task == "EV market"
+    assert checkpoint.action_steps == 2
+    restored_plan, first, second = checkpoint.steps
+    assert restored_plan.plan == "1. search"
+    assert (first.step_number, first.code_action, first.observations) == (
+        1,
+        "web_search('q1')",
+        "found it",
+    )
+    assert second.observations == "found it\nError:\nValueError: boom"
+    assert store.load("job-2", "EV market") is None
+    assert store.load("job-1", "Solar market") is None
+
+
+def test_restore_puts_task_and_steps_into_memory(store):
+    store.save_step("job-1", "EV market", "EV market", action(1))
+    agent = SimpleNamespace(memory=SimpleNamespace(steps=[]))
+
+    restore(agent, store.load("job-1", "EV market"))
+
+    task, step = agent.memory.steps
+    assert isinstance(task, TaskStep) and task.task == "EV market"
+    assert step.to_messages()[-1].content[0]["text"] == "Observation:\nfound it"
+
+
+def test_old_observations_are_compacted(tmp_path):
+    store = CheckpointStore(
+        str(tmp_path / "checkpoints.sqlite3"), keep_full_steps=1, compact_chars=10
+    )
+    long = "x" * 500
+    for number in range(1, 4):
+        store.save_step(
+            "job-1", "EV market", "EV market", action(number, observations=long)
+        )
+
+    observations = [
+        step.observations for step in store.load("job-1", "EV market").steps
+    ]
+
+    assert observations[:2] == ["x" * 10 + "\n[... compacted]"] * 2
+    assert observations[2] == long
+
+
+def test_deleted_and_expired_runs_are_gone(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"), ttl_seconds=-1)
+    store.save_step("job-1", "EV market", "EV market", action(1))
+
+    assert store.load("job-1", "EV market") is None
+    assert store.prune() == 1
+
+    store.ttl_seconds = 3600
+    store.save_step("job-2", "EV market", "EV market", action(1))
+    store.delete("job-2")
+    assert store.load("job-2", "EV market") is None
+
+
+def test_failed_checkpoint_writes_do_not_raise(store, mocker):
+    mocker.patch.object(store, "_connect", side_effect=RuntimeError("disk full"))
+
+    store.save_step("job-1", "EV market", "EV market", action(1))
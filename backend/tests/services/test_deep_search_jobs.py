@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from app.services.agent.deep_search_jobs import DeepSearchJobQueue
+from app.services.github.schema import AgentRequest, AgentResponse, DeepSearchRequest
+
+
+def make_queue(**kwargs):
+    prompts = []
+
+    async def run(request):
+        prompts.append(request.prompt)
+        await asyncio.sleep(0.02)
+        if "fail" in request.prompt:
+            raise RuntimeError("Agent execution failed")
+        return AgentResponse(
+            response=f"answer to {request.prompt}", agent_id="fake", execution_time=0.02
+        )
+
+    return DeepSearchJobQueue(run, **kwargs), prompts
+
+
+async def test_submit_returns_immediately_and_long_poll_gets_result():
+    queue, prompts = make_queue()
+
+    job = queue.submit(AgentRequest(prompt="Research EV market"))
+    assert job.response().status in ("queued", "running")
+
+    job = await queue.wait(job.job_id, timeout=1.0)
+    response = job.response()
+    assert response.status == "done"
+    assert response.result.response == "answer to Research EV market"
+    assert response.completed_at is not None
+    # The result stays available for later polls.
+    assert queue.get(job.job_id) is job
+    assert prompts == ["Research EV market"]
+
+
+async def test_same_prompt_joins_pending_job():
+    queue, prompts = make_queue()
+
+    first = queue.submit(AgentRequest(prompt="same"))
+    second = queue.submit(AgentRequest(prompt="same"))
+    await queue.wait(first.job_id, timeout=1.0)
+
+    assert first is second
+    assert prompts == ["same"]
+
+
+async def test_same_prompt_with_other_context_or_deadline_gets_its_own_job():
+    queue, prompts = make_queue()
+
+    first = queue.submit(DeepSearchRequest(prompt="same"))
+    with_context = queue.submit(DeepSearchRequest(prompt="same", context={"a": 1}))
+    with_deadline = queue.submit(DeepSearchRequest(prompt="same", deadline_seconds=5))
+    await queue.wait(with_deadline.job_id, timeout=1.0)
+
+    assert len({first.job_id, with_context.job_id, with_deadline.job_id}) == 3
+    assert prompts == ["same"] * 3
+
+
+async def test_failed_job_reports_error():
+    queue, _ = make_queue()
+
+    job = queue.submit(AgentRequest(prompt="fail please"))
+    await queue.wait(job.job_id, timeout=1.0)
+
+    assert job.status == "failed"
+    assert job.error == "Agent execution failed"
+
+
+async def test_jobs_beyond_max_running_wait_their_turn():
+    queue, _ = make_queue(max_running=1)
+
+    first = queue.submit(AgentRequest(prompt="first"))
+    second = queue.submit(AgentRequest(prompt="second"))
+    await asyncio.sleep(0.005)
+
+    assert (first.status, second.status) == ("running", "queued")
+    await queue.wait(second.job_id, timeout=1.0)
+    assert second.status == "done"
+
+
+async def test_pending_jobs_are_capped():
+    queue, _ = make_queue(max_pending=1)
+    job = queue.submit(AgentRequest(prompt="first"))
+
+    with pytest.raises(RuntimeError, match="already pending"):
+        queue.submit(AgentRequest(prompt="second"))
+
+    await queue.wait(job.job_id, timeout=1.0)
+
+
+async def test_ended_jobs_are_dropped_after_retention():
+    queue, _ = make_queue(retention_seconds=0.01)
+    job = queue.submit(AgentRequest(prompt="first"))
+
+    await queue.wait(job.job_id, timeout=1.0)
+    await asyncio.sleep(0.05)
+
+    assert queue.get(job.job_id) is None
+    assert await queue.wait(job.job_id, timeout=0) is None
+
+
+async def test_events_emit_heartbeats_then_result():
+    queue, _ = make_queue()
+    job = queue.submit(AgentRequest(prompt="first"))
+
+    events = [event async for event in queue.events(job, heartbeat_seconds=0.005)]
+
+    assert events[0]["event"] == "status"
+    assert len(events) > 2
+    assert events[-1]["event"] == "done"
+    assert events[-1]["data"]["result"]["response"] == "answer to first"
+
+
+async def test_job_id_is_passed_on_and_reused_on_resubmit():
+    requests = []
+
+    async def run(request):
+        requests.append(request)
+        return AgentResponse(response="answer", agent_id="fake", execution_time=0.0)
+
+    queue = DeepSearchJobQueue(run)
+
+    job = queue.submit(DeepSearchRequest(prompt="EV market"))
+    await queue.wait(job.job_id, timeout=1.0)
+    resumed = queue.submit(DeepSearchRequest(prompt="EV market", job_id="search-1"))
+    await queue.wait(resumed.job_id, timeout=1.0)
+
+    assert requests[0].job_id == job.job_id
+    assert resumed.job_id == requests[1].job_id == "search-1"
+    again = DeepSearchRequest(prompt="EV market", job_id="search-1")
+    assert queue.submit(again) is resumed
+    with pytest.raises(ValueError):
+        queue.submit(DeepSearchRequest(prompt="other", job_id="search-1"))
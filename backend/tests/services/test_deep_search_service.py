@@ -0,0 +1,237 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from smolagents.memory import ActionStep, AgentMemory, FinalAnswerStep, TaskStep
+from smolagents.monitoring import Timing
+
+from app.services.agent import deep_search_service
+from app.services.agent.agent_pool import AgentPool
+from app.services.agent.checkpoints import CheckpointStore
+from app.services.agent.knowledge_base import KnowledgeBase
+from app.services.agent.response_cache import TTLCache
+from app.services.github.schema import AgentRequest, DeepSearchRequest
+
+
+class SlowAgent:
+    def __init__(self, steps=5, delay=0.02):
+        self.tools = {}
+        self.steps = steps
+        self.max_steps = steps
+        self.delay = delay
+        self.steps_run = 0
+        self.closed = False
+        self.prompts = []
+        self.runs = []
+        self.memory = AgentMemory(system_prompt="")
+
+    def run(self, prompt, stream=False, reset=True, max_steps=None):
+        self.prompts.append(prompt)
+        self.runs.append((list(self.memory.steps), reset, max_steps))
+        try:
+            for number in range(1, self.steps + 1):
+                time.sleep(self.delay)
+                self.steps_run = number
+                yield ActionStep(
+                    step_number=number,
+                    timing=Timing(start_time=0.0, end_time=self.delay),
+                )
+            yield FinalAnswerStep(output="full answer, see https://a.com/report")
+        except GeneratorExit:
+            self.closed = True
+            raise
+
+    def provide_final_answer(self, task):
+        return SimpleNamespace(
+            content=[{"type": "text", "text": f"partial after {self.steps_run}"}]
+        )
+
+
+def test_run_agent_answers_from_steps_so_far_at_deadline():
+    agent = SlowAgent()
+
+    run = deep_search_service.run_agent(
+        agent, "EV market", deadline=time.monotonic() + 0.03
+    )
+
+    assert run.partial is True
+    assert run.answer == "partial after 2"
+    assert agent.closed
+
+
+def test_run_agent_without_deadline_pressure_returns_final_answer():
+    run = deep_search_service.run_agent(
+        SlowAgent(steps=2), "EV market", deadline=time.monotonic() + 10
+    )
+
+    assert run == deep_search_service.AgentRun(
+        "full answer, see https://a.com/report", {}, False, ("https://a.com/report",)
+    )
+
+
+@pytest.fixture
+def slow_pool(mocker, monkeypatch, tmp_path):
+    monkeypatch.setenv("DEMO_MODE", "false")
+    cache = TTLCache()
+    mocker.patch.object(deep_search_service, "answer_cache", cache)
+    mocker.patch.object(
+        deep_search_service,
+        "knowledge_base",
+        KnowledgeBase(str(tmp_path / "knowledge.sqlite3")),
+    )
+    mocker.patch.object(
+        deep_search_service,
+        "checkpoint_store",
+        CheckpointStore(str(tmp_path / "checkpoints.sqlite3")),
+    )
+    mocker.patch.object(
+        deep_search_service, "deep_search_pool", AgentPool(SlowAgent, size=1)
+    )
+    return cache
+
+
+async def test_deep_search_past_deadline_is_marked_partial_and_not_cached(
+    slow_pool,
+):
+    response = await deep_search_service.run_deep_search(
+        DeepSearchRequest(prompt="EV market", deadline_seconds=0.01)
+    )
+
+    assert response.response == "partial after 1"
+    assert response.metadata["partial"] is True
+    assert len(slow_pool) == 0
+
+
+async def test_answers_are_stored_and_given_to_related_searches(slow_pool):
+    first = await deep_search_service.run_deep_search(
+        DeepSearchRequest(prompt="Research the EV market in Germany", session_id="s1")
+    )
+    second = await deep_search_service.run_deep_search(
+        DeepSearchRequest(
+            prompt="EV market in Germany: who leads?",
+            context={"team": "sales"},
+            session_id="s1",
+        )
+    )
+
+    assert first.metadata["sources"] == ["https://a.com/report"]
+    assert first.metadata["knowledge_base"] == []
+    assert second.metadata["knowledge_base"][0]["prompt"] == (
+        "Research the EV market in Germany"
+    )
+    (agent,) = deep_search_service.deep_search_pool._agents
+    assert agent.prompts[1].startswith("Notes from earlier research")
+    assert "Task: EV market in Germany: who leads?" in agent.prompts[1]
+
+
+async def test_answers_are_not_given_to_other_sessions(slow_pool):
+    await deep_search_service.run_deep_search(
+        DeepSearchRequest(prompt="Research the EV market in Germany", session_id="s1")
+    )
+    other = await deep_search_service.run_deep_search(
+        DeepSearchRequest(prompt="EV market in Germany: who leads?", session_id="s2")
+    )
+    same_prompt = await deep_search_service.run_deep_search(
+        DeepSearchRequest(prompt="Research the EV market in Germany")
+    )
+
+    assert other.metadata["knowledge_base"] == []
+    assert "answer_cache" not in same_prompt.metadata
+    (agent,) = deep_search_service.deep_search_pool._agents
+    assert not any(prompt.startswith("Notes") for prompt in agent.prompts[1:])
+
+
+async def test_unfinished_job_resumes_from_its_checkpoint(slow_pool):
+    request = DeepSearchRequest(
+        prompt="EV market", job_id="job-1", deadline_seconds=0.01
+    )
+    first = await deep_search_service.run_deep_search(request)
+    second = await deep_search_service.run_deep_search(
+        request.model_copy(update={"deadline_seconds": 10})
+    )
+
+    assert first.metadata["partial"] is True
+    assert second.metadata["partial"] is False
+    assert second.metadata["resumed_steps"] == 1
+    (agent,) = deep_search_service.deep_search_pool._agents
+    restored, reset, max_steps = agent.runs[1]
+    assert (reset, max_steps) == (False, 4)
+    assert isinstance(restored[0], TaskStep) and restored[0].task == agent.prompts[0]
+    assert restored[1].step_number == 1
+    assert "interrupted" in agent.prompts[1]
+    # A finished run has no checkpoint left to resume.
+    store = deep_search_service.checkpoint_store
+    assert store.load("job-1", deep_search_service.search_prompt(request)) is None
+
+
+async def test_job_id_of_another_prompt_starts_fresh(slow_pool):
+    request = DeepSearchRequest(
+        prompt="EV market", job_id="job-1", deadline_seconds=0.01
+    )
+    await deep_search_service.run_deep_search(request)
+
+    response = await deep_search_service.run_deep_search(
+        DeepSearchRequest(prompt="Solar market", job_id="job-1", deadline_seconds=10)
+    )
+
+    assert response.metadata["resumed_steps"] == 0
+    (agent,) = deep_search_service.deep_search_pool._agents
+    assert agent.runs[1][1] is True
+    assert "Solar market" in agent.prompts[1] and "EV market" not in agent.prompts[1]
+    store = deep_search_service.checkpoint_store
+    assert store.load("job-1", deep_search_service.search_prompt(request)) is None
+
+
+@pytest.fixture
+def answer_cache(mocker):
+    cache = TTLCache()
+    mocker.patch.object(deep_search_service, "answer_cache", cache)
+    mocker.patch.object(deep_search_service.asyncio, "sleep", mocker.AsyncMock())
+    return cache
+
+
+async def test_deep_search_reuses_answer_for_same_prompt(answer_cache):
+    first = await deep_search_service.run_deep_search(
+        AgentRequest(prompt="Research the EV market in Germany")
+    )
+    second = await deep_search_service.run_deep_search(
+        AgentRequest(prompt="research the  EV market in Germany.")
+    )
+
+    assert second.response == first.response
+    assert "answer_cache" not in first.metadata
+    assert second.metadata["answer_cache"] == {
+        "hit": True,
+        "cached_prompt": "Research the EV market in Germany",
+    }
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "Is coffee bad for your heart?",
+        "Research the German EV market",
+        "Flights from London to Paris",
+    ],
+)
+async def test_deep_search_with_other_words_or_order_misses(answer_cache, prompt):
+    for cached in [
+        "Is coffee good for your heart?",
+        "Research the EV market in Germany",
+        "Flights from Paris to London",
+    ]:
+        await deep_search_service.run_deep_search(AgentRequest(prompt=cached))
+
+    response = await deep_search_service.run_deep_search(AgentRequest(prompt=prompt))
+
+    assert "answer_cache" not in response.metadata
+
+
+async def test_deep_search_with_context_bypasses_cache(answer_cache):
+    await deep_search_service.run_deep_search(AgentRequest(prompt="EV market"))
+
+    response = await deep_search_service.run_deep_search(
+        AgentRequest(prompt="EV market", context={"user": "a"})
+    )
+
+    assert "answer_cache" not in response.metadata
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+from smolagents.memory import ActionStep, FinalAnswerStep
+from smolagents.monitoring import Timing
+
+from app.services.agent import deep_search_service
+from app.services.agent.agent_pool import AgentPool
+from app.services.agent.deep_search_stream import DeepSearchStreams, StepBuffer
+from app.services.github.schema import AgentRequest
+
+
+class FakeAgent:
+    def __init__(self, steps=3, delay=0.01):
+        self.tools = {}
+        self.steps = steps
+        self.delay = delay
+        self.interrupt_switch = False
+        self.interrupted = False
+
+    def run(self, prompt, stream=False):
+        for number in range(1, self.steps + 1):
+            time.sleep(self.delay)
+            if self.interrupt_switch:
+                raise RuntimeError("Agent interrupted.")
+            yield ActionStep(
+                step_number=number,
+                timing=Timing(start_time=0.0, end_time=self.delay),
+                observations="x" * 5000,
+            )
+        yield FinalAnswerStep(output=f"answer to {prompt[:5]}")
+
+    def interrupt(self):
+        self.interrupted = True
+        self.interrupt_switch = True
+
+
+@pytest.fixture
+def pool(mocker, monkeypatch):
+    monkeypatch.setenv("DEMO_MODE", "false")
+    agents = []
+
+    def factory():
+        agents.append(FakeAgent())
+        return agents[-1]
+
+    pool = AgentPool(factory, size=1)
+    mocker.patch.object(deep_search_service, "deep_search_pool", pool)
+    return pool, agents
+
+
+async def test_streams_each_step_then_the_answer(pool):
+    streams = DeepSearchStreams()
+
+    events = [event async for event in streams.stream(AgentRequest(prompt="EV market"))]
+
+    assert [event["event"] for event in events] == [
+        "started",
+        "step",
+        "step",
+        "step",
+        "done",
+    ]
+    assert events[1]["data"]["step_number"] == 1
+    assert len(events[1]["data"]["observations"]) < 4100
+    assert events[-1]["data"]["response"] == "answer to EV ma"
+
+
+async def test_stop_interrupts_the_run(pool):
+    _, (agent,) = pool
+    agent.steps, agent.delay = 100, 0.005
+    streams = DeepSearchStreams()
+    events = []
+
+    async for event in streams.stream(AgentRequest(prompt="EV market")):
+        events.append(event)
+        if event["event"] == "step":
+            assert streams.stop(events[0]["data"]["run_id"])
+
+    assert events[-1]["event"] == "stopped"
+    assert agent.interrupted
+    assert pool[0].stats()["available"] == 1
+    assert not streams.stop(events[0]["data"]["run_id"])
+
+
+async def test_closing_the_stream_stops_the_run(pool):
+    _, (agent,) = pool
+    agent.steps, agent.delay = 100, 0.005
+    stream = DeepSearchStreams().stream(AgentRequest(prompt="EV market"))
+
+    async for event in stream:
+        if event["event"] == "step":
+            break
+    await stream.aclose()
+    await asyncio.sleep(0.05)
+
+    assert agent.interrupted
+    assert pool[0].stats()["available"] == 1
+
+
+async def test_step_buffer_drops_oldest_events_when_full():
+    buffer = StepBuffer(asyncio.get_running_loop(), max_events=2)
+    for number in range(4):
+        buffer.put({"event": "step", "data": {"step_number": number}})
+    buffer.put(None)
+
+    assert buffer.dropped == 3
+    assert (await buffer.get())["data"]["step_number"] == 3
+    assert await buffer.get() is None
@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from app.services.agent.knowledge_base import KnowledgeBase, context_for, terms
+
+EV_ANSWER = (
+    "The German EV market grew 20% in 2024. Charging infrastructure is "
+    "expanding, led by Ionity and EnBW."
+)
+
+
+@pytest.fixture
+def knowledge(tmp_path):
+    return KnowledgeBase(str(tmp_path / "knowledge.sqlite3"))
+
+
+def test_terms_ignore_research_boilerplate():
+    assert terms("Research the EV market in Germany") == {"ev", "market", "germany"}
+
+
+def test_related_questions_find_earlier_answers(knowledge):
+    knowledge.add(
+        "s1", "Research the EV market in Germany", EV_ANSWER, ["https://a.com"]
+    )
+
+    (entry,) = knowledge.search("s1", "EV charging infrastructure in Germany")
+
+    assert entry.prompt == "Research the EV market in Germany"
+    assert entry.sources == ["https://a.com"]
+    assert entry.coverage == 0.75
+    assert knowledge.search("s1", "Research the solar market in Spain") == []
+
+
+def test_answers_alone_do_not_cover_a_query(knowledge):
+    knowledge.add("s1", "Research European energy trends", EV_ANSWER, [])
+
+    assert knowledge.search("s1", "German EV charging infrastructure") == []
+
+
+def test_sessions_only_find_their_own_answers(knowledge):
+    knowledge.add("s1", "EV market Germany", "answer of s1", [])
+    knowledge.add("s2", "EV market Germany", "answer of s2", [])
+
+    assert [entry.answer for entry in knowledge.search("s2", "EV market Germany")] == [
+        "answer of s2"
+    ]
+    assert knowledge.search("s3", "EV market Germany") == []
+
+
+def test_entries_stored_without_a_session_are_dropped(tmp_path):
+    path = str(tmp_path / "knowledge.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE entries (id INTEGER PRIMARY KEY, prompt TEXT)")
+        conn.execute("INSERT INTO entries (prompt) VALUES ('EV market Germany')")
+
+    knowledge = KnowledgeBase(path)
+    knowledge.add("s1", "EV market Germany", EV_ANSWER, [])
+
+    assert len(knowledge.search("s1", "EV market Germany")) == 1
+
+
+def test_same_prompt_replaces_earlier_answer(knowledge):
+    knowledge.add("s1", "EV market Germany", "old answer", [])
+    knowledge.add("s1", "EV market Germany", "new answer", [])
+
+    assert [entry.answer for entry in knowledge.search("s1", "EV market Germany")] == [
+        "new answer"
+    ]
+
+
+def test_oldest_entries_are_dropped_beyond_max_entries(tmp_path):
+    knowledge = KnowledgeBase(str(tmp_path / "knowledge.sqlite3"), max_entries=1)
+    knowledge.add("s1", "EV market Germany", EV_ANSWER, [])
+    knowledge.add("s1", "Solar market Spain", "Solar grew.", [])
+
+    assert knowledge.search("s1", "EV market Germany") == []
+    assert len(knowledge.search("s1", "solar market spain")) == 1
+
+
+def test_expired_entries_are_not_found(tmp_path):
+    knowledge = KnowledgeBase(str(tmp_path / "knowledge.sqlite3"), ttl_seconds=-1)
+    knowledge.add("s1", "EV market Germany", EV_ANSWER, [])
+
+    assert knowledge.search("s1", "EV market Germany") == []
+
+
+def test_context_lists_answers_and_sources(knowledge):
+    knowledge.add("s1", "EV market Germany", EV_ANSWER, ["https://a.com"])
+
+    context = context_for(knowledge.search("s1", "EV market Germany"))
+
+    assert "### EV market Germany (researched " in context
+    assert EV_ANSWER in context
+    assert "Sources:\n- https://a.com" in context
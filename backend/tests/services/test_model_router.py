@@ -0,0 +1,44 @@
+from app.services.agent import model_router
+
+
+def test_short_prompts_go_to_the_fast_tier():
+    decision = model_router.route("Research EV charging in Berlin.")
+
+    assert decision.tier is model_router.FAST_TIER
+    assert decision.estimated_cards == 1
+    assert decision.max_tokens == model_router.output_budget(1)
+
+
+def test_complex_prompts_go_to_the_flagship_tier():
+    prompt = "Research the EV market in Germany. " * 20 + (
+        "Then call the supervisor; also generate a poster, and then call sales."
+    )
+
+    decision = model_router.route(prompt, slo_seconds=60)
+
+    assert decision.tier is model_router.FLAGSHIP_TIER
+    assert decision.estimated_cards > model_router.MAX_FAST_CARDS
+    assert decision.reason == "complex prompt"
+
+
+def test_tight_slo_keeps_complex_prompts_on_the_fast_tier():
+    prompt = "Research the EV market in Germany and its key players. " * 20
+
+    decision = model_router.route(prompt, slo_seconds=5)
+
+    assert decision.tier is model_router.FAST_TIER
+    assert "exceeds SLO" in decision.reason
+
+
+def test_only_the_fast_tier_escalates():
+    fast = model_router.route("Call the supervisor.")
+    (escalated,) = model_router.escalation(fast)
+
+    assert escalated.tier is model_router.FLAGSHIP_TIER
+    assert escalated.max_tokens == model_router.MAX_OUTPUT_TOKENS
+    assert model_router.escalation(escalated) == []
+
+
+def test_output_budget_grows_with_card_count():
+    assert model_router.output_budget(1) < model_router.output_budget(8)
+    assert model_router.output_budget(100) == model_router.MAX_OUTPUT_TOKENS
@@ -0,0 +1,418 @@
+import json
+
+import pytest
+
+from app.services.agent import model_router, new_card_service
+from app.services.github.schema import AgentRequest, NewCardRequest
+
+
+CARDS_RESPONSE = {
+    "cards": [
+        {
+            "card_id": "task-1",
+            "title": "Research Solar Market",
+            "description": "Analyze the solar panel market in Spain.",
+            "task_type": "research_task",
+            "dependencies": [],
+        },
+        {
+            "card_id": "task-2",
+            "title": "Call Leadership",
+            "description": "Inform leadership about the findings.",
+            "task_type": "phone_task",
+            "dependencies": ["task-1"],
+        },
+    ]
+}
+
+
+class FakeUsage:
+    def __init__(
+        self,
+        input_tokens=120,
+        output_tokens=80,
+        cache_read_input_tokens=900,
+        cache_creation_input_tokens=0,
+    ):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.cache_read_input_tokens = cache_read_input_tokens
+        self.cache_creation_input_tokens = cache_creation_input_tokens
+
+
+class FakeTextBlock:
+    def __init__(self, text):
+        self.type = "text"
+        self.text = text
+
+
+class FakeToolUseBlock:
+    def __init__(self, tool_input):
+        self.type = "tool_use"
+        self.name = "create_cards"
+        self.input = tool_input
+
+
+class FakeMessage:
+    def __init__(self, text, model=new_card_service.MODEL_ID, tool_input=None):
+        if tool_input is not None:
+            self.content = [FakeToolUseBlock(tool_input)]
+        else:
+            self.content = [FakeTextBlock(text)]
+        self.model = model
+        self.usage = FakeUsage()
+
+
+class FakeStream:
+    def __init__(self, text, chunk_size=16):
+        self.text = text
+        self.chunk_size = chunk_size
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @property
+    async def text_stream(self):
+        for index in range(0, len(self.text), self.chunk_size):
+            yield self.text[index : index + self.chunk_size]
+
+    async def get_final_message(self):
+        return FakeMessage(self.text)
+
+
+class FakeMessages:
+    def __init__(self, text):
+        self.text = text
+        self.tool_input = CARDS_RESPONSE
+        self.texts_by_model = {}
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if "tools" in kwargs:
+            return FakeMessage(None, tool_input=self.tool_input)
+        text = self.texts_by_model.get(kwargs["model"], self.text)
+        return FakeMessage(text, model=kwargs["model"])
+
+    def stream(self, **kwargs):
+        self.calls.append(kwargs)
+        return FakeStream(self.text)
+
+
+class FakeAnthropicClient:
+    """Stands in for `anthropic.AsyncAnthropic` and records every request."""
+
+    def __init__(self, text=json.dumps(CARDS_RESPONSE)):
+        self.messages = FakeMessages(text)
+
+    def assert_system_prompt_cached(self, call):
+        system = call["system"]
+        assert isinstance(system, list), "system prompt must be sent as blocks"
+        assert system[-1]["type"] == "text"
+        assert system[-1]["text"] == new_card_service._get_system_prompt()
+        assert system[-1]["cache_control"] == {"type": "ephemeral"}
+
+
+@pytest.fixture
+def fake_client(mocker, monkeypatch):
+    monkeypatch.setenv("DEMO_MODE", "false")
+    client = FakeAnthropicClient()
+    mocker.patch.object(new_card_service, "claude_client", client)
+    new_card_service.response_cache.clear()
+    new_card_service.generation_stats.clear()
+    new_card_service.card_deduplicator.sessions.clear()
+    yield client
+    new_card_service.response_cache.clear()
+
+
+async def test_repeated_prompt_is_served_from_cache(fake_client):
+    first = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the solar market in Spain.")
+    )
+    second = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="  research the SOLAR market in spain ")
+    )
+
+    assert len(fake_client.messages.calls) == 1
+    assert first.metadata["cache"] == "miss"
+    assert second.metadata["cache"] == "hit"
+    assert second.metadata["cache_stats"]["hits"] == 1
+    assert [card.card_id for card in second.card_data] == ["task-1", "task-2"]
+
+
+async def test_defective_json_is_repaired_and_valid_cards_salvaged(fake_client):
+    cards = CARDS_RESPONSE["cards"]
+    fake_client.messages.text = (
+        "Here are the cards:\n```json\n"
+        + '{"cards": ['
+        + json.dumps(cards[0])[:-1]
+        + ", },"
+        + json.dumps({**cards[1], "task_type": "unknown_task"})
+        + ","
+        + json.dumps({**cards[1], "card_id": "task-3", "dependencies": ["task-2"]})
+        + ","
+        + json.dumps({**cards[1], "card_id": "task-4", "dependencies": []})[:-20]
+    )
+
+    response = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the solar market in Spain.")
+    )
+
+    assert [card.card_id for card in response.card_data] == ["task-1", "task-4"]
+    assert response.card_data[1].dependencies == []
+    assert response.metadata["json_repairs"] == [
+        "card 1: removed trailing comma",
+        "closed unterminated 'cards' array",
+        "card 4: closed truncated value",
+        "card 2: dropped invalid card",
+        "task-3: dropped, depends on a dropped card",
+    ]
+
+
+async def test_unsalvageable_response_is_rejected(fake_client):
+    fake_client.messages.text = "I cannot help with that."
+
+    with pytest.raises(ValueError):
+        await new_card_service.create_new_card_from_prompt(
+            AgentRequest(prompt="Research the solar market in Spain.")
+        )
+
+
+async def test_tool_mode_returns_structured_cards(fake_client):
+    response = await new_card_service.create_new_card_from_prompt(
+        NewCardRequest(prompt="Research the solar market.", generation_mode="tool")
+    )
+
+    call = fake_client.messages.calls[0]
+    assert call["tool_choice"] == {"type": "tool", "name": "create_cards"}
+    assert call["tools"][0]["input_schema"]["properties"]["cards"]["type"] == "array"
+    assert [card.card_id for card in response.card_data] == ["task-1", "task-2"]
+    assert response.metadata["generation_mode"] == "tool"
+    assert response.metadata["generation_stats"]["tool"]["generations"] == 1
+
+
+async def test_failed_generations_are_recorded_per_mode(fake_client):
+    fake_client.messages.tool_input = {"cards": [{"card_id": "task-1"}]}
+    with pytest.raises(ValueError):
+        await new_card_service.create_new_card_from_prompt(
+            NewCardRequest(prompt="Research the solar market.", generation_mode="tool")
+        )
+    await new_card_service.create_new_card_from_prompt(
+        NewCardRequest(prompt="Research the wind market.", generation_mode="text")
+    )
+
+    stats = new_card_service.generation_stats.stats()
+    # The fast tier and the flagship it escalated to both failed.
+    assert stats["tool"]["failures"] == 2
+    assert stats["tool"]["failure_rate"] == 1.0
+    assert stats["text"] == {**stats["text"], "generations": 1, "failures": 0}
+
+
+async def test_short_prompt_uses_fast_tier(fake_client):
+    response = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the solar market, then call leadership.")
+    )
+
+    call = fake_client.messages.calls[0]
+    assert call["model"] == model_router.FAST_TIER.model_id
+    assert call["max_tokens"] < model_router.MAX_OUTPUT_TOKENS
+    assert response.metadata["model_tier"] == "fast"
+    assert response.metadata["routing"]["escalations"] == []
+
+
+async def test_invalid_fast_tier_output_escalates_to_flagship(fake_client):
+    fake_client.messages.texts_by_model[model_router.FAST_TIER.model_id] = "Sorry."
+
+    response = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the solar market.")
+    )
+
+    assert [call["model"] for call in fake_client.messages.calls] == [
+        model_router.FAST_TIER.model_id,
+        model_router.FLAGSHIP_TIER.model_id,
+    ]
+    assert response.metadata["model_tier"] == "flagship"
+    assert response.metadata["routing"]["tier"] == "fast"
+    assert response.metadata["routing"]["escalations"][0]["to"] == "flagship"
+    assert response.metadata["attempts_made"] == 2
+
+
+async def test_fast_tier_output_with_dropped_cards_escalates(fake_client):
+    research, call = CARDS_RESPONSE["cards"]
+    fake_client.messages.texts_by_model[model_router.FAST_TIER.model_id] = json.dumps(
+        {"cards": [research, {**call, "task_type": "unknown_task"}]}
+    )
+
+    response = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the solar market.")
+    )
+
+    assert response.metadata["model_tier"] == "flagship"
+    assert [card.card_id for card in response.card_data] == ["task-1", "task-2"]
+    (escalation,) = response.metadata["routing"]["escalations"]
+    assert "card 2: dropped invalid card" in escalation["error"]
+
+
+async def test_streamed_plan_is_not_served_for_another_tier(fake_client):
+    request = AgentRequest(prompt="Research the solar market.")
+    async for _ in new_card_service.stream_new_cards_from_prompt(request):
+        pass
+
+    response = await new_card_service.create_new_card_from_prompt(request)
+
+    assert [call["model"] for call in fake_client.messages.calls] == [
+        model_router.FLAGSHIP_TIER.model_id,
+        model_router.FAST_TIER.model_id,
+    ]
+    assert response.metadata["cache"] == "miss"
+
+
+async def test_speculative_research_starts_root_research_cards(fake_client, mocker):
+    started = []
+    mocker.patch.object(
+        new_card_service.research_jobs,
+        "start",
+        side_effect=lambda prompt: started.append(prompt)
+        or mocker.Mock(job_id="job-1"),
+    )
+
+    response = await new_card_service.create_new_card_from_prompt(
+        NewCardRequest(prompt="Research the solar market.", speculative_research=True)
+    )
+
+    assert started == [
+        "Research Solar Market - Analyze the solar panel market in Spain."
+    ]
+    assert response.research_jobs == {"task-1": "job-1"}
+
+
+async def test_duplicate_cards_are_merged_into_one_node(fake_client, mocker):
+    mocker.patch.object(new_card_service, "DEDUPLICATE_CARDS", True)
+    research, call = CARDS_RESPONSE["cards"]
+    fake_client.messages.text = json.dumps(
+        {
+            "cards": [
+                research,
+                {**research, "card_id": "task-3", "title": "Research solar market"},
+                {**call, "dependencies": ["task-1", "task-3"]},
+            ]
+        }
+    )
+
+    response = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the solar market in Spain.")
+    )
+
+    assert [card.card_id for card in response.card_data] == ["task-1", "task-2"]
+    assert response.card_data[1].dependencies == ["task-1"]
+    assert response.metadata["deduplication"]["merged"] == {"task-3": "task-1"}
+    assert response.execution_levels == [["task-1"], ["task-2"]]
+
+
+async def test_cards_of_earlier_boards_are_matched_within_the_session(
+    fake_client, mocker
+):
+    mocker.patch.object(new_card_service, "DEDUPLICATE_CARDS", True)
+    request = NewCardRequest(
+        prompt="Research the solar market in Spain.", session_id="alice"
+    )
+
+    first = await new_card_service.create_new_card_from_prompt(request)
+    second = await new_card_service.create_new_card_from_prompt(request)
+
+    assert first.metadata["deduplication"]["cross_board"] == {}
+    assert second.metadata["deduplication"]["cross_board"] == {
+        "task-1": "Research Solar Market"
+    }
+    assert second.card_data == first.card_data
+
+
+async def test_system_prompt_is_sent_as_cacheable_block(fake_client):
+    response = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the solar market in Spain.")
+    )
+
+    fake_client.assert_system_prompt_cached(fake_client.messages.calls[0])
+    assert response.metadata["cache_read_input_tokens"] == 900
+    assert response.metadata["cache_creation_input_tokens"] == 0
+
+
+async def test_stream_sends_cacheable_system_prompt(fake_client):
+    async for _ in new_card_service.stream_new_cards_from_prompt(
+        AgentRequest(prompt="Research the solar market in Spain.")
+    ):
+        pass
+
+    fake_client.assert_system_prompt_cached(fake_client.messages.calls[0])
+
+
+async def test_stream_uses_text_mode_when_tool_mode_is_the_default(
+    fake_client, monkeypatch
+):
+    monkeypatch.setattr(new_card_service, "DEFAULT_GENERATION_MODE", "tool")
+
+    events = [
+        event
+        async for event in new_card_service.stream_new_cards_from_prompt(
+            AgentRequest(prompt="Research the solar market in Spain.")
+        )
+    ]
+
+    assert "tools" not in fake_client.messages.calls[0]
+    assert [event["event"] for event in events] == ["card", "card", "done"]
+
+
+async def test_generation_modes_do_not_share_cache_entries(fake_client):
+    await new_card_service.create_new_card_from_prompt(
+        NewCardRequest(prompt="Research the solar market.", generation_mode="text")
+    )
+    response = await new_card_service.create_new_card_from_prompt(
+        NewCardRequest(prompt="Research the solar market.", generation_mode="tool")
+    )
+
+    assert len(fake_client.messages.calls) == 2
+    assert response.metadata["cache"] == "miss"
+    assert response.metadata["generation_mode"] == "tool"
+
+
+async def test_different_prompts_are_not_shared(fake_client):
+    await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the solar market in Spain.")
+    )
+    response = await new_card_service.create_new_card_from_prompt(
+        AgentRequest(prompt="Research the wind market in Spain.")
+    )
+
+    assert len(fake_client.messages.calls) == 2
+    assert response.metadata["cache"] == "miss"
+
+
+async def test_stream_emits_each_card_then_done(fake_client):
+    events = [
+        event
+        async for event in new_card_service.stream_new_cards_from_prompt(
+            AgentRequest(prompt="Research the solar market in Spain.")
+        )
+    ]
+
+    assert [event["event"] for event in events] == ["card", "card", "done"]
+    assert events[0]["data"]["card_id"] == "task-1"
+    assert events[-1]["data"]["metadata"]["card_count"] == 2
+
+
+async def test_stream_reports_invalid_dependency_graph(fake_client):
+    fake_client.messages.text = json.dumps(
+        {"cards": [{**CARDS_RESPONSE["cards"][1], "dependencies": ["task-9"]}]}
+    )
+    events = [
+        event
+        async for event in new_card_service.stream_new_cards_from_prompt(
+            AgentRequest(prompt="Call leadership.")
+        )
+    ]
+
+    assert [event["event"] for event in events] == ["card", "error"]
+    assert "task-9" in events[-1]["data"]["detail"]
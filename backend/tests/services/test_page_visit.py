@@ -0,0 +1,206 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.services.agent.page_visit import (
+    PageCache,
+    VisitPagesTool,
+    _LazyProcessPool,
+    check_public_url,
+    extract_text,
+)
+
+PAGE = """
+<html><head><title>EV Report</title><style>body {}</style></head>
+<body><nav>Home | About</nav>
+<h1>EV market</h1><p>Sales grew by 20%.</p>
+<script>track()</script><p>Charging &amp; more.</p></body></html>
+"""
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+    hosts = []
+
+    def do_GET(self):
+        Handler.requests.append((self.path, self.headers.get("If-None-Match")))
+        Handler.hosts.append(self.headers.get("Host"))
+        if self.path.startswith("/slow"):
+            time.sleep(0.2)
+        if self.path == "/missing":
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.path.startswith("/redirect"):
+            self.send_response(302)
+            self.send_header("Location", self.path.split("?to=", 1)[1])
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = PAGE.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+@pytest.fixture(scope="module")
+def executors():
+    with ThreadPoolExecutor(max_workers=4) as fetch, ProcessPoolExecutor(
+        max_workers=1
+    ) as extract:
+        yield fetch, extract
+
+
+@pytest.fixture
+def make_tool(tmp_path, executors):
+    Handler.requests.clear()
+    Handler.hosts.clear()
+    clients = []
+
+    def make(ttl_seconds=3600.0, **kwargs):
+        clients.append(httpx.Client())
+        cache = PageCache(str(tmp_path / "pages.sqlite3"), ttl_seconds=ttl_seconds)
+        return VisitPagesTool(
+            clients[-1], *executors, cache, allowed_hosts={"127.0.0.1"}, **kwargs
+        )
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def test_extract_text_keeps_readable_content():
+    title, text = extract_text(PAGE, max_chars=1000)
+
+    assert title == "EV Report"
+    assert text == "EV market\nSales grew by 20%.\nCharging & more."
+
+
+def test_pages_are_fetched_concurrently(server, make_tool):
+    tool = make_tool()
+
+    start = time.monotonic()
+    output = tool.forward([f"{server}/slow/1", f"{server}/slow/2"])
+
+    assert time.monotonic() - start < 0.35
+    assert output.count("## EV Report") == 2
+    assert "Sales grew by 20%." in output
+    assert "track()" not in output
+
+
+def test_fresh_pages_come_from_cache(server, make_tool):
+    tool = make_tool()
+    tool.forward([f"{server}/page"])
+
+    assert "Sales grew" in make_tool().forward([f"{server}/page"])
+    assert len(Handler.requests) == 1
+
+
+def test_stale_pages_are_revalidated_with_etag(server, make_tool):
+    tool = make_tool(ttl_seconds=-1)
+    tool.forward([f"{server}/page"])
+
+    output = tool.forward([f"{server}/page"])
+
+    assert "Sales grew" in output
+    assert Handler.requests == [("/page", None), ("/page", '"v1"')]
+
+
+def test_failures_are_reported_per_page(server, make_tool):
+    output = make_tool().forward([f"{server}/missing", "file:///etc/passwd"])
+
+    assert f"## {server}/missing\nError:" in output
+    assert "only http(s) URLs can be visited" in output
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://localhost/",
+        "http://127.0.0.1:8000/",
+        "http://10.0.0.1/",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://[::1]/",
+        "http://[::ffff:192.168.0.1]/",
+        "ftp://example.com/",
+    ],
+)
+def test_non_public_urls_are_rejected(url):
+    with pytest.raises(ValueError):
+        check_public_url(httpx.URL(url))
+
+
+def test_public_urls_return_the_address_to_connect_to():
+    assert check_public_url(httpx.URL("https://93.184.215.14/")) == "93.184.215.14"
+    assert check_public_url(httpx.URL("http://127.0.0.1/"), {"127.0.0.1"}) is None
+
+
+def test_every_redirect_hop_is_checked(server, make_tool):
+    tool = make_tool()
+    port = server.rsplit(":", 1)[1]
+
+    output = tool.forward(
+        [
+            f"{server}/redirect?to=/page",
+            f"{server}/redirect?to=http://localhost:{port}/page",
+            f"{server}/redirect?to=http://169.254.169.254/latest/meta-data/",
+        ]
+    )
+
+    assert "## EV Report" in output
+    assert "localhost resolves to non-public address" in output
+    assert "169.254.169.254 resolves to non-public address" in output
+    assert [path for path, _ in Handler.requests].count("/page") == 1
+
+
+def test_requests_connect_to_the_checked_address(server, make_tool, mocker):
+    check = mocker.patch(
+        "app.services.agent.page_visit.check_public_url", return_value="127.0.0.1"
+    )
+    port = server.rsplit(":", 1)[1]
+
+    output = make_tool().forward([f"http://pages.example:{port}/page"])
+
+    assert "## EV Report" in output
+    assert check.call_args.args[0].host == "pages.example"
+    assert Handler.hosts == [f"pages.example:{port}"]
+
+
+def test_bodies_are_cut_off_after_max_bytes(server, make_tool):
+    output = make_tool(max_bytes_per_page=60).forward([f"{server}/page"])
+
+    assert "## EV Report" in output
+    assert "Sales grew" not in output
+
+
+def test_lazy_pool_is_created_once_and_spawns_workers():
+    pool = _LazyProcessPool(max_workers=1)
+    with ThreadPoolExecutor(max_workers=4) as threads:
+        futures = list(threads.map(lambda _: pool.submit(abs, -1), range(4)))
+    try:
+        assert [future.result(timeout=30) for future in futures] == [1] * 4
+        assert pool._pool._mp_context.get_start_method() == "spawn"
+    finally:
+        pool.shutdown()
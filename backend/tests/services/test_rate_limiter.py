@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.services.agent.rate_limiter import AdaptiveRateLimiter, retry_after_seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = FakeResponse(status_code, headers)
+
+
+@pytest.fixture
+def limiter():
+    return AdaptiveRateLimiter(
+        name="test",
+        requests_per_second=1000,
+        burst=100,
+        max_concurrency=8,
+        max_retries=3,
+        base_delay=0.001,
+    )
+
+
+async def test_throttled_calls_are_retried_and_shrink_the_limit(limiter):
+    outcomes = [FakeAPIError(429), FakeAPIError(529)]
+
+    async def flaky():
+        if outcomes:
+            raise outcomes.pop(0)
+        return "ok"
+
+    result, attempts = await limiter.call(flaky)
+
+    assert (result, attempts) == ("ok", 3)
+    stats = limiter.stats()
+    assert stats["throttled_responses"] == 2
+    assert stats["retries"] == 2
+    assert stats["concurrency_limit"] < 8
+
+
+async def test_non_retryable_errors_are_raised_immediately(limiter):
+    calls = 0
+
+    async def bad_request():
+        nonlocal calls
+        calls += 1
+        raise FakeAPIError(400)
+
+    with pytest.raises(FakeAPIError):
+        await limiter.call(bad_request)
+    assert calls == 1
+
+
+async def test_concurrency_limit_queues_excess_callers():
+    limiter = AdaptiveRateLimiter(
+        name="test", requests_per_second=1000, burst=100, max_concurrency=2
+    )
+    running = 0
+    peak = 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    await asyncio.gather(*(limiter.call(work) for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.stats()["queue_depth"] == 0
+
+
+def test_retry_after_headers_are_honored():
+    assert retry_after_seconds(FakeAPIError(429, {"retry-after": "3"})) == 3.0
+    assert retry_after_seconds(FakeAPIError(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(FakeAPIError(429)) is None
+
+
+def test_sync_calls_share_the_limiter(limiter):
+    outcomes = [FakeAPIError(503)]
+
+    def flaky():
+        if outcomes:
+            raise outcomes.pop(0)
+        return "ok"
+
+    assert limiter.call_sync(flaky) == ("ok", 2)
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.services.agent.request_coalescer import RequestCoalescer
+from app.services.github.schema import AgentRequest
+
+
+async def test_concurrent_identical_requests_share_one_run():
+    coalescer = RequestCoalescer()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    key = RequestCoalescer.make_key("deep-search", AgentRequest(prompt="EV market"))
+    results = await asyncio.gather(
+        coalescer.run(key, work), coalescer.run(key, work), coalescer.run(key, work)
+    )
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["result"] * 3
+    assert [coalesced for _, coalesced in results] == [False, True, True]
+    assert coalescer.stats()["in_flight"] == 0
+
+
+async def test_sequential_requests_are_not_coalesced():
+    coalescer = RequestCoalescer()
+
+    async def work():
+        return "result"
+
+    _, first = await coalescer.run("key", work)
+    _, second = await coalescer.run("key", work)
+
+    assert (first, second) == (False, False)
+
+
+async def test_errors_propagate_to_every_waiter():
+    coalescer = RequestCoalescer()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream failed")
+
+    results = await asyncio.gather(
+        coalescer.run("key", work), coalescer.run("key", work), return_exceptions=True
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_keys_ignore_whitespace_but_not_endpoint():
+    make_key = RequestCoalescer.make_key
+
+    assert make_key("new-card", AgentRequest(prompt="EV  market ")) == make_key(
+        "new-card", AgentRequest(prompt="EV market")
+    )
+    assert make_key("new-card", AgentRequest(prompt="EV market")) != make_key(
+        "deep-search", AgentRequest(prompt="EV market")
+    )
+
+
+@pytest.mark.parametrize("cancelled_index", [0, 1])
+async def test_cancelled_waiter_does_not_cancel_shared_run(cancelled_index):
+    coalescer = RequestCoalescer()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    waiters = [asyncio.create_task(coalescer.run("key", work)) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    waiters[cancelled_index].cancel()
+
+    result, _ = await waiters[1 - cancelled_index]
+
+    assert result == "result"
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.services.agent.research_jobs import ResearchJobRegistry
+from app.services.github.schema import AgentResponse, DeepSearchRequest
+
+
+def make_registry(**kwargs):
+    prompts = []
+
+    async def run(request):
+        prompts.append(request.prompt)
+        await asyncio.sleep(0.02)
+        if "fail" in request.prompt:
+            raise RuntimeError("Agent execution failed")
+        return AgentResponse(
+            response=f"answer to {request.prompt}", agent_id="fake", execution_time=0.02
+        )
+
+    return ResearchJobRegistry(run, **kwargs), prompts
+
+
+async def test_started_job_is_claimed_once():
+    registry, prompts = make_registry()
+    job = registry.start("Research EV market")
+
+    assert registry.start("Research EV market") is job
+    response = await registry.claim(job.job_id)
+
+    assert response.response == "answer to Research EV market"
+    assert response.metadata["speculative"] is True
+    assert prompts == ["Research EV market"]
+    assert await registry.claim(job.job_id) is None
+
+
+async def test_claim_by_prompt_falls_back_when_search_failed():
+    registry, _ = make_registry()
+    registry.start("fail please")
+
+    assert await registry.claim_prompt("fail please") is None
+    assert await registry.claim_prompt("never started") is None
+
+
+async def test_request_with_context_or_deadline_does_not_claim():
+    registry, _ = make_registry()
+    job = registry.start("Research EV market")
+
+    assert (
+        await registry.claim_request(
+            DeepSearchRequest(prompt="Research EV market", context={"region": "EU"})
+        )
+        is None
+    )
+    assert (
+        await registry.claim_request(
+            DeepSearchRequest(prompt="Research EV market", deadline_seconds=5)
+        )
+        is None
+    )
+    response = await registry.claim_request(
+        DeepSearchRequest(prompt="Research EV market")
+    )
+
+    assert response.metadata["research_job_id"] == job.job_id
+
+
+async def test_unclaimed_jobs_are_dropped_after_ttl():
+    registry, _ = make_registry(unclaimed_ttl_seconds=0.01)
+    job = registry.start("Research EV market")
+
+    await asyncio.sleep(0.05)
+
+    assert registry.get(job.job_id) is None
+    assert job.task.cancelled()
+    assert registry.stats()["expired"] == 1
+
+
+async def test_running_jobs_are_capped():
+    registry, _ = make_registry(max_running=1)
+
+    first = registry.start("first")
+    assert first is not None
+    assert registry.start("second") is None
+    await registry.claim(first.job_id)
+
+
+async def test_cancelled_claim_keeps_the_search_running():
+    registry, _ = make_registry()
+    job = registry.start("Research EV market")
+
+    claim = asyncio.create_task(registry.claim(job.job_id))
+    await asyncio.sleep(0)
+    claim.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await claim
+
+    assert (await job.task).response == "answer to Research EV market"
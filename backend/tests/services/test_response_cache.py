@@ -0,0 +1,36 @@
+from app.services.agent.response_cache import TTLCache
+
+
+def test_get_returns_stored_value_and_counts_hits():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used entry
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_treated_as_misses(mocker):
+    clock = mocker.patch("app.services.agent.response_cache.time.monotonic")
+    clock.return_value = 100.0
+    cache = TTLCache(max_size=2, ttl_seconds=10)
+    cache.set("a", 1)
+
+    clock.return_value = 111.0
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
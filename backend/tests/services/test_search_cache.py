@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.agent.rate_limiter import AdaptiveRateLimiter
+from app.services.agent.search_cache import CachedSearchTool, SearchCache
+
+
+class FakeSearchTool:
+    def __init__(self):
+        self.queries = []
+
+    def forward(self, query):
+        self.queries.append(query)
+        if "nothing" in query:
+            raise Exception("No results found!")
+        return f"results for {query}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SearchCache(str(tmp_path / "search.sqlite3"), max_entries=3)
+
+
+def test_repeated_queries_are_served_from_cache(cache):
+    search = FakeSearchTool()
+    tool = CachedSearchTool(search, cache)
+
+    assert tool.forward("EV market  Germany") == "results for EV market  Germany"
+    assert tool.forward("ev market germany") == "results for EV market  Germany"
+
+    assert search.queries == ["EV market  Germany"]
+    assert tool.counts() == {"hits": 1, "misses": 1}
+
+
+def test_entries_are_shared_through_the_file(cache):
+    CachedSearchTool(FakeSearchTool(), cache).forward("solar panels")
+    other_process = SearchCache(cache.path)
+    search = FakeSearchTool()
+
+    CachedSearchTool(search, other_process).forward("solar panels")
+
+    assert search.queries == []
+
+
+def test_region_is_part_of_the_key(cache):
+    search = FakeSearchTool()
+    CachedSearchTool(search, cache, region="de-de").forward("news")
+    CachedSearchTool(search, cache, region="us-en").forward("news")
+
+    assert search.queries == ["news", "news"]
+
+
+def test_failed_searches_are_not_cached(cache):
+    search = FakeSearchTool()
+    tool = CachedSearchTool(search, cache)
+
+    for _ in range(2):
+        with pytest.raises(Exception, match="No results"):
+            tool.forward("nothing here")
+
+    assert len(search.queries) == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_searches_that_miss_share_the_rate_limiter(cache):
+    running = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    class SlowSearchTool(FakeSearchTool):
+        def forward(self, query):
+            with lock:
+                running["now"] += 1
+                running["peak"] = max(running["peak"], running["now"])
+            time.sleep(0.02)
+            with lock:
+                running["now"] -= 1
+            return super().forward(query)
+
+    limiter = AdaptiveRateLimiter("search", requests_per_second=100, max_concurrency=1)
+    tool = CachedSearchTool(SlowSearchTool(), cache, rate_limiter=limiter)
+    tool.forward("q0")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(tool.forward, ["q0", "q1", "q2", "q0"]))
+
+    assert running["peak"] == 1
+    assert sorted(tool.search_tool.queries) == ["q0", "q1", "q2"]
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_expired_and_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SearchCache(str(tmp_path / "search.sqlite3"), max_entries=2)
+    cache.set("a", "wt-wt", "A")
+    cache.set("b", "wt-wt", "B")
+    cache.get("a", "wt-wt")
+    cache.set("c", "wt-wt", "C")
+
+    assert cache.get("b", "wt-wt") is None
+    assert cache.get("a", "wt-wt") == "A"
+
+    expired = SearchCache(cache.path, ttl_seconds=-1)
+    expired.set("d", "wt-wt", "D")
+    assert expired.get("d", "wt-wt") is None
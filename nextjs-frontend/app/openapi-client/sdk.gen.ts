@@ -15,9 +15,46 @@ import type {
   CreateNewCardFromPromptData,
   CreateNewCardFromPromptError,
   CreateNewCardFromPromptResponse,
+  ReplanNewCardsData,
+  ReplanNewCardsError,
+  ReplanNewCardsResponse,
+  CreateNewCardsInBatchData,
+  CreateNewCardsInBatchError,
+  CreateNewCardsInBatchResponse,
+  GetNewCardBatchData,
+  GetNewCardBatchError,
+  GetNewCardBatchResponse,
+  StreamNewCardsFromPromptData,
+  StreamNewCardsFromPromptError,
+  StreamNewCardsFromPromptResponse,
   PerformDeepSearchData,
   PerformDeepSearchError,
   PerformDeepSearchResponse,
+  StreamDeepSearchData,
+  StreamDeepSearchError,
+  StreamDeepSearchResponse,
+  StopDeepSearchData,
+  StopDeepSearchError,
+  StopDeepSearchResponse,
+  SubmitDeepSearchJobData,
+  SubmitDeepSearchJobError,
+  SubmitDeepSearchJobResponse,
+  GetDeepSearchJobData,
+  GetDeepSearchJobError,
+  GetDeepSearchJobResponse,
+  StreamDeepSearchJobData,
+  StreamDeepSearchJobError,
+  StreamDeepSearchJobResponse,
+  ClaimResearchJobData,
+  ClaimResearchJobError,
+  ClaimResearchJobResponse,
+  ExecuteBoardData,
+  ExecuteBoardError,
+  ExecuteBoardResponse,
+  GetRateLimitsError,
+  GetRateLimitsResponse,
+  GetDeepSearchPoolError,
+  GetDeepSearchPoolResponse,
   GetBoardInitError,
   GetBoardInitResponse,
   GenerateImageEndpointData,
@@ -84,10 +121,87 @@ export const createNewCardFromPrompt = <ThrowOnError extends boolean = false>(
   });
 };
 
+/**
+ * Replan New Cards
+ * Takes an existing board and one edited card and regenerates only the
+ * cards downstream of it. All other cards are returned unchanged.
+ */
+export const replanNewCards = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<ReplanNewCardsData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).post<
+    ReplanNewCardsResponse,
+    ReplanNewCardsError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/new-card/replan",
+  });
+};
+
+/**
+ * Create New Cards In Batch
+ * Plans boards for many prompts in one request. In `sync` mode every prompt
+ * goes through the `/new-card` path with bounded concurrency and per-item
+ * results or errors are returned. In `async` mode the prompts are submitted
+ * as a message batch; poll `/new-card/batch/{batch_id}` for the results.
+ */
+export const createNewCardsInBatch = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<CreateNewCardsInBatchData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).post<
+    CreateNewCardsInBatchResponse,
+    CreateNewCardsInBatchError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/new-card/batch",
+  });
+};
+
+/**
+ * Get New Card Batch
+ * Returns the status of an async planning batch, with per-item results
+ * once it has ended.
+ */
+export const getNewCardBatch = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<GetNewCardBatchData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).get<
+    GetNewCardBatchResponse,
+    GetNewCardBatchError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/new-card/batch/{batch_id}",
+  });
+};
+
+/**
+ * Stream New Cards From Prompt
+ * Streaming variant of `/new-card`. Emits Server-Sent Events: one `card`
+ * event per validated card as soon as it has been generated, followed by a
+ * final `done` event (dependency graph validated) or an `error` event.
+ */
+export const streamNewCardsFromPrompt = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<StreamNewCardsFromPromptData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).post<
+    StreamNewCardsFromPromptResponse,
+    StreamNewCardsFromPromptError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/new-card/stream",
+  });
+};
+
 /**
  * Perform Deep Search
  * Takes a prompt and uses a web-searching agent to find a
- * comprehensive answer.
+ * comprehensive answer. The deadline can also be given in the
+ * `X-Deadline-Seconds` header; past it the agent answers from the steps it
+ * has taken so far and the answer is marked `partial`.
  */
 export const performDeepSearch = <ThrowOnError extends boolean = false>(
   options: OptionsLegacyParser<PerformDeepSearchData, ThrowOnError>,
@@ -102,6 +216,171 @@ export const performDeepSearch = <ThrowOnError extends boolean = false>(
   });
 };
 
+/**
+ * Stream Deep Search
+ * Streaming variant of `/deep-search`. Emits Server-Sent Events: `started`
+ * with the run id, one `planning` or `step` event per finished agent step,
+ * then `done` with the answer, `stopped` or `error`. Disconnecting stops
+ * the run.
+ */
+export const streamDeepSearch = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<StreamDeepSearchData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).post<
+    StreamDeepSearchResponse,
+    StreamDeepSearchError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/deep-search/stream",
+  });
+};
+
+/**
+ * Stop Deep Search
+ * Stops a streaming deep search after its current step.
+ */
+export const stopDeepSearch = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<StopDeepSearchData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).post<
+    StopDeepSearchResponse,
+    StopDeepSearchError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/deep-search/runs/{run_id}/stop",
+  });
+};
+
+/**
+ * Submit Deep Search Job
+ * Queues a deep search and returns its job id immediately. Fetch the result
+ * from `/deep-search/jobs/{job_id}` or follow `/deep-search/jobs/{job_id}/events`.
+ */
+export const submitDeepSearchJob = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<SubmitDeepSearchJobData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).post<
+    SubmitDeepSearchJobResponse,
+    SubmitDeepSearchJobError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/deep-search/jobs",
+  });
+};
+
+/**
+ * Get Deep Search Job
+ * Returns a deep search job's status and, once it has ended, its result.
+ * With `wait`, holds the request for up to that many seconds until the
+ * job ends (long polling).
+ */
+export const getDeepSearchJob = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<GetDeepSearchJobData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).get<
+    GetDeepSearchJobResponse,
+    GetDeepSearchJobError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/deep-search/jobs/{job_id}",
+  });
+};
+
+/**
+ * Stream Deep Search Job
+ * Server-Sent Events for a deep search job: periodic `status` events while
+ * it is pending, then one `done` or `error` event carrying the job.
+ */
+export const streamDeepSearchJob = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<StreamDeepSearchJobData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).get<
+    StreamDeepSearchJobResponse,
+    StreamDeepSearchJobError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/deep-search/jobs/{job_id}/events",
+  });
+};
+
+/**
+ * Claim Research Job
+ * Waits for a speculative deep search started by `/new-card` and returns
+ * its result. Each job can be claimed once.
+ */
+export const claimResearchJob = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<ClaimResearchJobData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).get<
+    ClaimResearchJobResponse,
+    ClaimResearchJobError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/research-jobs/{job_id}",
+  });
+};
+
+/**
+ * Execute Board
+ * Executes a whole board on the server. Independent cards run concurrently
+ * and each card starts as soon as its dependencies are done, receiving
+ * their results as context.
+ */
+export const executeBoard = <ThrowOnError extends boolean = false>(
+  options: OptionsLegacyParser<ExecuteBoardData, ThrowOnError>,
+) => {
+  return (options?.client ?? client).post<
+    ExecuteBoardResponse,
+    ExecuteBoardError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/execute-board",
+  });
+};
+
+/**
+ * Get Rate Limits
+ * Returns the current limits, in-flight requests and queue depth of the
+ * shared Anthropic rate limiter.
+ */
+export const getRateLimits = <ThrowOnError extends boolean = false>(
+  options?: OptionsLegacyParser<unknown, ThrowOnError>,
+) => {
+  return (options?.client ?? client).get<
+    GetRateLimitsResponse,
+    GetRateLimitsError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/rate-limits",
+  });
+};
+
+/**
+ * Get Deep Search Pool
+ * Returns the size, agents in use, queued requests and wait times of the
+ * deep search agent pool.
+ */
+export const getDeepSearchPool = <ThrowOnError extends boolean = false>(
+  options?: OptionsLegacyParser<unknown, ThrowOnError>,
+) => {
+  return (options?.client ?? client).get<
+    GetDeepSearchPoolResponse,
+    GetDeepSearchPoolError,
+    ThrowOnError
+  >({
+    ...options,
+    url: "/chat/deep-search/pool",
+  });
+};
+
 /**
  * Get Board Init
  * Returns initial board state. Used for Demo Mode to populate the board.
@@ -22,6 +22,166 @@ export type AgentResponse = {
   } | null;
 };
 
+/**
+ * The outcome of planning one prompt of a batch.
+ */
+export type BatchNewCardItem = {
+  index: number;
+  status: "succeeded" | "errored";
+  response?: NewCardAgentResponse | null;
+  error?: string | null;
+  status_code?: number | null;
+};
+
+export type status = "succeeded" | "errored";
+
+/**
+ * Plans boards for many prompts in one request.
+ */
+export type BatchNewCardRequest = {
+  requests: Array<AgentRequest>;
+  /**
+   * How many prompts are planned at once.
+   */
+  max_concurrency?: number;
+  /**
+   * `async` submits a message batch and returns a batch_id to poll.
+   */
+  mode?: "sync" | "async";
+};
+
+export type mode = "sync" | "async";
+
+/**
+ * Per-item results of a batch, or the handle of a pending async batch.
+ */
+export type BatchNewCardResponse = {
+  batch_id?: string | null;
+  mode: "sync" | "async";
+  status: "in_progress" | "ended";
+  results?: Array<BatchNewCardItem>;
+  execution_time: number;
+  metadata?: {
+    [key: string]: unknown;
+  };
+};
+
+export type mode2 = "sync" | "async";
+
+export type status2 = "in_progress" | "ended";
+
+/**
+ * A board of cards with dependencies to execute on the server.
+ */
+export type BoardExecutionRequest = {
+  cards: Array<NewCardData>;
+  phone_contact?: PhoneContact | null;
+  /**
+   * Let research cards split into concurrent sub-cards within this budget.
+   */
+  expansion?: ExpansionBudget | null;
+};
+
+/**
+ * Results of a board execution, in completion order.
+ */
+export type BoardExecutionResponse = {
+  results: Array<CardExecutionResult>;
+  execution_time: number;
+  metadata: {
+    [key: string]: unknown;
+  };
+};
+
+/**
+ * The outcome of executing a single card.
+ */
+export type CardExecutionResult = {
+  card_id: string;
+  task_type: TaskType;
+  status: "done" | "failed" | "skipped";
+  output?: string | null;
+  image_base64?: string | null;
+  error?: string | null;
+  /**
+   * Seconds after the start of the board execution.
+   */
+  started_at?: number | null;
+  execution_time?: number;
+  metadata?: {
+    [key: string]: unknown;
+  } | null;
+  parent_card_id?: string | null;
+  /**
+   * Results of the sub-cards this card expanded into.
+   */
+  children?: Array<CardExecutionResult>;
+};
+
+export type status3 = "done" | "failed" | "skipped";
+
+/**
+ * State of a background deep search, with its result once it has ended.
+ */
+export type DeepSearchJobResponse = {
+  job_id: string;
+  status: "queued" | "running" | "done" | "failed";
+  created_at: number;
+  completed_at?: number | null;
+  result?: AgentResponse | null;
+  error?: string | null;
+};
+
+export type status4 = "queued" | "running" | "done" | "failed";
+
+/**
+ * Request to research a prompt with the web-searching agent.
+ */
+export type DeepSearchRequest = {
+  prompt: string;
+  context?: {
+    [key: string]: unknown;
+  } | null;
+  /**
+   * Time after which the agent stops and answers from the steps it has taken so far. Defaults to DEEP_SEARCH_DEADLINE_SECONDS.
+   */
+  deadline_seconds?: number | null;
+  /**
+   * Checkpoints the run under this id after every agent step. A request with the id and prompt of an unfinished run resumes it from its last checkpoint; with another prompt, the run starts from scratch.
+   */
+  job_id?: string | null;
+  /**
+   * Identifies the user's session. Answers are stored in the session's knowledge base and earlier answers of the session to related questions are given to the agent; without it, none are.
+   */
+  session_id?: string | null;
+};
+
+/**
+ * Limits for research cards that expand into sub-cards while they run.
+ */
+export type ExpansionBudget = {
+  /**
+   * Sub-cards per card.
+   */
+  max_children?: number;
+  /**
+   * Levels of expansion.
+   */
+  max_depth?: number;
+  /**
+   * Sub-cards of one card running at once.
+   */
+  max_concurrency?: number;
+  /**
+   * Approximate tokens for a card and its sub-cards.
+   */
+  token_budget?: number;
+  /**
+   * Wall-clock limit for a card and its sub-cards.
+   */
+  time_budget_seconds?: number;
+};
+
 export type HTTPValidationError = {
   detail?: Array<ValidationError>;
 };
@@ -48,6 +208,9 @@ export type ImageGenerationResponse = {
    * The model used for generation.
    */
   model_id: string;
+  metadata?: {
+    [key: string]: unknown;
+  } | null;
 };
 
 /**
@@ -60,6 +223,20 @@ export type NewCardAgentResponse = {
   metadata: {
     [key: string]: unknown;
   };
+  /**
+   * card_ids grouped by dependency level; cards in one level can run in parallel.
+   */
+  execution_levels?: Array<Array<string>>;
+  /**
+   * The longest chain of dependent card_ids, by estimated duration.
+   */
+  critical_path?: Array<string>;
+  /**
+   * card_id -> id of the deep search already started for it. Claim it via /research-jobs/{job_id} or by sending the card's prompt, with no other field, to /deep-search.
+   */
+  research_jobs?: {
+    [key: string]: string;
+  };
 };
 
 /**
@@ -78,9 +255,35 @@ export type NewCardData = {
    * List of card_ids this card depends on.
    */
   dependencies?: Array<string>;
+  /**
+   * For sub-cards created while a card runs, the card it expanded from.
+   */
+  parent_card_id?: string | null;
 };
 
-export type status = "todo" | "doing" | "done";
+export type status5 = "todo" | "doing" | "done";
+
+/**
+ * Request to plan a board of cards from a prompt.
+ */
+export type NewCardRequest = {
+  prompt: string;
+  context?: {
+    [key: string]: unknown;
+  } | null;
+  /**
+   * `text` parses the cards out of the model's text; `tool` has the model return them as structured tool input. Defaults to NEW_CARD_GENERATION_MODE.
+   */
+  generation_mode?: "text" | "tool" | null;
+  /**
+   * Start the deep search of root research cards right away. Defaults to NEW_CARD_SPECULATIVE_RESEARCH.
+   */
+  speculative_research?: boolean | null;
+  /**
+   * Identifies the user's session. Cards equivalent to ones of the session's recent boards are reported in the deduplication metadata.
+   */
+  session_id?: string | null;
+};
 
 export type OutboundCallRequest = {
   /**
@@ -112,6 +315,31 @@ export type OutboundCallResponse = {
   } | null;
 };
 
+/**
+ * Who to call when a board contains phone tasks.
+ */
+export type PhoneContact = {
+  /**
+   * Phone number of the recipient (E.164 format).
+   */
+  target_number: string;
+  /**
+   * Name of the person being called.
+   */
+  name: string;
+};
+
+/**
+ * An existing board and one card of it that the user edited.
+ */
+export type ReplanCardsRequest = {
+  cards: Array<NewCardData>;
+  /**
+   * The new version of one card of `cards`, with the same card_id.
+   */
+  edited_card: NewCardData;
+};
+
 /**
  * The types of tasks our agent can create. Start with one, add more later.
  */
@@ -140,21 +368,145 @@ export type TriggerOutboundCallResponse = OutboundCallResponse;
 export type TriggerOutboundCallError = HTTPValidationError;
 
 export type CreateNewCardFromPromptData = {
-  body: AgentRequest;
+  body: NewCardRequest;
 };
 
 export type CreateNewCardFromPromptResponse = NewCardAgentResponse;
 
 export type CreateNewCardFromPromptError = HTTPValidationError;
 
-export type PerformDeepSearchData = {
+export type ReplanNewCardsData = {
+  body: ReplanCardsRequest;
+};
+
+export type ReplanNewCardsResponse = NewCardAgentResponse;
+
+export type ReplanNewCardsError = HTTPValidationError;
+
+export type CreateNewCardsInBatchData = {
+  body: BatchNewCardRequest;
+};
+
+export type CreateNewCardsInBatchResponse = BatchNewCardResponse;
+
+export type CreateNewCardsInBatchError = HTTPValidationError;
+
+export type GetNewCardBatchData = {
+  path: {
+    batch_id: string;
+  };
+};
+
+export type GetNewCardBatchResponse = BatchNewCardResponse;
+
+export type GetNewCardBatchError = HTTPValidationError;
+
+export type StreamNewCardsFromPromptData = {
   body: AgentRequest;
 };
 
+export type StreamNewCardsFromPromptResponse = unknown;
+
+export type StreamNewCardsFromPromptError = HTTPValidationError;
+
+export type PerformDeepSearchData = {
+  body: DeepSearchRequest;
+  headers?: {
+    "x-deadline-seconds"?: number | null;
+  };
+};
+
 export type PerformDeepSearchResponse = AgentResponse;
 
 export type PerformDeepSearchError = HTTPValidationError;
 
+export type StreamDeepSearchData = {
+  body: DeepSearchRequest;
+  headers?: {
+    "x-deadline-seconds"?: number | null;
+  };
+};
+
+export type StreamDeepSearchResponse = unknown;
+
+export type StreamDeepSearchError = HTTPValidationError;
+
+export type StopDeepSearchData = {
+  path: {
+    run_id: string;
+  };
+};
+
+export type StopDeepSearchResponse = {
+  [key: string]: unknown;
+};
+
+export type StopDeepSearchError = HTTPValidationError;
+
+export type SubmitDeepSearchJobData = {
+  body: DeepSearchRequest;
+  headers?: {
+    "x-deadline-seconds"?: number | null;
+  };
+};
+
+export type SubmitDeepSearchJobResponse = DeepSearchJobResponse;
+
+export type SubmitDeepSearchJobError = HTTPValidationError;
+
+export type GetDeepSearchJobData = {
+  path: {
+    job_id: string;
+  };
+  query?: {
+    wait?: number;
+  };
+};
+
+export type GetDeepSearchJobResponse = DeepSearchJobResponse;
+
+export type GetDeepSearchJobError = HTTPValidationError;
+
+export type StreamDeepSearchJobData = {
+  path: {
+    job_id: string;
+  };
+};
+
+export type StreamDeepSearchJobResponse = unknown;
+
+export type StreamDeepSearchJobError = HTTPValidationError;
+
+export type ClaimResearchJobData = {
+  path: {
+    job_id: string;
+  };
+};
+
+export type ClaimResearchJobResponse = AgentResponse;
+
+export type ClaimResearchJobError = HTTPValidationError;
+
+export type ExecuteBoardData = {
+  body: BoardExecutionRequest;
+};
+
+export type ExecuteBoardResponse = BoardExecutionResponse;
+
+export type ExecuteBoardError = HTTPValidationError;
+
+export type GetRateLimitsResponse = {
+  [key: string]: unknown;
+};
+
+export type GetRateLimitsError = unknown;
+
+export type GetDeepSearchPoolResponse = {
+  [key: string]: unknown;
+};
+
+export type GetDeepSearchPoolError = unknown;
+
 export type GetBoardInitResponse = NewCardAgentResponse;
 
 export type GetBoardInitError = unknown;